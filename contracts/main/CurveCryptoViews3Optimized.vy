@@ -49,10 +49,14 @@ interface Math:
     def reduction_coefficient(
         x: uint256[N_COINS], fee_gamma: uint256
     ) -> uint256: view
+    def get_p(
+        _xp: uint256[N_COINS], _D: uint256, _A_gamma: uint256[N_COINS-1]
+    ) -> uint256[N_COINS-1]: view
 
 
 N_COINS: constant(uint256) = 3
 PRECISION: constant(uint256) = 10**18
+MAX_QUOTES: constant(uint256) = 64
 
 
 @external
@@ -71,24 +75,199 @@ def get_dy(
     return dy
 
 
+@external
+@view
+def get_dy_many(
+    i: DynArray[uint256, MAX_QUOTES],
+    j: DynArray[uint256, MAX_QUOTES],
+    dx: DynArray[uint256, MAX_QUOTES],
+    swap: address
+) -> DynArray[uint256, MAX_QUOTES]:
+    """
+    @notice Batched get_dy: quotes every (i[k], j[k], dx[k]) against the same
+            pool state, which is read from the pool only once.
+    @param i Indices of the input coins.
+    @param j Indices of the output coins.
+    @param dx Input amounts.
+    @param swap Address of the pool.
+    @return The get_dy result for each quote.
+    """
+    assert len(i) == len(dx) and len(j) == len(dx), "length mismatch"
+
+    math: Math = Curve(swap).MATH()
+    fee_params: uint256[3] = self._unpack(Curve(swap).packed_fee_params())
+
+    xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    precisions: uint256[N_COINS] = empty(uint256[N_COINS])
+    price_scale: uint256[N_COINS-1] = empty(uint256[N_COINS-1])
+    D: uint256 = 0
+    token_supply: uint256 = 0
+    A: uint256 = 0
+    gamma: uint256 = 0
+
+    xp, D, token_supply, price_scale, A, gamma, precisions = self._prep_calc(swap)
+
+    dy: DynArray[uint256, MAX_QUOTES] = []
+    _dy: uint256 = 0
+    _xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    for k in range(MAX_QUOTES):
+        if k == len(dx):
+            break
+
+        _dy, _xp = self._calc_dy_nofee(
+            i[k], j[k], dx[k], xp, D, price_scale, A, gamma, precisions, math
+        )
+        _dy -= self._calc_fee(_xp, fee_params, math) * _dy / 10**10
+        dy.append(_dy)
+
+    return dy
+
+
+@external
+@view
+def get_dy_samples(
+    i: uint256,
+    j: uint256,
+    dx: uint256,
+    ratio: uint256,
+    n_samples: uint256,
+    swap: address
+) -> DynArray[uint256[3], MAX_QUOTES]:
+    """
+    @notice Samples the price impact curve of swapping coin i for coin j:
+            quotes n_samples geometrically spaced input amounts, dx,
+            dx * ratio, dx * ratio**2, ... against the same pool state,
+            which is read from the pool only once.
+    @param i Index of the input coin.
+    @param j Index of the output coin.
+    @param dx Input amount of the first sample.
+    @param ratio Ratio between the input amounts of consecutive samples,
+                 in 1e18 precision. Must be above 1e18.
+    @param n_samples Number of samples, at most MAX_QUOTES.
+    @param swap Address of the pool.
+    @return [dx, dy, fee] for each sample, with dy and fee as returned by
+            get_dy and calc_fee_get_dy. Sampling stops at the first input
+            amount that get_dy would revert on (or that overflows), so
+            fewer than n_samples rows are returned for large inputs.
+    """
+    assert n_samples <= MAX_QUOTES, "too many samples"
+    assert ratio > PRECISION, "ratio too small"
+
+    math: Math = Curve(swap).MATH()
+    fee_params: uint256[3] = self._unpack(Curve(swap).packed_fee_params())
+
+    xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    precisions: uint256[N_COINS] = empty(uint256[N_COINS])
+    price_scale: uint256[N_COINS-1] = empty(uint256[N_COINS-1])
+    D: uint256 = 0
+    token_supply: uint256 = 0
+    A: uint256 = 0
+    gamma: uint256 = 0
+
+    xp, D, token_supply, price_scale, A, gamma, precisions = self._prep_calc(swap)
+
+    samples: DynArray[uint256[3], MAX_QUOTES] = []
+    _dx: uint256 = dx
+    dy: uint256 = 0
+    fee: uint256 = 0
+    _xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    success: bool = False
+    for k in range(MAX_QUOTES):
+        if k == n_samples:
+            break
+
+        success, dy, _xp = self._try_calc_dy_nofee(
+            i, j, _dx, xp, D, price_scale, A, gamma, precisions, math
+        )
+        if not success:
+            break  # <----------------- larger inputs are out of range too.
+
+        fee = self._calc_fee(_xp, fee_params, math) * dy / 10**10
+        samples.append([_dx, dy - fee, fee])
+
+        if _dx > max_value(uint256) / ratio:
+            break
+        _dx = _dx * ratio / PRECISION
+
+    return samples
+
+
 @view
 @external
 def get_dx(
     i: uint256, j: uint256, dy: uint256, swap: address
 ) -> uint256:
 
-    dx: uint256 = 0
+    math: Math = Curve(swap).MATH()
+    fee_params: uint256[3] = self._unpack(Curve(swap).packed_fee_params())
+
     xp: uint256[N_COINS] = empty(uint256[N_COINS])
-    fee_dy: uint256 = 0
-    _dy: uint256 = dy
+    precisions: uint256[N_COINS] = empty(uint256[N_COINS])
+    price_scale: uint256[N_COINS-1] = empty(uint256[N_COINS-1])
+    D: uint256 = 0
+    token_supply: uint256 = 0
+    A: uint256 = 0
+    gamma: uint256 = 0
 
-    # for more precise dx (but never exact), increase num loops
-    for k in range(5):
-        dx, xp = self._get_dx_fee(i, j, _dy, swap)
-        fee_dy = Curve(swap).fee_calc(xp) * _dy / 10**10
-        _dy = dy + fee_dy + 1
+    xp, D, token_supply, price_scale, A, gamma, precisions = self._prep_calc(swap)
 
-    return dx
+    # get_dy(dx) = dy_nofee * (1 - fee), with the fee taken at the state
+    # after the trade, which itself depends on dy_nofee: dy_nofee is the
+    # fixed point dy3 of y -> dy / (1 - fee(y)) + 1 (+ 1 for the 1 wei that
+    # get_dy keeps in the pool). Two solves find the states at dy and at
+    # dy2, one step of it away:
+    dx1: uint256 = 0
+    dx2: uint256 = 0
+    _xp: uint256[N_COINS] = empty(uint256[N_COINS])
+
+    dx1, _xp = self._calc_dx_fee(
+        i, j, dy, xp, D, price_scale, A, gamma, precisions, math
+    )
+    fee1: uint256 = self._calc_fee(_xp, fee_params, math)
+
+    dy2: uint256 = dy * 10**10 / (10**10 - fee1) + 1
+    dx2, _xp = self._calc_dx_fee(
+        i, j, dy2, xp, D, price_scale, A, gamma, precisions, math
+    )
+    fee2: uint256 = self._calc_fee(_xp, fee_params, math)
+
+    # Beyond them, dx(y) is the quadratic through (dy, dx1) and (dy2, dx2)
+    # with the slope at dy2, the price of j in i there. At dy3 its error is
+    # about dx'''(y) / 6 * (dy3 - dy2)**2 * (dy3 - dy), where dy3 - dy2 is
+    # (fee2 - fee1) / 10**10 * dy or so.
+    p: uint256[N_COINS-1] = math.get_p(_xp, D, [A, gamma])
+    price: uint256[N_COINS] = [
+        PRECISION,
+        p[0] * price_scale[0] / PRECISION,
+        p[1] * price_scale[1] / PRECISION,
+    ]
+    num: int256 = convert(price[j] * precisions[j], int256)
+    den: int256 = convert(price[i] * precisions[i], int256)
+
+    # Each step of the fixed point iteration shrinks the distance to dy3 by
+    # a factor L ~ (fee2 - fee1) / fee1, below 1e-2 up to a third of the
+    # pool. Extrapolating the fee linearly from fee1 and fee2 gets within a
+    # unit (1e-10) of the fee at dy3, and the fee at the interpolated state
+    # there is then off by L units at most:
+    dy3: uint256 = dy * 10**10 / (10**10 - fee2) + 1
+    fee3: int256 = convert(fee2, int256) + (
+        (convert(fee2, int256) - convert(fee1, int256))
+        * (convert(dy3, int256) - convert(dy2, int256))
+        / convert(dy2 - dy, int256)
+    )
+    dy3 = dy * 10**10 / (10**10 - convert(fee3, uint256)) + 1
+
+    _xp = xp
+    _xp[i] += self._interpolate_dx(dy3, dy, dx1, dy2, dx2, num, den)
+    _xp[j] -= dy3
+    _xp[0] *= precisions[0]
+    for k in range(N_COINS - 1):
+        _xp[k + 1] = (
+            _xp[k + 1] * price_scale[k] * precisions[k + 1] / PRECISION
+        )
+    dy3 = dy * 10**10 / (10**10 - self._calc_fee(_xp, fee_params, math)) + 1
+
+    return self._interpolate_dx(dy3, dy, dx1, dy2, dx2, num, den)
 
 
 @view
@@ -181,8 +360,17 @@ def _calc_D_ramp(
 
 @internal
 @view
-def _get_dx_fee(
-    i: uint256, j: uint256, dy: uint256, swap: address
+def _calc_dx_fee(
+    i: uint256,
+    j: uint256,
+    dy: uint256,
+    _xp: uint256[N_COINS],
+    D: uint256,
+    price_scale: uint256[N_COINS-1],
+    A: uint256,
+    gamma: uint256,
+    precisions: uint256[N_COINS],
+    math: Math,
 ) -> (uint256, uint256[N_COINS]):
 
     # here, dy must include fees (and 1 wei offset)
@@ -190,20 +378,9 @@ def _get_dx_fee(
     assert i != j and i < N_COINS and j < N_COINS, "coin index out of range"
     assert dy > 0, "do not exchange out 0 coins"
 
-    math: Math = Curve(swap).MATH()
-
-    xp: uint256[N_COINS] = empty(uint256[N_COINS])
-    precisions: uint256[N_COINS] = empty(uint256[N_COINS])
-    price_scale: uint256[N_COINS-1] = empty(uint256[N_COINS-1])
-    D: uint256 = 0
-    token_supply: uint256 = 0
-    A: uint256 = 0
-    gamma: uint256 = 0
-
-    xp, D, token_supply, price_scale, A, gamma, precisions = self._prep_calc(swap)
-
     # adjust xp with output dy. dy contains fee element, which we handle later
-    # (hence this internal method is called _get_dx_fee)
+    # (hence this internal method is called _calc_dx_fee)
+    xp: uint256[N_COINS] = _xp
     xp[j] -= dy
     xp[0] *= precisions[0]
     for k in range(N_COINS - 1):
@@ -225,9 +402,6 @@ def _get_dy_nofee(
     i: uint256, j: uint256, dx: uint256, swap: address
 ) -> (uint256, uint256[N_COINS]):
 
-    assert i != j and i < N_COINS and j < N_COINS, "coin index out of range"
-    assert dx > 0, "do not exchange 0 coins"
-
     math: Math = Curve(swap).MATH()
 
     xp: uint256[N_COINS] = empty(uint256[N_COINS])
@@ -240,7 +414,31 @@ def _get_dy_nofee(
 
     xp, D, token_supply, price_scale, A, gamma, precisions = self._prep_calc(swap)
 
+    return self._calc_dy_nofee(
+        i, j, dx, xp, D, price_scale, A, gamma, precisions, math
+    )
+
+
+@internal
+@view
+def _calc_dy_nofee(
+    i: uint256,
+    j: uint256,
+    dx: uint256,
+    _xp: uint256[N_COINS],
+    D: uint256,
+    price_scale: uint256[N_COINS-1],
+    A: uint256,
+    gamma: uint256,
+    precisions: uint256[N_COINS],
+    math: Math,
+) -> (uint256, uint256[N_COINS]):
+
+    assert i != j and i < N_COINS and j < N_COINS, "coin index out of range"
+    assert dx > 0, "do not exchange 0 coins"
+
     # adjust xp with input dx
+    xp: uint256[N_COINS] = _xp
     xp[i] += dx
     xp[0] *= precisions[0]
     for k in range(N_COINS - 1):
@@ -256,6 +454,75 @@ def _get_dy_nofee(
     return dy, xp
 
 
+@internal
+@view
+def _try_calc_dy_nofee(
+    i: uint256,
+    j: uint256,
+    dx: uint256,
+    _xp: uint256[N_COINS],
+    D: uint256,
+    price_scale: uint256[N_COINS-1],
+    A: uint256,
+    gamma: uint256,
+    precisions: uint256[N_COINS],
+    math: Math,
+) -> (bool, uint256, uint256[N_COINS]):
+    # _calc_dy_nofee, but returns False instead of reverting if dx overflows
+    # or is outside the domain of math.get_y:
+
+    assert i != j and i < N_COINS and j < N_COINS, "coin index out of range"
+    assert dx > 0, "do not exchange 0 coins"
+
+    xp: uint256[N_COINS] = _xp
+    scale: uint256 = precisions[0]
+    if i > 0:
+        scale = price_scale[i - 1] * precisions[i]
+    if dx > max_value(uint256) / scale - xp[i]:
+        return False, 0, xp
+
+    # adjust xp with input dx
+    xp[i] += dx
+    xp[0] *= precisions[0]
+    for k in range(N_COINS - 1):
+        xp[k + 1] = xp[k + 1] * price_scale[k] * precisions[k + 1] / PRECISION
+
+    # get_y's bound on the input balance, which only grows with dx:
+    if (
+        xp[i] > max_value(uint256) / PRECISION
+        or xp[i] * PRECISION / D > 10**20
+    ):
+        return False, 0, xp
+
+    # get_y also reverts if y is out of its bounds, which is only known by
+    # solving for it:
+    success: bool = False
+    response: Bytes[64] = b""
+    success, response = raw_call(
+        math.address,
+        _abi_encode(
+            A, gamma, xp, D, j,
+            method_id=method_id(
+                "get_y(uint256,uint256,uint256[3],uint256,uint256)"
+            )
+        ),
+        max_outsize=64,
+        revert_on_failure=False,
+        is_static_call=True
+    )
+    if not success:
+        return False, 0, xp
+
+    y: uint256 = extract32(response, 0, output_type=uint256)
+    dy: uint256 = xp[j] - y - 1
+    xp[j] = y
+    if j > 0:
+        dy = dy * PRECISION / price_scale[j - 1]
+    dy /= precisions[j]
+
+    return True, dy, xp
+
+
 @internal
 @view
 def _calc_dtoken_nofee(
@@ -365,6 +632,36 @@ def _fee(xp: uint256[N_COINS], swap: address) -> uint256:
     math: Math = Curve(swap).MATH()
     packed_fee_params: uint256 = Curve(swap).packed_fee_params()
     fee_params: uint256[3] = self._unpack(packed_fee_params)
+    return self._calc_fee(xp, fee_params, math)
+
+
+@internal
+@pure
+def _interpolate_dx(
+    dy: uint256,
+    dy1: uint256,
+    dx1: uint256,
+    dy2: uint256,
+    dx2: uint256,
+    num: int256,
+    den: int256,
+) -> uint256:
+
+    # quadratic through (dy1, dx1) and (dy2, dx2), with slope num / den at dy2
+    h: int256 = convert(dy2 - dy1, int256)
+    d: int256 = convert(dy, int256) - convert(dy2, int256)
+    c: int256 = convert(dx1, int256) - convert(dx2, int256) + h * num / den
+
+    return convert(
+        convert(dx2, int256) + d * num / den + c * d / h * d / h, uint256
+    )
+
+
+@internal
+@view
+def _calc_fee(
+    xp: uint256[N_COINS], fee_params: uint256[3], math: Math
+) -> uint256:
     f: uint256 = math.reduction_coefficient(xp, fee_params[2])
     return (fee_params[0] * f + fee_params[1] * (10**18 - f)) / 10**18
 
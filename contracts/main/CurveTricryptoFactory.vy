@@ -9,6 +9,7 @@
 
 interface TricryptoPool:
     def balances(i: uint256) -> uint256: view
+    def claim_admin_fees(): nonpayable
 
 interface ERC20:
     def decimals() -> uint256: view
@@ -64,6 +65,7 @@ struct PoolArray:
     liquidity_gauge: address
     coins: address[N_COINS]
     decimals: uint256[N_COINS]
+    implementation: address
 
 
 N_COINS: constant(uint256) = 3
@@ -81,6 +83,11 @@ MAX_A: constant(uint256) = 1000 * A_MULTIPLIER * N_COINS**N_COINS
 PRICE_SIZE: constant(uint128) = 256 / (N_COINS - 1)
 PRICE_MASK: constant(uint256) = 2**PRICE_SIZE - 1
 
+MAX_CLAIM_POOLS: constant(uint256) = 100
+MAX_VIEW_POOLS: constant(uint256) = 1000
+# vyper reserves memory for the largest array, which every caller pays for:
+MAX_POOL_DATA: constant(uint256) = 100
+
 admin: public(address)
 future_admin: public(address)
 
@@ -238,6 +245,7 @@ def deploy_pool(
     self.pool_count = length + 1
     self.pool_data[pool].decimals = decimals
     self.pool_data[pool].coins = _coins
+    self.pool_data[pool].implementation = pool_implementation
 
     # add coins to market:
     self._add_coins_to_market(_coins[0], _coins[1], pool)
@@ -293,6 +301,21 @@ def deploy_gauge(_pool: address) -> address:
     return gauge
 
 
+@external
+def claim_many(_pools: DynArray[address, MAX_CLAIM_POOLS]):
+    """
+    @notice Claim the admin fees of many pools for the fee receiver
+    @dev Callable by anyone. Pools not deployed by this factory are skipped,
+         and pools with no fees to claim return before doing any math.
+    @param _pools Factory pool addresses to claim admin fees of
+    """
+    for pool in _pools:
+        if self.pool_data[pool].coins[0] == empty(address):
+            continue  # <------------------------- Not deployed by this factory.
+
+        TricryptoPool(pool).claim_admin_fees()
+
+
 # <--- Admin / Guarded Functionality --->
 
 
@@ -392,6 +415,72 @@ def accept_transfer_ownership():
 # <--- Factory Getters --->
 
 
+@view
+@external
+def get_implementation_address(_pool: address) -> address:
+    """
+    @notice Get the address of the implementation contract used for a factory pool
+    @param _pool Pool address
+    @return Implementation contract address
+    """
+    return self.pool_data[_pool].implementation
+
+
+@view
+@external
+def pool_list_range(
+    _start: uint256, _count: uint256
+) -> DynArray[address, MAX_VIEW_POOLS]:
+    """
+    @notice Get a page of the master list of pools
+    @dev Returns less than `_count` pools past the end of the list, and at
+         most MAX_VIEW_POOLS pools
+    @param _start Index of the first pool in `pool_list`
+    @param _count Number of pools
+    @return List of pool addresses
+    """
+    pools: DynArray[address, MAX_VIEW_POOLS] = []
+    pool_count: uint256 = self.pool_count
+    if _start >= pool_count:
+        return pools
+
+    end: uint256 = min(pool_count, _start + min(_count, MAX_VIEW_POOLS))
+    for i in range(_start, _start + MAX_VIEW_POOLS):
+        if i == end:
+            break
+        pools.append(self.pool_list[i])
+
+    return pools
+
+
+@view
+@external
+def find_pools_for_coins(
+    _from: address, _to: address, _start: uint256 = 0
+) -> DynArray[address, MAX_VIEW_POOLS]:
+    """
+    @notice Find all available pools for exchanging two coins
+    @dev Returns at most MAX_VIEW_POOLS pools: use `_start` to page
+         through more
+    @param _from Address of coin to be sent
+    @param _to Address of coin to be received
+    @param _start Index of the first pool, as in `find_pool_for_coins`
+    @return List of pool addresses
+    """
+    key: uint256 = convert(_from, uint256) ^ convert(_to, uint256)
+    pools: DynArray[address, MAX_VIEW_POOLS] = []
+    market_count: uint256 = self.market_counts[key]
+    if _start >= market_count:
+        return pools
+
+    for i in range(_start, _start + MAX_VIEW_POOLS):
+        if i == market_count:
+            break
+        pools.append(self.markets[key][i])
+
+    return pools
+
+
 @view
 @external
 def find_pool_for_coins(_from: address, _to: address, i: uint256 = 0) -> address:
@@ -475,6 +564,26 @@ def get_coin_indices(
     raise "Coins not found"
 
 
+@view
+@external
+def get_pool_data_many(
+    _pools: DynArray[address, MAX_POOL_DATA]
+) -> DynArray[PoolArray, MAX_POOL_DATA]:
+    """
+    @notice Get the gauge, coins, decimals and implementation of many pools
+    @dev Takes at most MAX_POOL_DATA pools: page through more by address,
+         e.g. through the pages of `pool_list_range`. Pools not deployed by
+         this factory have every field empty.
+    @param _pools Pool addresses
+    @return List of (gauge, coins, decimals, implementation), one per pool
+    """
+    pool_data: DynArray[PoolArray, MAX_POOL_DATA] = []
+    for pool in _pools:
+        pool_data.append(self.pool_data[pool])
+
+    return pool_data
+
+
 @view
 @external
 def get_gauge(_pool: address) -> address:
@@ -135,32 +135,37 @@ factory: public(immutable(Factory))
 
 price_scale_packed: uint256  # <------------------------ Internal price scale.
 price_oracle_packed: uint256  # <------- Price target given by moving average.
-cached_xcp_oracle: uint256  # <----------- EMA of totalSupply * virtual_price.
-
 last_prices_packed: uint256
-last_timestamp: public(uint256)    # idx 0 is for prices, idx 1 is for xcp.
-last_xcp: public(uint256)
-xcp_ma_time: public(uint256)
+
+#     Every exchange reads (and mostly writes) the state below, so it is packed
+#     into as few slots as possible: each cold slot read costs 2100 gas. Values
+#          packed into one slot are read and written together, and have getters
+#                                                    with their original names.
+
+packed_xcp_oracle: uint256  # <------------ Packs cached_xcp_oracle, last_xcp.
+#     cached_xcp_oracle is the EMA of totalSupply * virtual_price, and last_xcp
+#                                           the latest value that goes into it.
+
+packed_profit: uint256  # <------------------ Packs xcp_profit, virtual_price.
+#          virtual_price is the cached (fast to read) virtual price. The cached
+#                                      `virtual_price` is also used internally.
+
+packed_times: uint256  # <---- Packs the last_timestamp of prices and of xcp,
+#    future_A_gamma_time and xcp_ma_time (64 bits each). future_A_gamma_time is
+#     the time when ramping is finished. This value is 0 (default) when pool is
+#   first deployed, and only gets populated by block.timestamp + future_time in
+#        `ramp_A_gamma` when the ramping process is initiated. After ramping is
+#      finished (i.e. future_A_gamma_time < block.timestamp), the value is left
+#                                                             and not set to 0.
 
 initial_A_gamma: public(uint256)
 initial_A_gamma_time: public(uint256)
-
 future_A_gamma: public(uint256)
-future_A_gamma_time: public(uint256)  # <------ Time when ramping is finished.
-#         This value is 0 (default) when pool is first deployed, and only gets
-#        populated by block.timestamp + future_time in `ramp_A_gamma` when the
-#                      ramping process is initiated. After ramping is finished
-#      (i.e. self.future_A_gamma_time < block.timestamp), the variable is left
-#                                                            and not set to 0.
 
 balances: public(uint256[N_COINS])
 D: public(uint256)
-xcp_profit: public(uint256)
 xcp_profit_a: public(uint256)  # <--- Full profit at last claim of admin fees.
 
-virtual_price: public(uint256)  # <------ Cached (fast to read) virtual price.
-#                          The cached `virtual_price` is also used internally.
-
 # Params that affect how price_scale get adjusted :
 packed_rebalancing_params: public(uint256)  # <---------- Contains rebalancing
 #               parameters allowed_extra_profit, adjustment_step, and ma_time.
@@ -254,9 +259,10 @@ def __init__(
     self.price_scale_packed = packed_prices
     self.price_oracle_packed = packed_prices
     self.last_prices_packed = packed_prices
-    self.last_timestamp = self._pack_2(block.timestamp, block.timestamp)
+    self.packed_times = self._pack_4(
+        [block.timestamp, block.timestamp, 0, 62324]
+    )  # <------------------ xcp_ma_time is 12 hours default on contract start.
     self.xcp_profit_a = 10**18
-    self.xcp_ma_time = 62324  # <--------- 12 hours default on contract start.
 
     #         Cache DOMAIN_SEPARATOR. If chain.id is not CACHED_CHAIN_ID, then
     #     DOMAIN_SEPARATOR will be re-calculated each time `permit` is called.
@@ -515,7 +521,8 @@ def add_liquidity(
 
     # -------------------- Calculate LP tokens to mint -----------------------
 
-    if self.future_A_gamma_time > block.timestamp:  # <--- A_gamma is ramping.
+    if self._unpack_4(self.packed_times)[2] > block.timestamp:  # <- A_gamma
+        #                                                        is ramping.
 
         # ----- Recalculate the invariant if A or gamma are undergoing a ramp.
         old_D = MATH.newton_D(A_gamma[0], A_gamma[1], xp_old, 0)
@@ -553,12 +560,14 @@ def add_liquidity(
         # (re)instatiating an empty pool:
 
         self.D = D
-        self.virtual_price = 10**18
-        self.xcp_profit = 10**18
+        self.packed_profit = self._pack_2(10**18, 10**18)  # <--- xcp_profit
+        #                                                 and virtual_price.
         self.xcp_profit_a = 10**18
 
-        # Initialise xcp oracle here:
-        self.cached_xcp_oracle = d_token  # <--- virtual_price * totalSupply / 10**18
+        # Initialise xcp oracle here (virtual_price * totalSupply / 10**18):
+        self.packed_xcp_oracle = self._pack_2(
+            d_token, self._unpack_2(self.packed_xcp_oracle)[1]
+        )
 
         self.mint(receiver, d_token)
 
@@ -642,23 +651,23 @@ def remove_liquidity(
     xp: uint256[N_COINS] = self.xp(self.balances, self.price_scale_packed)
     last_xcp: uint256 = MATH.geometric_mean(xp)  # <----------- Cache it for now.
 
-    last_timestamp: uint256[2] = self._unpack_2(self.last_timestamp)
-    if last_timestamp[1] < block.timestamp:
+    cached_xcp_oracle: uint256 = self._unpack_2(self.packed_xcp_oracle)[0]
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    if times[1] < block.timestamp:
 
-        cached_xcp_oracle: uint256 = self.cached_xcp_oracle
-        alpha: uint256 = self._alpha(last_timestamp[1], self.xcp_ma_time)
+        alpha: uint256 = self._alpha(times[1], times[3])
 
-        self.cached_xcp_oracle = unsafe_div(
+        cached_xcp_oracle = unsafe_div(
             last_xcp * (10**18 - alpha) + cached_xcp_oracle * alpha,
             10**18
         )
-        last_timestamp[1] = block.timestamp
+        times[1] = block.timestamp
 
         # Pack and store timestamps:
-        self.last_timestamp = self._pack_2(last_timestamp[0], last_timestamp[1])
+        self.packed_times = self._pack_4(times)
 
-    # Store last xcp
-    self.last_xcp = last_xcp
+    # Store xcp oracle and last xcp
+    self.packed_xcp_oracle = self._pack_2(cached_xcp_oracle, last_xcp)
 
     return withdraw_amounts
 
@@ -698,8 +707,8 @@ def remove_liquidity_one_coin(
         A_gamma,
         token_amount,
         i,
-        (self.future_A_gamma_time > block.timestamp),  # <------- During ramps
-    )  #                                                  we need to update D.
+        (self._unpack_4(self.packed_times)[2] > block.timestamp),  # <- During
+    )  #                                             ramps we need to update D.
 
     assert dy >= min_amount, "Slippage"
 
@@ -724,6 +733,21 @@ def remove_liquidity_one_coin(
     return dy
 
 
+@external
+@nonreentrant("lock")
+def claim_admin_fees():
+    """
+    @notice Claim admin fees. Callable by anyone.
+    @dev Does nothing if the pool made no profit since the last claim, fees
+         were claimed less than MIN_ADMIN_FEE_CLAIM_INTERVAL ago or
+         parameters are being ramped.
+    """
+    # Pools swept for fees have mostly made no profit since the last claim,
+    # so check that first (_claim_admin_fees checks it last):
+    if self._unpack_2(self.packed_profit)[0] > self.xcp_profit_a:
+        self._claim_admin_fees()
+
+
 # -------------------------- Packing functions -------------------------------
 
 
@@ -754,9 +778,37 @@ def _unpack_3(_packed: uint256) -> uint256[3]:
 
 
 
+@internal
+@pure
+def _pack_4(x: uint256[4]) -> uint256:
+    """
+    @notice Packs 4 integers with values < 2**64 into a uint256
+    @param x The uint256[4] to pack
+    @return uint256 Integer with packed values
+    """
+    return (x[0] << 192) | (x[1] << 128) | (x[2] << 64) | x[3]
+
+
+@internal
+@pure
+def _unpack_4(_packed: uint256) -> uint256[4]:
+    """
+    @notice Unpacks a uint256 into 4 integers (values must be < 2**64)
+    @param _packed The uint256 to unpack
+    @return uint256[4] A list of length 4 with unpacked integers
+    """
+    return [
+        _packed >> 192,
+        (_packed >> 128) & 18446744073709551615,
+        (_packed >> 64) & 18446744073709551615,
+        _packed & 18446744073709551615,
+    ]
+
+
 @pure
 @internal
 def _pack_2(p1: uint256, p2: uint256) -> uint256:
+    assert p1 < 2**128 and p2 < 2**128  # dev: value too large to pack
     return p1 | (p2 << 128)
 
 
@@ -838,8 +890,7 @@ def _exchange(
 
     # ----------- Update invariant if A, gamma are undergoing ramps ---------
 
-    t: uint256 = self.future_A_gamma_time
-    if t > block.timestamp:
+    if self._unpack_4(self.packed_times)[2] > block.timestamp:
 
         x0 *= prec_i
 
@@ -910,14 +961,19 @@ def tweak_price(
     # Contains: allowed_extra_profit, adjustment_step, ma_time. -----^
 
     total_supply: uint256 = self.totalSupply
-    old_xcp_profit: uint256 = self.xcp_profit
-    old_virtual_price: uint256 = self.virtual_price
+    profit: uint256[2] = self._unpack_2(self.packed_profit)
+    old_xcp_profit: uint256 = profit[0]
+    old_virtual_price: uint256 = profit[1]
+    xcp_oracle: uint256[2] = self._unpack_2(self.packed_xcp_oracle)
+    # Contains: cached_xcp_oracle, last_xcp. ---^
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    # Contains: last_timestamp of prices and of xcp, future_A_gamma_time, and
+    # xcp_ma_time. ---^
 
     # ----------------------- Update Oracles if needed -----------------------
 
-    last_timestamp: uint256[2] = self._unpack_2(self.last_timestamp)
     alpha: uint256 = 0
-    if last_timestamp[0] < block.timestamp:  # 0th index is for price_oracle.
+    if times[0] < block.timestamp:  # <---- 0th index is for price_oracle.
 
         #   The moving average price oracle is calculated using the last_price
         #      of the trade at the previous block, and the price oracle logged
@@ -925,7 +981,7 @@ def tweak_price(
 
         # ------------------ Calculate moving average params -----------------
 
-        alpha = self._alpha(last_timestamp[0], rebalancing_params[2])
+        alpha = self._alpha(times[0], rebalancing_params[2])
         for k in range(N_COINS - 1):
 
             # ----------------- We cap state price that goes into the EMA with
@@ -937,23 +993,22 @@ def tweak_price(
             )
 
         self.price_oracle_packed = self._pack_prices(price_oracle)
-        last_timestamp[0] = block.timestamp
+        times[0] = block.timestamp
 
     # ----------------------------------------------------- Update xcp oracle.
 
-    if last_timestamp[1] < block.timestamp:
+    if times[1] < block.timestamp:
 
-        cached_xcp_oracle: uint256 = self.cached_xcp_oracle
-        alpha = self._alpha(last_timestamp[1], self.xcp_ma_time)
-        self.cached_xcp_oracle = unsafe_div(
-            self.last_xcp * (10**18 - alpha) + cached_xcp_oracle * alpha,
+        alpha = self._alpha(times[1], times[3])
+        xcp_oracle[0] = unsafe_div(
+            xcp_oracle[1] * (10**18 - alpha) + xcp_oracle[0] * alpha,
             10**18
         )
 
         # Pack and store timestamps:
-        last_timestamp[1] = block.timestamp
+        times[1] = block.timestamp
 
-    self.last_timestamp = self._pack_2(last_timestamp[0], last_timestamp[1])
+    self.packed_times = self._pack_4(times)
 
     #  `price_oracle` is used further on to calculate its vector distance from
     # price_scale. This distance is used to calculate the amount of adjustment
@@ -998,14 +1053,14 @@ def tweak_price(
         #       If A and gamma are not undergoing ramps (t < block.timestamp),
         #         ensure new virtual_price is not less than old virtual_price,
         #                                        else the pool suffers a loss.
-        if self.future_A_gamma_time < block.timestamp:
+        if times[2] < block.timestamp:
             assert virtual_price > old_virtual_price, "Loss"
 
         # -------------------------- Cache last_xcp --------------------------
 
-        self.last_xcp = xcp  # geometric_mean(D * price_scale)
+        xcp_oracle[1] = xcp  # geometric_mean(D * price_scale)
 
-    self.xcp_profit = xcp_profit
+    self.packed_xcp_oracle = self._pack_2(xcp_oracle[0], xcp_oracle[1])
 
     # ------------ Rebalance liquidity if there's enough profits to adjust it:
     if virtual_price * 2 - 10**18 > xcp_profit + 2 * rebalancing_params[0]:
@@ -1056,7 +1111,16 @@ def tweak_price(
                 # unsafe_div because we did safediv before ----^
 
             # ------------------------------------------ Update D with new xp.
-            D: uint256 = MATH.newton_D(A_gamma[0], A_gamma[1], xp, 0)
+
+            #   xp only moved by the price_scale adjustment, so seed newton_D
+            #  with K0 of (_xp, D_unadjusted): its initial guess then becomes
+            #        D_unadjusted * cbrt(prod(xp) / prod(_xp)) instead of the
+            #                        (further off) geometric mean of xp times N.
+            K0: uint256 = (
+                10**18 * N_COINS * _xp[0] / D_unadjusted * N_COINS * _xp[1]
+                / D_unadjusted * N_COINS * _xp[2] / D_unadjusted
+            )
+            D: uint256 = MATH.newton_D(A_gamma[0], A_gamma[1], xp, K0)
             assert D > 0  # dev: unsafe D
             # Check if calculated p_new is safu:
             for k in range(N_COINS):
@@ -1083,14 +1147,14 @@ def tweak_price(
                 packed_price_scale = self._pack_prices(p_new)
 
                 self.D = D
-                self.virtual_price = old_virtual_price
+                self.packed_profit = self._pack_2(xcp_profit, old_virtual_price)
                 self.price_scale_packed = packed_price_scale
 
                 return packed_price_scale
 
     # --------- price_scale was not adjusted. Update the profit counter and D.
     self.D = D_unadjusted
-    self.virtual_price = virtual_price
+    self.packed_profit = self._pack_2(xcp_profit, virtual_price)
 
     return packed_price_scale
 
@@ -1115,11 +1179,12 @@ def _claim_admin_fees():
     last_claim_time: uint256 = self.last_admin_fee_claim_timestamp
     if (
         unsafe_sub(block.timestamp, last_claim_time) < MIN_ADMIN_FEE_CLAIM_INTERVAL or
-        self.future_A_gamma_time > block.timestamp
+        self._unpack_4(self.packed_times)[2] > block.timestamp
     ):
         return
 
-    xcp_profit: uint256 = self.xcp_profit  # <---------- Current pool profits.
+    profit: uint256[2] = self._unpack_2(self.packed_profit)
+    xcp_profit: uint256 = profit[0]  # <------------------ Current pool profits.
     xcp_profit_a: uint256 = self.xcp_profit_a  # <- Profits at previous claim.
     current_lp_token_supply: uint256 = self.totalSupply
 
@@ -1135,7 +1200,7 @@ def _claim_admin_fees():
 
     A_gamma: uint256[2] = self._A_gamma()
     D: uint256 = self.D
-    vprice: uint256 = self.virtual_price
+    vprice: uint256 = profit[1]
     packed_price_scale: uint256 = self.price_scale_packed
     fee_receiver: address = factory.fee_receiver()
     balances: uint256[N_COINS] = self.balances
@@ -1187,11 +1252,9 @@ def _claim_admin_fees():
     # Set admin virtual LP balances to zero because we claimed:
     self.admin_lp_virtual_balance = 0
 
-    self.xcp_profit = xcp_profit
-    self.last_admin_fee_claim_timestamp = block.timestamp
-
     # Since we reduce balances: virtual price goes down
-    self.virtual_price = vprice
+    self.packed_profit = self._pack_2(xcp_profit, vprice)
+    self.last_admin_fee_claim_timestamp = block.timestamp
 
     # Adjust D after admin seemingly removes liquidity
     self.D = D - unsafe_div(D * admin_share, total_supply_including_admin_share)
@@ -1254,7 +1317,7 @@ def _alpha(last_timestamp: uint256, ma_exp_time: uint256) -> uint256:
 @view
 @internal
 def _A_gamma() -> uint256[2]:
-    t1: uint256 = self.future_A_gamma_time
+    t1: uint256 = self._unpack_4(self.packed_times)[2]
 
     A_gamma_1: uint256 = self.future_A_gamma
     gamma1: uint256 = A_gamma_1 & 2**128 - 1
@@ -1647,7 +1710,8 @@ def lp_price() -> uint256:
 
     price_oracle: uint256[N_COINS-1] = self._unpack_prices(self.price_oracle_packed)
     return (
-        3 * self.virtual_price * MATH.cbrt(price_oracle[0] * price_oracle[1])
+        3 * self._unpack_2(self.packed_profit)[1] *
+        MATH.cbrt(price_oracle[0] * price_oracle[1])
     ) / 10**24
 
 
@@ -1657,7 +1721,7 @@ def lp_price() -> uint256:
 def get_virtual_price() -> uint256:
     """
     @notice Calculates the current virtual price of the pool LP token.
-    @dev Not to be confused with `self.virtual_price` which is a cached
+    @dev Not to be confused with `virtual_price` which is a cached
          virtual price.
     @return uint256 Virtual Price.
     """
@@ -1683,7 +1747,7 @@ def price_oracle(k: uint256) -> uint256:
     """
     price_oracle: uint256 = self._unpack_prices(self.price_oracle_packed)[k]
     price_scale: uint256 = self._unpack_prices(self.price_scale_packed)[k]
-    last_prices_timestamp: uint256 = self._unpack_2(self.last_timestamp)[0]
+    last_prices_timestamp: uint256 = self._unpack_4(self.packed_times)[0]
 
     if last_prices_timestamp < block.timestamp:  # <------------ Update moving
         #                                                   average if needed.
@@ -1706,7 +1770,7 @@ def xcp_oracle() -> uint256:
     """
     @notice Returns the oracle value for xcp.
     @dev The oracle is an exponential moving average, with a periodicity
-         determined by `self.xcp_ma_time`.
+         determined by `xcp_ma_time`.
          `TVL` is xcp, calculated as either:
             1. virtual_price * total_supply, OR
             2. self.get_xcp(...), OR
@@ -1714,15 +1778,57 @@ def xcp_oracle() -> uint256:
     @return uint256 Oracle value of xcp.
     """
 
-    last_xcp_timestamp: uint256 = self._unpack_2(self.last_timestamp)[1]
-    cached_xcp_oracle: uint256 = self.cached_xcp_oracle
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    xcp_oracle: uint256[2] = self._unpack_2(self.packed_xcp_oracle)
 
-    if last_xcp_timestamp < block.timestamp:
+    if times[1] < block.timestamp:
 
-        alpha: uint256 = self._alpha(last_xcp_timestamp, self.xcp_ma_time)
-        return (self.last_xcp * (10**18 - alpha) + cached_xcp_oracle * alpha) / 10**18
+        alpha: uint256 = self._alpha(times[1], times[3])
+        return (xcp_oracle[1] * (10**18 - alpha) + xcp_oracle[0] * alpha) / 10**18
 
-    return cached_xcp_oracle
+    return xcp_oracle[0]
+
+
+@external
+@view
+@nonreentrant("lock")
+def oracles() -> (
+    uint256[N_COINS-1], uint256[N_COINS-1], uint256[N_COINS-1], uint256
+):
+    """
+    @notice Returns all oracle values of the pool at once.
+    @dev Same values as price_oracle(k), price_scale(k), last_prices(k) and
+         xcp_oracle(), for one reentrancy check, one read of every slot
+         and one `_alpha` per moving average.
+    @return (price_oracle, price_scale, last_prices, xcp_oracle). Prices
+            are of the coins at index 1 and 2 w.r.t the coin at index 0.
+    """
+    price_oracle: uint256[N_COINS-1] = self._unpack_prices(self.price_oracle_packed)
+    price_scale: uint256[N_COINS-1] = self._unpack_prices(self.price_scale_packed)
+    last_prices: uint256[N_COINS-1] = self._unpack_prices(self.last_prices_packed)
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    xcp_oracle: uint256[2] = self._unpack_2(self.packed_xcp_oracle)
+    alpha: uint256 = 0
+
+    if times[0] < block.timestamp:  # <----------- Update price moving average.
+
+        alpha = self._alpha(
+            times[0], self._unpack_3(self.packed_rebalancing_params)[2]
+        )
+        for k in range(N_COINS - 1):
+            price_oracle[k] = (
+                min(last_prices[k], 2 * price_scale[k]) * (10**18 - alpha) +
+                price_oracle[k] * alpha
+            ) / 10**18
+
+    if times[1] < block.timestamp:  # <------------- Update xcp moving average.
+
+        alpha = self._alpha(times[1], times[3])
+        xcp_oracle[0] = (
+            xcp_oracle[1] * (10**18 - alpha) + xcp_oracle[0] * alpha
+        ) / 10**18
+
+    return price_oracle, price_scale, last_prices, xcp_oracle[0]
 
 
 @external
@@ -1784,7 +1890,7 @@ def calc_withdraw_one_coin(token_amount: uint256, i: uint256) -> uint256:
         self._A_gamma(),
         token_amount,
         i,
-        (self.future_A_gamma_time > block.timestamp)
+        (self._unpack_4(self.packed_times)[2] > block.timestamp)
     )[0]
 
 
@@ -1884,6 +1990,70 @@ def ma_time() -> uint256:
     return self._unpack_3(self.packed_rebalancing_params)[2] * 694 / 1000
 
 
+@view
+@external
+def xcp_ma_time() -> uint256:
+    """
+    @notice Returns the moving average time of the xcp oracle
+    @dev Like ma_time, the time in seconds is xcp_ma_time * ln(2).
+    @return uint256 xcp_ma_time value.
+    """
+    return self._unpack_4(self.packed_times)[3]
+
+
+@view
+@external
+def last_timestamp() -> uint256:
+    """
+    @notice Returns the timestamps of the last price and xcp oracle updates
+    @return uint256 Packed timestamps: prices | xcp << 128.
+    """
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    return self._pack_2(times[0], times[1])
+
+
+@view
+@external
+def last_xcp() -> uint256:
+    """
+    @notice Returns the xcp after the last liquidity action or trade
+    @return uint256 last_xcp value.
+    """
+    return self._unpack_2(self.packed_xcp_oracle)[1]
+
+
+@view
+@external
+def future_A_gamma_time() -> uint256:
+    """
+    @notice Returns the time when ramping A and gamma is finished
+    @return uint256 future_A_gamma_time value.
+    """
+    return self._unpack_4(self.packed_times)[2]
+
+
+@view
+@external
+def xcp_profit() -> uint256:
+    """
+    @notice Returns the pool profits, including the admin's share
+    @return uint256 xcp_profit value.
+    """
+    return self._unpack_2(self.packed_profit)[0]
+
+
+@view
+@external
+def virtual_price() -> uint256:
+    """
+    @notice Returns the cached virtual price of the pool LP token
+    @dev It is updated by every liquidity action and trade. See
+         get_virtual_price for the virtual price at the current state.
+    @return uint256 virtual_price value.
+    """
+    return self._unpack_2(self.packed_profit)[1]
+
+
 @view
 @external
 def precisions() -> uint256[N_COINS]:  # <-------------- For by view contract.
@@ -1932,6 +2102,7 @@ def ramp_A_gamma(
     assert msg.sender == factory.admin()  # dev: only owner
     assert block.timestamp > self.initial_A_gamma_time + (MIN_RAMP_TIME - 1)  # dev: ramp undergoing
     assert future_time > block.timestamp + MIN_RAMP_TIME - 1  # dev: insufficient time
+    assert future_time < 2**64  # dev: future_time too large
 
     A_gamma: uint256[2] = self._A_gamma()
     initial_A_gamma: uint256 = A_gamma[0] << 128
@@ -1955,7 +2126,9 @@ def ramp_A_gamma(
 
     future_A_gamma: uint256 = future_A << 128
     future_A_gamma = future_A_gamma | future_gamma
-    self.future_A_gamma_time = future_time
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    times[2] = future_time  # <------------------------- future_A_gamma_time.
+    self.packed_times = self._pack_4(times)
     self.future_A_gamma = future_A_gamma
 
     log RampAgamma(
@@ -1982,7 +2155,9 @@ def stop_ramp_A_gamma():
     self.initial_A_gamma = current_A_gamma
     self.future_A_gamma = current_A_gamma
     self.initial_A_gamma_time = block.timestamp
-    self.future_A_gamma_time = block.timestamp
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    times[2] = block.timestamp  # <--------------------- future_A_gamma_time.
+    self.packed_times = self._pack_4(times)
 
     # ------ Now (block.timestamp < t1) is always False, so we return saved A.
 
@@ -2061,12 +2236,11 @@ def apply_new_parameters(
     )
 
     # Set xcp oracle moving average window time:
-    new_xcp_ma_time: uint256 = _new_xcp_ma_time
-    if new_xcp_ma_time < 872542:
-        assert new_xcp_ma_time > 86  # dev: xcp MA time should be longer than 60/ln(2)
-    else:
-        new_xcp_ma_time = self.xcp_ma_time
-    self.xcp_ma_time = new_xcp_ma_time
+    times: uint256[4] = self._unpack_4(self.packed_times)
+    if _new_xcp_ma_time < 872542:
+        assert _new_xcp_ma_time > 86  # dev: xcp MA time should be longer than 60/ln(2)
+        times[3] = _new_xcp_ma_time
+        self.packed_times = self._pack_4(times)
 
     # ---------------------------------- LOG ---------------------------------
 
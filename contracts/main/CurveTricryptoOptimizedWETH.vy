@@ -1129,7 +1129,16 @@ def tweak_price(
                 # unsafe_div because we did safediv before ----^
 
             # ------------------------------------------ Update D with new xp.
-            D: uint256 = MATH.newton_D(A_gamma[0], A_gamma[1], xp, 0)
+
+            #   xp only moved by the price_scale adjustment, so seed newton_D
+            #  with K0 of (_xp, D_unadjusted): its initial guess then becomes
+            #        D_unadjusted * cbrt(prod(xp) / prod(_xp)) instead of the
+            #                        (further off) geometric mean of xp times N.
+            K0: uint256 = (
+                10**18 * N_COINS * _xp[0] / D_unadjusted * N_COINS * _xp[1]
+                / D_unadjusted * N_COINS * _xp[2] / D_unadjusted
+            )
+            D: uint256 = MATH.newton_D(A_gamma[0], A_gamma[1], xp, K0)
 
             for k in range(N_COINS):
                 frac: uint256 = xp[k] * 10**18 / D  # <----- Check validity of
@@ -1172,8 +1181,6 @@ def _claim_admin_fees():
     """
     @notice Claims admin fees and sends it to fee_receiver set in the factory.
     """
-    A_gamma: uint256[2] = self._A_gamma()
-
     xcp_profit: uint256 = self.xcp_profit  # <---------- Current pool profits.
     xcp_profit_a: uint256 = self.xcp_profit_a  # <- Profits at previous claim.
     total_supply: uint256 = self.totalSupply
@@ -1229,6 +1236,7 @@ def _claim_admin_fees():
         log ClaimAdminFee(receiver, claimed)
 
     # ------------------------------------------- Recalculate D b/c we gulped.
+    A_gamma: uint256[2] = self._A_gamma()
     D: uint256 = MATH.newton_D(A_gamma[0], A_gamma[1], self.xp(), 0)
     self.D = D
 
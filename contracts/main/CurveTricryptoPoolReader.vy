@@ -0,0 +1,126 @@
+# pragma version 0.3.10
+# pragma optimize gas
+# pragma evm-version paris
+"""
+@title CurveTricryptoPoolReader
+@author Curve.Fi
+@license Copyright (c) Curve.Fi, 2020-2023 - all rights reserved
+@notice Reads the state of many tricrypto-ng pools in a single call, for
+        indexers that would otherwise query every getter of every pool.
+@dev Packed storage words that pools expose (fee params, rebalancing params,
+     timestamps, A and gamma) are returned as they are stored, and can be
+     unpacked off-chain. Price scale, price oracle and last prices are only
+     exposed by pools through their decoded getters.
+"""
+
+
+interface Curve:
+    def balances(i: uint256) -> uint256: view
+    def D() -> uint256: view
+    def totalSupply() -> uint256: view
+    def virtual_price() -> uint256: view
+    def xcp_profit() -> uint256: view
+    def xcp_profit_a() -> uint256: view
+    def price_scale(k: uint256) -> uint256: view
+    def price_oracle(k: uint256) -> uint256: view
+    def last_prices(k: uint256) -> uint256: view
+    def xcp_oracle() -> uint256: view
+    def A() -> uint256: view
+    def gamma() -> uint256: view
+    def packed_fee_params() -> uint256: view
+    def packed_rebalancing_params() -> uint256: view
+    def last_timestamp() -> uint256: view
+    def initial_A_gamma() -> uint256: view
+    def initial_A_gamma_time() -> uint256: view
+    def future_A_gamma() -> uint256: view
+    def future_A_gamma_time() -> uint256: view
+
+
+struct PoolState:
+    pool: address
+    balances: uint256[N_COINS]
+    D: uint256
+    totalSupply: uint256
+    virtual_price: uint256
+    xcp_profit: uint256
+    xcp_profit_a: uint256
+    price_scale: uint256[N_COINS - 1]
+    price_oracle: uint256[N_COINS - 1]
+    last_prices: uint256[N_COINS - 1]
+    xcp_oracle: uint256
+    A: uint256
+    gamma: uint256
+    packed_fee_params: uint256
+    packed_rebalancing_params: uint256
+    last_timestamp: uint256
+    initial_A_gamma: uint256
+    initial_A_gamma_time: uint256
+    future_A_gamma: uint256
+    future_A_gamma_time: uint256
+
+
+N_COINS: constant(uint256) = 3
+MAX_POOLS: constant(uint256) = 64
+
+
+@external
+@view
+def get_pool_state(pool: address) -> PoolState:
+    """
+    @notice Returns the state of a pool.
+    @param pool Address of the pool.
+    @return PoolState of the pool.
+    """
+    return self._get_pool_state(pool)
+
+
+@external
+@view
+def get_pool_state_many(
+    pools: DynArray[address, MAX_POOLS]
+) -> DynArray[PoolState, MAX_POOLS]:
+    """
+    @notice Returns the state of each of the given pools.
+    @param pools Addresses of the pools.
+    @return PoolState of each pool, in the order of `pools`.
+    """
+    states: DynArray[PoolState, MAX_POOLS] = []
+    for pool in pools:
+        states.append(self._get_pool_state(pool))
+
+    return states
+
+
+@internal
+@view
+def _get_pool_state(pool: address) -> PoolState:
+
+    state: PoolState = empty(PoolState)
+    state.pool = pool
+
+    for k in range(N_COINS):
+        state.balances[k] = Curve(pool).balances(k)
+
+    for k in range(N_COINS - 1):
+        state.price_scale[k] = Curve(pool).price_scale(k)
+        state.price_oracle[k] = Curve(pool).price_oracle(k)
+        state.last_prices[k] = Curve(pool).last_prices(k)
+
+    state.D = Curve(pool).D()
+    state.totalSupply = Curve(pool).totalSupply()
+    state.virtual_price = Curve(pool).virtual_price()
+    state.xcp_profit = Curve(pool).xcp_profit()
+    state.xcp_profit_a = Curve(pool).xcp_profit_a()
+    state.xcp_oracle = Curve(pool).xcp_oracle()
+    state.A = Curve(pool).A()
+    state.gamma = Curve(pool).gamma()
+
+    state.packed_fee_params = Curve(pool).packed_fee_params()
+    state.packed_rebalancing_params = Curve(pool).packed_rebalancing_params()
+    state.last_timestamp = Curve(pool).last_timestamp()
+    state.initial_A_gamma = Curve(pool).initial_A_gamma()
+    state.initial_A_gamma_time = Curve(pool).initial_A_gamma_time()
+    state.future_A_gamma = Curve(pool).future_A_gamma()
+    state.future_A_gamma_time = Curve(pool).future_A_gamma_time()
+
+    return state
@@ -0,0 +1,82 @@
+# pragma version 0.3.10
+# pragma optimize gas
+# pragma evm-version paris
+"""
+@title CurveTricryptoRouter
+@author Curve.Fi
+@license Copyright (c) Curve.Fi, 2020-2023 - all rights reserved
+@notice Swaps along a route of several tricrypto-ng pools in one transaction.
+@dev The coins sold are transferred from the caller straight into the first
+     pool, and every pool of the route sends its output straight into the
+     next one, which takes it in with `exchange_received`. The router never
+     holds coins, and gives no approvals to the pools: callers approve it
+     once for the coins they sell. Routes are found off-chain (see
+     scripts/find_route.py).
+     Only works with pools that have `exchange_received`, and not with coins
+     that charge a fee on transfer.
+"""
+
+from vyper.interfaces import ERC20
+
+
+interface Pool:
+    def coins(i: uint256) -> address: view
+    def exchange_received(
+        i: uint256,
+        j: uint256,
+        dx: uint256,
+        min_dy: uint256,
+        receiver: address,
+    ) -> uint256: nonpayable
+
+
+MAX_HOPS: constant(uint256) = 4
+
+
+@external
+def exchange(
+    pools: DynArray[address, MAX_HOPS],
+    indices: DynArray[uint256[2], MAX_HOPS],
+    dx: uint256,
+    min_dy: uint256,
+    receiver: address = msg.sender,
+) -> uint256:
+    """
+    @notice Sells `dx` of coin `indices[0][0]` of `pools[0]` for the coin
+            `indices[-1][1]` of the last pool of the route.
+    @dev Coin `j` of every pool must be coin `i` of the next one, or the next
+         pool does not receive the coins it is asked to exchange and reverts.
+    @param pools Pools of the route, in order.
+    @param indices Indices (i, j) of the coins to exchange in every pool.
+    @param dx Amount of the first coin to sell.
+    @param min_dy Minimum amount of the last coin to receive.
+    @param receiver Address to send the last coin to.
+    @return uint256 Amount of the last coin sent to `receiver`.
+    """
+    n_hops: uint256 = len(pools)
+    assert n_hops > 0 and len(indices) == n_hops  # dev: bad route
+
+    # EXTERNAL CALL
+    assert ERC20(Pool(pools[0]).coins(indices[0][0])).transferFrom(
+        msg.sender, pools[0], dx, default_return_value=True
+    )
+
+    dy: uint256 = dx
+    hop_receiver: address = empty(address)
+    for k in range(MAX_HOPS):
+
+        if k == n_hops:
+            break
+
+        hop_receiver = receiver
+        if k + 1 < n_hops:
+            hop_receiver = pools[k + 1]  # <---- pay the next hop directly.
+
+        # EXTERNAL CALL
+        dy = Pool(pools[k]).exchange_received(
+            indices[k][0], indices[k][1], dy, 0, hop_receiver
+        )
+
+    assert dy >= min_dy, "Slippage"
+
+    return dy
@@ -0,0 +1,49 @@
+# pragma version 0.3.10
+# pragma optimize gas
+# pragma evm-version paris
+"""
+@title ApproveExchangeRouter
+@notice The routing CurveTricryptoRouter replaces, for gas comparisons: the
+        router takes the coins sold, and at every hop approves the pool and
+        calls `exchange`, which transfers the coins in from the router and
+        sends the output back to it.
+"""
+
+from vyper.interfaces import ERC20
+
+
+interface Pool:
+    def coins(i: uint256) -> address: view
+    def exchange(
+        i: uint256, j: uint256, dx: uint256, min_dy: uint256
+    ) -> uint256: nonpayable
+
+
+MAX_HOPS: constant(uint256) = 4
+
+
+@external
+def exchange(
+    pools: DynArray[address, MAX_HOPS],
+    indices: DynArray[uint256[2], MAX_HOPS],
+    dx: uint256,
+    min_dy: uint256,
+) -> uint256:
+    coin: address = Pool(pools[0]).coins(indices[0][0])
+    assert ERC20(coin).transferFrom(msg.sender, self, dx)
+
+    dy: uint256 = dx
+    for k in range(MAX_HOPS):
+        if k == len(pools):
+            break
+
+        coin = Pool(pools[k]).coins(indices[k][0])
+        assert ERC20(coin).approve(pools[k], dy)
+        dy = Pool(pools[k]).exchange(indices[k][0], indices[k][1], dy, 0)
+
+    assert dy >= min_dy, "Slippage"
+
+    coin = Pool(pools[len(pools) - 1]).coins(indices[len(indices) - 1][1])
+    assert ERC20(coin).transfer(msg.sender, dy)
+
+    return dy
@@ -0,0 +1,133 @@
+# pragma version 0.3.10
+# pragma optimize gas
+# pragma evm-version paris
+"""
+@title IterativeGetDx
+@notice The get_dx of CurveCryptoViews3Optimized before it solved get_y only
+        twice, for gas and accuracy comparisons: it runs five fixed point
+        iterations of dy_nofee = dy + fee(dy_nofee) + 1, each of which reads
+        the pool state and solves get_y again.
+"""
+
+
+interface Curve:
+    def MATH() -> Math: view
+    def A() -> uint256: view
+    def gamma() -> uint256: view
+    def price_scale(i: uint256) -> uint256: view
+    def balances(i: uint256) -> uint256: view
+    def D() -> uint256: view
+    def fee_calc(xp: uint256[N_COINS]) -> uint256: view
+    def future_A_gamma_time() -> uint256: view
+    def precisions() -> uint256[N_COINS]: view
+
+
+interface Math:
+    def newton_D(
+        ANN: uint256,
+        gamma: uint256,
+        x_unsorted: uint256[N_COINS],
+        K0_prev: uint256
+    ) -> uint256: view
+    def get_y(
+        ANN: uint256,
+        gamma: uint256,
+        x: uint256[N_COINS],
+        D: uint256,
+        i: uint256,
+    ) -> uint256[2]: view
+
+
+N_COINS: constant(uint256) = 3
+PRECISION: constant(uint256) = 10**18
+
+
+@view
+@external
+def get_dx(
+    i: uint256, j: uint256, dy: uint256, swap: address
+) -> uint256:
+
+    dx: uint256 = 0
+    xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    fee_dy: uint256 = 0
+    _dy: uint256 = dy
+
+    # for more precise dx (but never exact), increase num loops
+    for k in range(5):
+        dx, xp = self._get_dx_fee(i, j, _dy, swap)
+        fee_dy = Curve(swap).fee_calc(xp) * _dy / 10**10
+        _dy = dy + fee_dy + 1
+
+    return dx
+
+
+@internal
+@view
+def _get_dx_fee(
+    i: uint256, j: uint256, dy: uint256, swap: address
+) -> (uint256, uint256[N_COINS]):
+
+    # here, dy must include fees (and 1 wei offset)
+
+    assert i != j and i < N_COINS and j < N_COINS, "coin index out of range"
+    assert dy > 0, "do not exchange out 0 coins"
+
+    math: Math = Curve(swap).MATH()
+
+    precisions: uint256[N_COINS] = Curve(swap).precisions()
+    xp: uint256[N_COINS] = empty(uint256[N_COINS])
+    for k in range(N_COINS):
+        xp[k] = Curve(swap).balances(k)
+
+    price_scale: uint256[N_COINS - 1] = empty(uint256[N_COINS - 1])
+    for k in range(N_COINS - 1):
+        price_scale[k] = Curve(swap).price_scale(k)
+
+    A: uint256 = Curve(swap).A()
+    gamma: uint256 = Curve(swap).gamma()
+    D: uint256 = self._calc_D_ramp(
+        A, gamma, xp, precisions, price_scale, swap
+    )
+
+    # adjust xp with output dy. dy contains fee element, which we handle later
+    # (hence this internal method is called _get_dx_fee)
+    xp[j] -= dy
+    xp[0] *= precisions[0]
+    for k in range(N_COINS - 1):
+        xp[k + 1] = xp[k + 1] * price_scale[k] * precisions[k + 1] / PRECISION
+
+    x_out: uint256[2] = math.get_y(A, gamma, xp, D, i)
+    dx: uint256 = x_out[0] - xp[i]
+    xp[i] = x_out[0]
+    if i > 0:
+        dx = dx * PRECISION / price_scale[i - 1]
+    dx /= precisions[i]
+
+    return dx, xp
+
+
+@internal
+@view
+def _calc_D_ramp(
+    A: uint256,
+    gamma: uint256,
+    xp: uint256[N_COINS],
+    precisions: uint256[N_COINS],
+    price_scale: uint256[N_COINS - 1],
+    swap: address
+) -> uint256:
+
+    math: Math = Curve(swap).MATH()
+
+    D: uint256 = Curve(swap).D()
+    if Curve(swap).future_A_gamma_time() > block.timestamp:
+        _xp: uint256[N_COINS] = xp
+        _xp[0] *= precisions[0]
+        for k in range(N_COINS - 1):
+            _xp[k + 1] = (
+                _xp[k + 1] * price_scale[k] * precisions[k + 1] / PRECISION
+            )
+        D = math.newton_D(A, gamma, _xp, 0)
+
+    return D
@@ -0,0 +1,142 @@
+"""
+Builds the pools with the math contract compiled in.
+
+The pools in contracts/main call CurveCryptoMathOptimized3 for get_y,
+newton_D, get_p, geometric_mean, wad_exp and reduction_coefficient, and
+every exchange makes several of these calls. Each one pays for a STATICCALL
+(the first one to a cold account) and for ABI encoding its arguments and
+result. This script copies the math functions into the pools as internal
+functions, rewrites the MATH calls to call them, and writes the result to
+contracts/inlined:
+
+    python -m scripts.build_inlined_math
+
+The inlined pools are about 33KB, above the 24KB EIP-170 limit of
+Ethereum: only deploy them on chains with a larger contract size limit, and
+use the pools in contracts/main everywhere else. They keep their MATH
+immutable, which the views contract reads. Run the script again after
+every change to the pools or the math contract:
+tests/boa/profiling/test_inlined_math.py checks that the inlined builds
+are up to date.
+"""
+import os
+import re
+
+POOLS = [
+    "contracts/main/CurveTricryptoOptimized.vy",
+    "contracts/main/CurveTricryptoOptimizedWETH.vy",
+]
+MATH = "contracts/main/CurveCryptoMathOptimized3.vy"
+OUT_DIR = "contracts/inlined"
+
+# external method of the math contract -> internal function of the pool:
+INLINED = {
+    "get_y": "_get_y",
+    "newton_D": "_newton_D",
+    "get_p": "_get_p",
+    "geometric_mean": "_geometric_mean",
+    "cbrt": "_cbrt",
+    "reduction_coefficient": "_reduction_coefficient",
+    "wad_exp": "_snekmate_wad_exp",
+}
+
+HEADER = (
+    "# ---------------------------- Inlined Math ---------------------------"
+    "-----\n"
+    "#              Copied from CurveCryptoMathOptimized3.vy by\n"
+    "#                  scripts/build_inlined_math.py.\n"
+)
+
+
+def _functions(source):
+    # name -> source of every function, with its decorators:
+    lines = source.splitlines()
+    starts = [i for i, line in enumerate(lines) if line.startswith("def ")]
+
+    functions = {}
+    for n, i in enumerate(starts):
+        start = i
+        while start > 0 and lines[start - 1].startswith("@"):
+            start -= 1
+
+        end = starts[n + 1] if n + 1 < len(starts) else len(lines)
+        while lines[end - 1].startswith("@"):
+            end -= 1
+        while not lines[end - 1].startswith(" "):  # blanks and sections
+            end -= 1
+
+        name = re.match(r"def (\w+)\(", lines[i]).group(1)
+        functions[name] = "\n".join(lines[start:end])
+
+    return functions
+
+
+def _constants(source):
+    # name -> value of every integer constant:
+    constants = {}
+    for name, value in re.findall(
+        r"^(\w+): constant\(u?int\d+\) = ([^#\n]+)", source, re.M
+    ):
+        constants[name] = eval(value.replace("/", "//"), {}, constants)
+    return constants
+
+
+def inline_math(pool_source, math_source, inlined=INLINED):
+    """
+    Returns the source of the pool with the math functions in `inlined`
+    compiled in.
+    """
+    # the math functions use the constants of the pool once inlined:
+    pool_constants = _constants(pool_source)
+    for name, value in _constants(math_source).items():
+        assert pool_constants.get(name) == value, name
+
+    functions = _functions(math_source)
+
+    copied = []
+    todo = list(inlined.items())
+    while todo:
+        external, internal = todo.pop(0)
+        if internal in copied:
+            continue
+
+        function = functions[internal if internal in functions else external]
+        if internal not in functions:  # <------ make the external internal.
+            function = function.replace("@external", "@internal").replace(
+                f"def {external}(", f"def {internal}("
+            )
+        # the math contract has no state, and pure pool functions call it:
+        function = function.replace("@view", "@pure")
+        assert f"def {internal}(" not in pool_source, internal
+
+        copied.append(internal)
+        functions[internal] = function
+        todo += [(f, f) for f in re.findall(r"self\.(\w+)\(", function)]
+
+    for external, internal in inlined.items():
+        pool_source = pool_source.replace(
+            f"MATH.{external}(", f"self.{internal}("
+        )
+
+    return (
+        pool_source.rstrip("\n")
+        + "\n\n\n"
+        + HEADER
+        + "".join(f"\n\n{functions[f]}\n" for f in copied)
+    )
+
+
+def main():
+    with open(MATH) as f:
+        math_source = f.read()
+
+    os.makedirs(OUT_DIR, exist_ok=True)
+    for pool in POOLS:
+        with open(pool) as f:
+            pool_source = f.read()
+        with open(os.path.join(OUT_DIR, os.path.basename(pool)), "w") as f:
+            f.write(inline_math(pool_source, math_source))
+
+
+if __name__ == "__main__":
+    main()
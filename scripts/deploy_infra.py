@@ -40,6 +40,18 @@ def store_deployed_contract(network, designation, deployment_address):
         yaml.dump(deployments, file)
 
 
+def load_partial(filename, network, evm_version=None):
+
+    if "zksync" in network or evm_version is None:
+        # boa_zksync compiles with zkvyper, and the default build keeps the
+        # bytecode boa.load_partial has always deployed:
+        return boa.load_partial(filename)
+
+    # compiled for `evm_version`, e.g. "cancun" for AMMs with a transient
+    # reentrancy lock on chains that support EIP-1153 and MCOPY:
+    return deploy_utils.load_partial(filename, evm_version)
+
+
 def check_and_deploy(
     contract_obj,
     contract_designation,
@@ -97,7 +109,7 @@ def check_and_deploy(
     return contract_obj.at(deployed_address)
 
 
-def deploy_infra(network, url, account, fork=False):
+def deploy_infra(network, url, account, fork=False, evm_version=None):
 
     logger.log(f"Deploying on {network} ...")
     contract_folder = "main"
@@ -136,28 +148,33 @@ def deploy_infra(network, url, account, fork=False):
 
     # --------------------- Initialise contract objects ---------------------
 
-    math_contract_obj = boa.load_partial(
-        f"./contracts/{contract_folder}/CurveCryptoMathOptimized3.vy"
+    math_contract_obj = load_partial(
+        f"./contracts/{contract_folder}/CurveCryptoMathOptimized3.vy", network
     )
-    views_contract_obj = boa.load_partial(
-        f"./contracts/{contract_folder}/CurveCryptoViews3Optimized.vy"
+    views_contract_obj = load_partial(
+        f"./contracts/{contract_folder}/CurveCryptoViews3Optimized.vy", network
     )
 
-    amm_contract_native_transfers_enabled_obj = boa.load_partial(
-        f"./contracts/{contract_folder}/CurveTricryptoOptimizedWETH.vy"
+    amm_contract_native_transfers_enabled_obj = load_partial(
+        f"./contracts/{contract_folder}/CurveTricryptoOptimizedWETH.vy",
+        network,
+        evm_version,
     )
-    amm_contract_native_transfers_disabled_obj = boa.load_partial(
-        f"./contracts/{contract_folder}/CurveTricryptoOptimized.vy"
+    amm_contract_native_transfers_disabled_obj = load_partial(
+        f"./contracts/{contract_folder}/CurveTricryptoOptimized.vy",
+        network,
+        evm_version,
     )
 
     if network == "ethereum:mainnet":
-        factory_contract_obj = boa.load_partial(
-            "./contracts/main/CurveTricryptoFactory.vy"
+        factory_contract_obj = load_partial(
+            "./contracts/main/CurveTricryptoFactory.vy", network
         )
         logger.log("Using Mainnet tricrypto factory contract.")
     else:
-        factory_contract_obj = boa.load_partial(
-            f"./contracts/{contract_folder}/CurveL2TricryptoFactory.vy"
+        factory_contract_obj = load_partial(
+            f"./contracts/{contract_folder}/CurveL2TricryptoFactory.vy",
+            network,
         )
         logger.log(
             "Using L2/sidechain (non-Ethereum mainnet) tricrypto factory contract."
@@ -1,11 +1,16 @@
 # flake8: noqa E501
 
+import re
 import sys
 from dataclasses import dataclass
 
+import boa
+from boa.vyper.contract import VyperDeployer
 from eth_typing import Address
 from eth_utils import keccak
 from rich.console import Console as RichConsole
+from vyper.compiler.settings import Settings
+from vyper.evm.opcodes import anchor_evm_version
 
 logger = RichConsole(file=sys.stdout)
 
@@ -15,6 +20,8 @@ FIDDYRESEARCH = "0xE6DA683076b7eD6ce7eC972f21Eb8F91e9137a17"
 FIDDYDEPLOYER = "0x2d12D0907A388811e3AA855A550F959501d303EE"
 BABE = "0xbabe61887f1de2713c6f97e567623453d3C79f67"
 
+EVM_VERSION_PRAGMA = re.compile(r"^# pragma evm-version \w+$", re.MULTILINE)
+
 
 @dataclass
 class CurveNetworkSettings:
@@ -160,3 +167,37 @@ def get_create2_deployment_address(
 
 def deploy_via_create2_factory(deployment_bytecode, salt, create2deployer):
     create2deployer.deploy(0, salt, deployment_bytecode)
+
+
+def compiler_data(source_code, name, evm_version=None, **kwargs):
+    """
+    Compiles a contract for `evm_version`, or for the evm version of its
+    `# pragma evm-version` if None (e.g. the pools in contracts/main, which
+    are paris, compiled for cancun to get a transient reentrancy lock).
+
+    boa builds vyper's CompilerData itself, and vyper only applies the evm
+    version of the pragma in `compile_codes`: anywhere else, contracts are
+    compiled for vyper's default evm version whatever their pragma says.
+    """
+    settings = Settings()
+    if evm_version is not None:
+        # vyper refuses settings that contradict the pragma. It is blanked
+        # out, not removed, so that line numbers stay the same:
+        source_code = EVM_VERSION_PRAGMA.sub("", source_code)
+        settings.evm_version = evm_version
+
+    data = boa.interpret.compiler_data(
+        source_code, name, settings=settings, **kwargs
+    )
+    with anchor_evm_version(data.settings.evm_version):
+        data.bytecode
+        data.bytecode_runtime
+
+    return data
+
+
+def load_partial(filename, evm_version=None):
+    # boa.load_partial, for `evm_version` or the evm version of the pragma:
+    with open(filename) as f:
+        data = compiler_data(f.read(), filename, evm_version)
+    return VyperDeployer(data, filename=filename)
@@ -0,0 +1,275 @@
+"""
+Calibration of the float64 math twin (tests/boa/utils/math_float.py) against
+the integer implementation in CurveCryptoMathOptimized3.
+
+Pool states are sampled log-uniformly over the safe domain of the contract
+(MIN_A..MAX_A, MIN_GAMMA..MAX_GAMMA and balances with x/D in MIN_XD..MAX_XD),
+every function is evaluated on them by both implementations, and the
+relative errors of the float results are reported overall and per decade of
+A, gamma, x/D and |1 - K0|. Log-uniform balances are rarely close to
+equilibrium (K0 = 1), so a share of the states can be drawn next to it
+instead, with every balance within 1e-8..1e-2 of D / 3.
+
+Usage:
+    python -m scripts.experiments.calibrate_math_float --samples 2000
+    python -m scripts.experiments.calibrate_math_float --balanced 0.5
+"""
+import json
+import math
+import random
+import time
+from collections import defaultdict
+
+import boa
+import click
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from tests.boa.utils import math_float
+
+console = Console()
+
+MIN_S = 10**18  # 1 USD
+MAX_S = 10**14 * 10**18  # 100T USD
+
+
+def _log_uniform(rng, lo, hi):
+    return int(math.exp(rng.uniform(math.log(lo), math.log(hi))))
+
+
+def sample_states(n, seed=0, balanced=0.0):
+    """
+    Random (ANN, gamma, x, i) with x spread over the safe x/D range, or for
+    a share `balanced` of them, next to equilibrium. Whether a state is
+    actually safe is decided by the contract.
+    """
+    rng = random.Random(seed)
+    min_frac, max_frac = math_float.MIN_XD + 1, math_float.MAX_XD - 1
+    for _ in range(n):
+        S = _log_uniform(rng, MIN_S, MAX_S)
+        if rng.random() < balanced:
+            x = [
+                S
+                * (
+                    10**18
+                    + rng.choice([-1, 1])
+                    * _log_uniform(rng, 10**10, 10**16)
+                )
+                // (3 * 10**18)
+                for _ in range(3)
+            ]
+        else:
+            x = [
+                S * _log_uniform(rng, min_frac, max_frac) // 10**20
+                for _ in range(3)
+            ]
+        yield (
+            _log_uniform(rng, math_float.MIN_A, math_float.MAX_A),
+            _log_uniform(rng, math_float.MIN_GAMMA, math_float.MAX_GAMMA),
+            x,
+            rng.randint(0, 2),
+        )
+
+
+def _try(f, *args):
+    try:
+        return f(*args)
+    except Exception:  # reverts on unsafe states
+        return None
+
+
+def evaluate_int(math_contract, states):
+    """
+    Integer results of the contract for each state: D of the balances, the
+    price at that D, and the y of coin i after a trade moving the next coin's
+    balance by 1%.
+    """
+    rows = []
+    for ANN, gamma, x, i in states:
+        D = _try(math_contract.newton_D, ANN, gamma, x)
+        p = D and _try(math_contract.get_p, x, D, [ANN, gamma])
+        if p is None:
+            continue
+
+        x_trade = x[:]
+        x_trade[(i + 1) % 3] = x_trade[(i + 1) % 3] * 101 // 100
+        y = _try(math_contract.get_y, ANN, gamma, x_trade, D, i)
+        if y is None:
+            continue
+
+        rows.append(
+            {
+                "ANN": ANN,
+                "gamma": gamma,
+                "x": x,
+                "x_trade": x_trade,
+                "i": i,
+                "D": D,
+                "p": p,
+                "y": y[0],
+                "K0": y[1],
+                "geometric_mean": math_contract.geometric_mean(x),
+                "cbrt": math_contract.cbrt(x[0]),
+            }
+        )
+    return rows
+
+
+def evaluate_float(rows):
+    """
+    Float results for the same states, vectorized per coin index i.
+    """
+    ANN = np.array([r["ANN"] for r in rows], dtype=np.float64)
+    gamma = np.array([r["gamma"] for r in rows], dtype=np.float64)
+    x = np.array([r["x"] for r in rows], dtype=np.float64)
+    x_trade = np.array([r["x_trade"] for r in rows], dtype=np.float64)
+    D_int = np.array([r["D"] for r in rows], dtype=np.float64)
+    index = np.array([r["i"] for r in rows])
+
+    out = {
+        "D": math_float.newton_D(ANN, gamma, x),
+        "p": math_float.get_p(x, D_int, (ANN, gamma)),
+        "geometric_mean": math_float.geometric_mean(x),
+        "cbrt": math_float.cbrt(x[:, 0]),
+        "y": np.full(len(rows), np.nan),
+        "K0": np.full(len(rows), np.nan),
+    }
+    for i in range(3):
+        rows_i = np.flatnonzero(index == i)
+        y, K0 = math_float.get_y(
+            ANN[rows_i], gamma[rows_i], x_trade[rows_i], D_int[rows_i], i
+        )
+        out["y"][rows_i] = y
+        out["K0"][rows_i] = K0
+    return out
+
+
+def relative_errors(rows, floats):
+    errors = {}
+    for name, value in floats.items():
+        expected = np.array([r[name] for r in rows], dtype=np.float64)
+        if name == "K0":
+            # K0 is 0 where get_y fell back to newton; only compare roots
+            # found by both implementations:
+            expected[(expected == 0) | (value == 0)] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            error = np.abs(value / expected - 1)
+        if error.ndim > 1:
+            error = error.max(axis=1)
+        errors[name] = error
+    return errors
+
+
+def _stats(error):
+    error = error[~np.isnan(error)]
+    if len(error) == 0:
+        return {"n": 0}
+    return {
+        "n": len(error),
+        "median": float(np.median(error)),
+        "p99": float(np.percentile(error, 99)),
+        "max": float(error.max()),
+    }
+
+
+def _decade(value):
+    return f"1e{math.floor(math.log10(value))}"
+
+
+def _K0(r):
+    return 27 * r["x"][0] * r["x"][1] * r["x"][2] / r["D"] ** 3
+
+
+def breakdown(rows, errors, name):
+    """
+    Relative error stats of `name` per decade of A, gamma, the smallest x/D
+    and |1 - K0| of the balances.
+    """
+    keys = {
+        "A": lambda r: _decade(r["ANN"] / math_float.A_MULTIPLIER / 27),
+        "gamma": lambda r: _decade(r["gamma"] / 10**18),
+        "x/D": lambda r: _decade(min(r["x"]) / r["D"]),
+        "1 - K0": lambda r: _decade(max(abs(1 - _K0(r)), 1e-18)),
+    }
+    out = {}
+    for key, bucket_of in keys.items():
+        buckets = defaultdict(list)
+        for r, e in zip(rows, errors[name]):
+            buckets[bucket_of(r)].append(e)
+        out[key] = {
+            b: _stats(np.array(v))
+            for b, v in sorted(buckets.items(), key=lambda kv: float(kv[0]))
+        }
+    return out
+
+
+def _table(title, stats):
+    table = Table(title=title)
+    for column in ("", "n", "median", "p99", "max"):
+        table.add_column(column, justify="right")
+    for name, s in stats.items():
+        if s["n"] == 0:
+            table.add_row(name, "0", "", "", "")
+            continue
+        table.add_row(
+            name,
+            str(s["n"]),
+            f"{s['median']:.2e}",
+            f"{s['p99']:.2e}",
+            f"{s['max']:.2e}",
+        )
+    return table
+
+
+@click.command()
+@click.option("--samples", default=1000)
+@click.option("--seed", default=0)
+@click.option(
+    "--balanced", default=0.0, help="Share of states next to equilibrium"
+)
+@click.option("--out", default=None, help="Optional json file for the report")
+def main(samples, seed, balanced, out):
+
+    math_contract = boa.load("contracts/main/CurveCryptoMathOptimized3.vy")
+
+    states = list(sample_states(samples, seed, balanced))
+    t = time.time()
+    rows = evaluate_int(math_contract, states)
+    t_int = time.time() - t
+    console.log(f"{len(rows)} of {samples} sampled states are safe")
+
+    t = time.time()
+    floats = evaluate_float(rows)
+    t_float = time.time() - t
+
+    errors = relative_errors(rows, floats)
+    report = {
+        "samples": samples,
+        "seed": seed,
+        "balanced": balanced,
+        "safe_states": len(rows),
+        "time_int": t_int,
+        "time_float": t_float,
+        "errors": {name: _stats(e) for name, e in errors.items()},
+        "breakdown": {
+            name: breakdown(rows, errors, name) for name in ("y", "D", "p")
+        },
+    }
+
+    console.print(_table("Relative error vs integer math", report["errors"]))
+    for name, by_key in report["breakdown"].items():
+        for key, stats in by_key.items():
+            console.print(_table(f"{name}: relative error by {key}", stats))
+    console.log(
+        f"integer math (evm): {t_int:.2f}s, float64: {t_float:.4f}s "
+        f"for {len(rows)} states"
+    )
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
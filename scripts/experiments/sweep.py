@@ -0,0 +1,363 @@
+"""
+Parameter sweeps of the python Trader simulators over candle history.
+
+Each run simulates one set of pool parameters over the candles and reduces
+it to a small result record. Runs are distributed over a process pool and
+appended to a JSON-lines file as they finish, so a sweep can be interrupted
+and resumed with the same command: runs already in the file are skipped,
+and runs that failed are retried (the last record of a run is its result).
+
+Usage:
+    python -m scripts.experiments.sweep --spec spec.json --out runs.jsonl
+
+A spec is a json file of the form:
+    {
+        "backend": "int_many",          # or "ma_4"
+        "D": 3000000000000000000000000,
+        "p0": [1000000000000000000, 0, 1000000000000000000],
+        "fixed": {"mid_fee": 0.0005},
+        "grid": {"A": [...], "gamma": [...]},       # for --method grid
+        "ranges": {"A": [lo, hi, "log"], ...}       # for --method random/lhs
+    }
+
+Parameters are passed as-is to the backend's Trader, so they use that
+backend's units: `int_many` takes A and gamma in contract units (A * N**N *
+10000 and 1e18 base), `ma_4` takes them as plain numbers. A sweep with a
+parameter its backend's Trader does not take is rejected before it starts.
+A 0 in p0 is replaced by the first candle's close price. Without p0, coin 0
+is the numeraire and every other coin starts at the first close. `ma_4`
+always starts at the first close, and ignores p0.
+"""
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+from multiprocessing import Pool
+
+import click
+from rich.console import Console
+from rich.progress import Progress
+
+from tests.boa.utils import simulation_int_many, simulation_ma_4
+
+console = Console()
+
+TRADES_PER_CANDLE = 20
+YEAR = 86400 * 365
+
+_candles = None  # set in each worker by _init_worker
+
+
+# ------------------------------- Sampling -----------------------------------
+
+
+def grid_samples(grid):
+    keys = sorted(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def _scale(lo, hi, scale, u):
+    if scale == "log":
+        value = math.exp(math.log(lo) + u * (math.log(hi) - math.log(lo)))
+    else:
+        value = lo + u * (hi - lo)
+    if isinstance(lo, int) and isinstance(hi, int):
+        return int(value)
+    return value
+
+
+def random_samples(ranges, n, seed=0):
+    rng = random.Random(seed)
+    keys = sorted(ranges)
+    for _ in range(n):
+        yield {k: _scale(*_bounds(ranges[k]), rng.random()) for k in keys}
+
+
+def latin_hypercube_samples(ranges, n, seed=0):
+    # One sample in each of the n strata of every parameter, with the strata
+    # shuffled independently per parameter:
+    rng = random.Random(seed)
+    keys = sorted(ranges)
+    strata = {}
+    for k in keys:
+        strata[k] = list(range(n))
+        rng.shuffle(strata[k])
+
+    for i in range(n):
+        yield {
+            k: _scale(*_bounds(ranges[k]), (strata[k][i] + rng.random()) / n)
+            for k in keys
+        }
+
+
+def _bounds(spec):
+    lo, hi = spec[0], spec[1]
+    scale = spec[2] if len(spec) > 2 else "linear"
+    return lo, hi, scale
+
+
+# ------------------------------ Simulation ----------------------------------
+
+
+def _simulate_int_many(trader, candles):
+    # Same candle replay as simulation_ma_4.Trader.simulate, with a fixed
+    # number of steps per candle instead of step_for_price:
+    last = trader.p0[1]
+    for d in candles:
+        a, b = d["pair"]
+        ext_vol = int(d["volume"] * 10**18)  # in coin b
+        vol = 0
+
+        step = ext_vol * last // 10**18 // (2 * TRADES_PER_CANDLE)
+        if step == 0:
+            continue
+
+        max_price = int(d["high"] * 10**18)
+        while last < max_price and vol < ext_vol // 2:
+            dy = trader.buy(step, a, b, max_price=max_price)
+            if dy is False:
+                break
+            vol += dy
+            last = step * 10**18 // dy
+
+        min_price = int(d["low"] * 10**18)
+        while last > min_price and vol < ext_vol // 2:
+            dy = step * 10**18 // last
+            dx = trader.sell(dy, a, b, min_price=min_price)
+            if dx is False:
+                break
+            vol += dy
+            last = dx * 10**18 // dy
+
+        trader.tweak_price(d["t"])
+        trader.total_vol += vol
+
+
+def run_int_many(params, candles):
+    params = dict(params)
+    D = params.pop("D")
+    # the Trader prices 3 coins, coin 0 being the numeraire:
+    p0 = params.pop("p0", [10**18, 0, 0])
+    p0 = [p or int(candles[0]["close"] * 10**18) for p in p0]
+
+    trader = simulation_int_many.Trader(
+        params.pop("A"), params.pop("gamma"), D, len(p0), p0, **params
+    )
+    trader.t = candles[0]["t"]
+    _simulate_int_many(trader, candles)
+
+    return {
+        "xcp_profit": trader.xcp_profit / 10**18,
+        "xcp_profit_real": trader.xcp_profit_real / 10**18,
+        "volume": trader.total_vol / 10**18,
+    }
+
+
+def run_ma_4(params, candles):
+    params = dict(params)
+    adjustment_step = params.pop("adjustment_step", None)
+    params.pop("p0", None)
+
+    trader = simulation_ma_4.Trader(
+        params.pop("A"),
+        params.pop("gamma"),
+        params.pop("D"),
+        2,
+        candles[0]["close"],
+        log=False,
+        **params,
+    )
+    if adjustment_step is not None:
+        trader.adjustment_step = adjustment_step
+    trader.simulate(candles)
+
+    return {
+        "xcp_profit": trader.xcp_profit,
+        "xcp_profit_real": trader.xcp_profit_real,
+        "volume": trader.total_vol / 10**18,
+    }
+
+
+BACKENDS = {
+    "int_many": run_int_many,
+    "ma_4": run_ma_4,
+}
+
+
+def _trader_params(trader, extra=()):
+    # n and log are set by the backend, not by the sweep:
+    names = set(inspect.signature(trader).parameters) - {"n", "log"}
+    return names | set(extra)
+
+
+PARAMS = {
+    "int_many": _trader_params(simulation_int_many.Trader),
+    "ma_4": _trader_params(simulation_ma_4.Trader, ["adjustment_step"]),
+}
+
+
+def check_params(backend, samples):
+    """
+    Raise ValueError if a parameter set in `samples` has a parameter that
+    the backend's Trader does not take.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}")
+
+    unknown = set()
+    for params in samples:
+        unknown |= set(params) - PARAMS[backend]
+    if unknown:
+        raise ValueError(
+            f"{backend} does not take {', '.join(sorted(unknown))}; "
+            f"it takes {', '.join(sorted(PARAMS[backend]))}"
+        )
+
+
+def default_candles():
+    if not simulation_ma_4.candles_stale():
+        return simulation_ma_4.load_candles()  # shared between workers
+    return simulation_ma_4.get_all()
+
+
+def run_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _init_worker(load_candles):
+    global _candles
+    _candles = load_candles()
+
+
+def _run(task):
+    backend, params = task
+    record = {"params": params}
+    try:
+        record.update(BACKENDS[backend](params, _candles))
+        duration = _candles[-1]["t"] - _candles[0]["t"] + 1
+        record["apy"] = record["xcp_profit_real"] ** (YEAR / duration) - 1
+    except Exception as e:  # a diverging run must not kill the sweep
+        record["error"] = repr(e)
+    return record
+
+
+# -------------------------------- Sweep -------------------------------------
+
+
+def load_done(out):
+    done = set()
+    if not os.path.exists(out):
+        return done
+
+    with open(out, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partial line from a crash mid-write
+            if "error" not in record:
+                done.add(run_key(record["params"]))
+    return done
+
+
+def sweep(
+    backend,
+    samples,
+    out,
+    load_candles=default_candles,
+    workers=None,
+    chunksize=1,
+    progress=None,
+):
+    """
+    Run every parameter set in `samples` that is not already in `out`,
+    appending one json record per line to `out` as runs finish.
+    """
+    samples = list(samples)
+    check_params(backend, samples)
+
+    done = load_done(out)
+    tasks = [
+        (backend, params) for params in samples if run_key(params) not in done
+    ]
+    if not tasks:
+        return 0
+
+    # an interrupted write leaves a partial line, to be ended first:
+    partial = False
+    if os.path.exists(out) and os.path.getsize(out) > 0:
+        with open(out, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            partial = f.read() != b"\n"
+
+    with Pool(
+        workers, initializer=_init_worker, initargs=(load_candles,)
+    ) as pool, open(out, "a") as f:
+        if partial:
+            f.write("\n")
+        for record in pool.imap_unordered(_run, tasks, chunksize=chunksize):
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if progress:
+                progress()
+
+    return len(tasks)
+
+
+@click.command()
+@click.option("--spec", required=True)
+@click.option("--out", required=True)
+@click.option(
+    "--method", default="grid", type=click.Choice(["grid", "random", "lhs"])
+)
+@click.option("--samples", default=100)
+@click.option("--seed", default=0)
+@click.option("--workers", default=os.cpu_count())
+@click.option("--chunksize", default=1)
+def main(spec, out, method, samples, seed, workers, chunksize):
+
+    with open(spec, "r") as f:
+        spec = json.load(f)
+
+    if method == "grid":
+        points = grid_samples(spec["grid"])
+    elif method == "random":
+        points = random_samples(spec["ranges"], samples, seed)
+    else:
+        points = latin_hypercube_samples(spec["ranges"], samples, seed)
+
+    fixed = dict(spec.get("fixed", {}), D=spec["D"])
+    if "p0" in spec:
+        fixed["p0"] = spec["p0"]
+    points = [dict(fixed, **p) for p in points]
+
+    backend = spec.get("backend", "int_many")
+    try:
+        check_params(backend, points)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    done = len(load_done(out))
+    console.log(f"{len(points)} runs, {done} already in {out}")
+
+    with Progress(console=console) as progress:
+        task = progress.add_task(
+            "Sweeping ...", total=len(points), completed=done
+        )
+        n = sweep(
+            backend,
+            points,
+            out,
+            workers=workers,
+            chunksize=chunksize,
+            progress=lambda: progress.update(task, advance=1),
+        )
+
+    console.log(f"Finished {n} runs. Results in {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Finds routes for CurveTricryptoRouter through the pools of a factory.
+
+Pools are looked up with the factory's `find_pools_for_coins`, and every
+hop is quoted with the pool's `get_dy`:
+
+    route = find_route(factory, pool_interface, usdc, crv, dx, [weth])
+    router.exchange(route.pools, route.indices, dx, route.dy * 999 // 1000)
+
+Routes only go through the coins in `connectors`, so that the search stays
+small: these are the coins most pools have in common (WETH, stablecoins).
+"""
+from typing import NamedTuple
+
+MAX_HOPS = 4  # <----------------------------- CurveTricryptoRouter.MAX_HOPS
+
+
+class Route(NamedTuple):
+    pools: list  # pool addresses, in order
+    indices: list  # (i, j) to exchange in every pool
+    dy: int  # quoted amount of the last coin
+
+
+def _coin_paths(coin_in, coin_out, connectors, max_hops):
+    # every [coin_in, ..., coin_out] through distinct connectors:
+    paths = [[coin_in]]
+    for _ in range(max_hops):
+        extended = []
+        for path in paths:
+            yield path + [coin_out]
+            extended += [
+                path + [coin]
+                for coin in connectors
+                if coin not in path and coin != coin_out
+            ]
+        paths = extended
+
+
+def find_route(
+    factory,
+    pool_interface,
+    coin_in,
+    coin_out,
+    dx,
+    connectors=(),
+    max_hops=MAX_HOPS,
+):
+    """
+    Returns the Route from `coin_in` to `coin_out` that gets the most
+    `coin_out` for `dx` of `coin_in`, or None if the factory's pools do not
+    connect them in `max_hops` hops.
+
+    `pool_interface` is the deployer of the pools (e.g. the result of
+    `boa.load_partial`), and coins are given by address. Every hop takes the
+    pool that quotes the most for its input, and no route goes through a
+    pool twice: its quote would not account for the first hop.
+    """
+    coin_in, coin_out = str(coin_in), str(coin_out)
+    connectors = [str(coin) for coin in connectors]
+
+    best = None
+    for path in _coin_paths(coin_in, coin_out, connectors, max_hops):
+        route = Route([], [], dx)
+
+        for coin_a, coin_b in zip(path, path[1:]):
+            quotes = []
+            for pool in factory.find_pools_for_coins(coin_a, coin_b):
+                if pool in route.pools:
+                    continue
+                i, j = factory.get_coin_indices(pool, coin_a, coin_b)
+                dy = pool_interface.at(pool).get_dy(i, j, route.dy)
+                quotes.append((dy, pool, [i, j]))
+
+            if not quotes:
+                break
+
+            dy, pool, indices = max(quotes)
+            route = Route(route.pools + [pool], route.indices + [indices], dy)
+
+        else:
+            if best is None or route.dy > best.dy:
+                best = route
+
+    return best
@@ -1,38 +1,44 @@
 import boa
 import pytest
 
+from tests.boa.utils import compile_cache
 
-@pytest.fixture(scope="module")
+
+@pytest.fixture(scope="session")
 def math_contract(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/main/CurveCryptoMathOptimized3.vy")
+        return compile_cache.load(
+            "contracts/main/CurveCryptoMathOptimized3.vy"
+        )
 
 
 @pytest.fixture(scope="module")
 def math_experimental_contract(deployer):
     with boa.env.prank(deployer):
-        return boa.load(
+        return compile_cache.load(
             "contracts/experimental/secant_method/CurveCryptoMathOptimized3.vy"
         )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gauge_interface():
-    return boa.load_partial("contracts/main/LiquidityGauge.vy")
+    return compile_cache.load_partial("contracts/main/LiquidityGauge.vy")
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def gauge_implementation(deployer, gauge_interface):
     with boa.env.prank(deployer):
         return gauge_interface.deploy_as_blueprint()
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def amm_interface():
-    return boa.load_partial("contracts/main/CurveTricryptoOptimized.vy")
+    return compile_cache.load_partial(
+        "contracts/main/CurveTricryptoOptimized.vy"
+    )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def amm_implementation(deployer, amm_interface):
     with boa.env.prank(deployer):
         return amm_interface.deploy_as_blueprint()
@@ -40,7 +46,7 @@ def amm_implementation(deployer, amm_interface):
 
 @pytest.fixture(scope="module")
 def hyperamm_interface():
-    return boa.load_partial(
+    return compile_cache.load_partial(
         "contracts/experimental/secant_method/CurveTricryptoHyperOptimizedWETH.vy"  # noqa: E501
     )
 
@@ -51,13 +57,15 @@ def hyperamm_implementation(deployer, hyperamm_interface):
         return hyperamm_interface.deploy_as_blueprint()
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def views_contract(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/main/CurveCryptoViews3Optimized.vy")
+        return compile_cache.load(
+            "contracts/main/CurveCryptoViews3Optimized.vy"
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def tricrypto_factory(
     deployer,
     fee_receiver,
@@ -68,7 +76,7 @@ def tricrypto_factory(
     views_contract,
 ):
     with boa.env.prank(deployer):
-        factory = boa.load(
+        factory = compile_cache.load(
             "contracts/main/CurveTricryptoFactory.vy",
             fee_receiver,
             owner,
@@ -95,7 +103,7 @@ def tricrypto_factory_experimental(
     weth,
 ):
     with boa.env.prank(deployer):
-        factory = boa.load(
+        factory = compile_cache.load(
             "contracts/main/CurveTricryptoFactory.vy",
             fee_receiver,
             owner,
@@ -109,3 +117,9 @@ def tricrypto_factory_experimental(
         factory.set_math_implementation(math_experimental_contract)
 
     return factory
+
+
+@pytest.fixture(scope="module")
+def router(deployer):
+    with boa.env.prank(deployer):
+        return compile_cache.load("contracts/main/CurveTricryptoRouter.vy")
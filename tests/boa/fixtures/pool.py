@@ -43,6 +43,72 @@ def _crypto_swap_with_deposit(
     return tricrypto_swap
 
 
+def _factory_pools_with_deposit(
+    factory, amm_interface, coins, params, deployer, user, n_pools
+):
+    # n_pools pools of the same coins, deployed by the factory, each with
+    # the first deposit of _crypto_swap_with_deposit:
+    pools = []
+    for n in range(n_pools):
+        with boa.env.prank(deployer):
+            pool = factory.deploy_pool(
+                f"Curve.fi USDC-BTC-ETH {n}",
+                f"USDCBTCETH{n}",
+                [coin.address for coin in coins],
+                coins[2],
+                0,
+                params["A"],
+                params["gamma"],
+                params["mid_fee"],
+                params["out_fee"],
+                params["fee_gamma"],
+                params["allowed_extra_profit"],
+                params["adjustment_step"],
+                params["ma_time"],
+                params["initial_prices"],
+            )
+        pools.append(
+            _crypto_swap_with_deposit(
+                coins, user, amm_interface.at(pool), INITIAL_PRICES
+            )
+        )
+
+    return pools
+
+
+# Accounts, tokens, blueprints and the factory are session fixtures: they are
+# deployed once, at the bottom of the EVM journal, and every test module runs
+# on top of them in its own boa.env.anchor(). Whatever a module does (pools,
+# deposits, balances, time travel) is reverted when it finishes, so each
+# module still starts from a clean factory, as if everything had been
+# redeployed for it. Session fixtures that touch the chain must be listed in
+# base_state: one first requested inside a module anchor would be reverted
+# along with that module.
+@pytest.fixture(scope="session")
+def base_state(
+    deployer,
+    owner,
+    fee_receiver,
+    user,
+    users,
+    alice,
+    bob,
+    charlie,
+    weth,
+    coins,
+    tricrypto_coins,
+    stablecoins,
+    tricrypto_factory,
+):
+    return tricrypto_factory
+
+
+@pytest.fixture(scope="module", autouse=True)
+def module_anchor(base_state):
+    with boa.env.anchor():
+        yield
+
+
 @pytest.fixture(scope="module")
 def params():
 
@@ -175,3 +241,48 @@ def yuge_swap(swap, coins, user):
     yield _crypto_swap_with_deposit(
         coins, user, swap, INITIAL_PRICES, dollar_amt_each_coin=10**10
     )
+
+
+@pytest.fixture(scope="module")
+def route_pools(
+    swap_with_deposit,
+    tricrypto_factory,
+    amm_interface,
+    coins,
+    tricrypto_coins,
+    stablecoins,
+    params,
+    deployer,
+    user,
+):
+    # usd/btc/weth, usdt/wbtc/weth and dai/usdc/usdt: routes between their
+    # coins take up to three hops.
+    pools = [swap_with_deposit]
+    for pool_coins, prices in (
+        (tricrypto_coins, [10**18, 47500 * 10**18, 1500 * 10**18]),
+        (stablecoins, [10**18, 10**18, 10**18]),
+    ):
+        with boa.env.prank(deployer):
+            swap = tricrypto_factory.deploy_pool(
+                "Curve.fi " + "-".join(coin.symbol() for coin in pool_coins),
+                "".join(coin.symbol() for coin in pool_coins),
+                [coin.address for coin in pool_coins],
+                pool_coins[2],
+                0,
+                params["A"],
+                params["gamma"],
+                params["mid_fee"],
+                params["out_fee"],
+                params["fee_gamma"],
+                params["allowed_extra_profit"],
+                params["adjustment_step"],
+                params["ma_time"],
+                prices[1:],
+            )
+        pools.append(
+            _crypto_swap_with_deposit(
+                pool_coins, user, amm_interface.at(swap), prices
+            )
+        )
+
+    return pools
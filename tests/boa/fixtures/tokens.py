@@ -1,60 +1,74 @@
 import boa
 import pytest
 
+from tests.boa.utils import compile_cache
 
-@pytest.fixture(scope="module")
+
+@pytest.fixture(scope="session")
 def weth(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/WETH.vy")
+        return compile_cache.load("contracts/mocks/WETH.vy")
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def usd(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "USD", "USD", 18)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "USD", "USD", 18
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def btc(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "BTC", "BTC", 18)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "BTC", "BTC", 18
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def wbtc(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "BTC", "BTC", 8)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "BTC", "BTC", 8
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def usdt(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "USDT", "USDT", 6)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "USDT", "USDT", 6
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def usdc(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "USDC", "USDC", 6)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "USDC", "USDC", 6
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def dai(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/mocks/ERC20Mock.vy", "DAI", "DAI", 18)
+        return compile_cache.load(
+            "contracts/mocks/ERC20Mock.vy", "DAI", "DAI", 18
+        )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def coins(usd, btc, weth):
     yield [usd, btc, weth]
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def tricrypto_coins(usdt, wbtc, weth):
     yield [usdt, wbtc, weth]
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def stablecoins(usdc, usdt, dai):
     yield [dai, usdc, usdt]
 
@@ -1,7 +1,8 @@
 import boa
 import pytest
 
-from tests.boa.fixtures.pool import INITIAL_PRICES
+from tests.boa.fixtures.pool import INITIAL_PRICES, _crypto_swap_with_deposit
+from tests.boa.utils import compile_cache
 from tests.boa.utils.tokens import mint_for_testing
 
 
@@ -24,7 +25,7 @@ def init_params():
 @pytest.fixture(scope="module")
 def token_legacy(deployer):
     with boa.env.prank(deployer):
-        return boa.load(
+        return compile_cache.load(
             "contracts/old/CurveTokenV4.vy",
             "Curve USD-BTC-ETH",
             "crvUSDBTCETH",
@@ -33,13 +34,15 @@ def token_legacy(deployer):
 
 @pytest.fixture(scope="module")
 def math_legacy():
-    return boa.load("contracts/old/CurveCryptoMath3.vy")
+    return compile_cache.load("contracts/old/CurveCryptoMath3.vy")
 
 
 @pytest.fixture(scope="module")
 def views_legacy(deployer, math_legacy):
     with boa.env.prank(deployer):
-        return boa.load("contracts/old/CurveCryptoViews3.vy", math_legacy)
+        return compile_cache.load(
+            "contracts/old/CurveCryptoViews3.vy", math_legacy
+        )
 
 
 @pytest.fixture(scope="module")
@@ -92,7 +95,7 @@ def swap_legacy_empty(
         )
 
     with boa.env.prank(deployer):
-        swap = boa.loads(
+        swap = compile_cache.loads(
             source,
             owner,
             fee_receiver,
@@ -130,3 +133,77 @@ def swap_legacy(swap_legacy_empty, coins, user):
         swap_legacy_empty.add_liquidity(quantities, 0)
 
     return swap_legacy_empty
+
+
+@pytest.fixture(scope="module")
+def swap_weth(tricrypto_factory, coins, weth, params, owner, deployer, user):
+    # the WETH variant of the NG pool, as a second factory implementation:
+    amm_weth_interface = compile_cache.load_partial(
+        "contracts/main/CurveTricryptoOptimizedWETH.vy"
+    )
+    with boa.env.prank(deployer):
+        amm_weth_implementation = amm_weth_interface.deploy_as_blueprint()
+
+    with boa.env.prank(owner):
+        tricrypto_factory.set_pool_implementation(amm_weth_implementation, 1)
+
+    with boa.env.prank(deployer):
+        swap = tricrypto_factory.deploy_pool(
+            "Curve.fi USDC-BTC-ETH",
+            "USDCBTCETH",
+            [coin.address for coin in coins],
+            weth,
+            1,  # <-------- 1st implementation index
+            params["A"],
+            params["gamma"],
+            params["mid_fee"],
+            params["out_fee"],
+            params["fee_gamma"],
+            params["allowed_extra_profit"],
+            params["adjustment_step"],
+            params["ma_time"],
+            params["initial_prices"],
+        )
+
+    return _crypto_swap_with_deposit(
+        coins, user, amm_weth_interface.at(swap), INITIAL_PRICES
+    )
+
+
+def _pack(x):
+    # CurveTricryptoFactory._pack
+    return (x[0] << 128) | (x[1] << 64) | x[2]
+
+
+@pytest.fixture(scope="module")
+def swap_secant(
+    tricrypto_factory, math_experimental_contract, coins, weth, params, user
+):
+    # the secant method pool predates the salt constructor argument of the
+    # factory, so it is deployed directly with the same packed params as the
+    # factory would use, as if by the factory (the pool reads its admin and
+    # fee receiver there):
+    precisions = [10 ** (18 - coin.decimals()) for coin in coins]
+    initial_prices = params["initial_prices"]
+    with boa.env.prank(tricrypto_factory.address):
+        swap = compile_cache.load(
+            "contracts/experimental/secant_method/CurveTricryptoOptimizedWETH.vy",  # noqa: E501
+            "Curve.fi USDC-BTC-ETH",
+            "USDCBTCETH",
+            [coin.address for coin in coins],
+            math_experimental_contract,
+            weth,
+            _pack(precisions),
+            (params["A"] << 128) | params["gamma"],
+            _pack([params["mid_fee"], params["out_fee"], params["fee_gamma"]]),
+            _pack(
+                [
+                    params["allowed_extra_profit"],
+                    params["adjustment_step"],
+                    params["ma_time"],
+                ]
+            ),
+            (initial_prices[1] << 128) | initial_prices[0],
+        )
+
+    return _crypto_swap_with_deposit(coins, user, swap, INITIAL_PRICES)
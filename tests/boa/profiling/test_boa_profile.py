@@ -1,8 +1,10 @@
+import os
 import random
 
 import boa
 import pytest
 
+from tests.boa.utils.gas_profiler import GasProfiler
 from tests.boa.utils.tokens import mint_for_testing
 
 NUM_RUNS = 100
@@ -73,8 +75,48 @@ def _random_withdraw_one(swap):
     swap.remove_liquidity_one_coin(amount, i, 0)
 
 
+def _profiler(swap):
+    return GasProfiler(labels={swap.address: "pool", swap.MATH(): "MATH"})
+
+
+def _write_report(profiler, request, tmp_path):
+
+    out_dir = request.config.getoption("gas_profile_dir") or tmp_path
+    os.makedirs(out_dir, exist_ok=True)
+
+    report = profiler.function_table() + "\n" + profiler.line_table()
+    profiler.write_folded(os.path.join(out_dir, "gas_profile.folded"))
+    with open(os.path.join(out_dir, "gas_profile.txt"), "w") as f:
+        f.write(report)
+
+    print(f"\ngas profile written to {out_dir}:\n\n{report}")
+
+
+def test_profile_exchange(swap_with_deposit, coins, user):
+
+    swap = swap_with_deposit
+    mint_for_testing(coins[0], user, 10**20)
+
+    profiler = _profiler(swap)
+    with boa.env.prank(user), profiler.profile():
+        coins[0].approve(swap, 2**256 - 1)
+        swap.exchange(0, 1, 10**20, 0)
+        profiler.record(swap)
+
+    # every unit of gas is attributed to exactly one stack:
+    assert profiler.total_gas == swap._computation.get_gas_used()
+
+    stacks = {";".join(stack) for stack in profiler.stacks}
+    assert "pool.exchange;pool._exchange;pool.tweak_price" in stacks
+    assert "pool.exchange;pool._exchange;MATH.get_y" in stacks
+    assert "pool.exchange;pool._exchange;pool.tweak_price;MATH.newton_D" in (
+        stacks
+    )
+    assert profiler.calls["pool._exchange"] == 1
+
+
 @pytest.mark.profile
-def test_profile_amms(swap_with_deposit, coins, user):
+def test_profile_amms(swap_with_deposit, coins, user, request, tmp_path):
 
     swap = swap_with_deposit
 
@@ -84,24 +126,44 @@ def test_profile_amms(swap_with_deposit, coins, user):
 
     boa.env.set_balance(user, 10**50)
 
-    with boa.env.prank(user):
+    profiler = _profiler(swap)
+    with boa.env.prank(user), profiler.profile():
 
         for k in range(NUM_RUNS):
 
             # deposit:
             _random_deposit(swap)
+            profiler.record(swap)
 
             # deposit with weth:
             _random_deposit_weth(swap)
+            profiler.record(swap)
 
             # deposit single token:
             _random_deposit_one(swap)
+            profiler.record(swap)
 
             # swap:
             _random_exchange(swap)
+            profiler.record(swap)
 
             # withdraw proportionally:
             _random_proportional_withdraw(swap)
+            profiler.record(swap)
 
             # withdraw in one coin:
             _random_withdraw_one(swap)
+            profiler.record(swap)
+
+    for fn in (
+        "tweak_price",
+        "_exchange",
+        "_claim_admin_fees",
+        "_calc_withdraw_one_coin",
+        "xp",
+        "_fee",
+        "_A_gamma",
+    ):
+        assert profiler.calls[f"pool.{fn}"] > 0
+
+    _write_report(profiler, request, tmp_path)
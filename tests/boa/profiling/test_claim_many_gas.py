@@ -0,0 +1,81 @@
+"""
+Gas of sweeping the admin fees of 100 pools with the factory's claim_many.
+
+The factory deploys 100 pools with the same deposit, and claim_many is
+called on all of them, cold:
+
+- when none has made a profit since the last claim,
+- when all have, but the last claim was less than a day ago,
+- when all can claim their fees.
+
+The first two are skipped by every pool before any math, and must cost
+less than a quarter of a claim. To see the gas:
+
+    python -m pytest tests/boa/profiling/test_claim_many_gas.py -s
+"""
+import boa
+import pytest
+
+from tests.boa.fixtures.pool import _factory_pools_with_deposit
+from tests.boa.utils.gas_profiler import cool_down, format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+N_POOLS = 100
+
+
+@pytest.fixture(scope="module")
+def pools(tricrypto_factory, amm_interface, coins, params, deployer, user):
+    pools = _factory_pools_with_deposit(
+        tricrypto_factory,
+        amm_interface,
+        coins,
+        params,
+        deployer,
+        user,
+        N_POOLS,
+    )
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+    return pools
+
+
+def _trade(pools, user):
+    with boa.env.prank(user):
+        for pool in pools:
+            pool.exchange(0, 1, pool.balances(0) // 10, 0)
+            pool.exchange(1, 0, pool.balances(1) // 10, 0)
+
+
+def _claim_many_gas(factory, pools):
+    cool_down()
+    factory.claim_many([pool.address for pool in pools])
+    return factory._computation.get_gas_used()
+
+
+def test_claim_many_gas(tricrypto_factory, pools, user):
+    gas = {}
+
+    boa.env.time_travel(86400)
+    gas["no profit"] = _claim_many_gas(tricrypto_factory, pools)
+
+    _trade(pools, user)
+    boa.env.time_travel(86400)
+    with boa.env.anchor():
+        gas["claim"] = _claim_many_gas(tricrypto_factory, pools)
+
+    tricrypto_factory.claim_many([pool.address for pool in pools])
+    _trade(pools, user)
+    gas["claimed < 1 day ago"] = _claim_many_gas(tricrypto_factory, pools)
+
+    rows = [
+        [case, N_POOLS, total, total // N_POOLS] for case, total in gas.items()
+    ]
+    print(
+        "\n"
+        + format_table(
+            ["claim_many", "pools", "gas", "gas per pool"], rows, left=(0,)
+        )
+    )
+
+    for case in ("no profit", "claimed < 1 day ago"):
+        assert gas[case] < gas["claim"] // 4, case
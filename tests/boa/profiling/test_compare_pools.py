@@ -0,0 +1,211 @@
+"""
+Side by side comparison of the pool implementations.
+
+The same seeded trace of exchanges, deposits and withdrawals is replayed
+against the legacy CurveCryptoSwap, the NG pool, its WETH variant and the
+experimental secant method pool. All of them start from the same parameters
+and the same 1M USD deposit of each coin, and every operation is applied to
+all of them at the same block timestamp.
+
+The report has the mean gas of each operation type per implementation, and
+how far the outputs, price scale, price oracle and fee of each
+implementation drift from the NG pool over the trace. To see it:
+
+    python -m pytest tests/boa/profiling/test_compare_pools.py -s \
+        --gas-profile-dir gas_profile
+"""
+import os
+import random
+from collections import defaultdict
+
+import boa
+
+from tests.boa.fixtures.pool import INITIAL_PRICES, _get_deposit_amounts
+from tests.boa.utils.gas_profiler import format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+SEED = 0
+NUM_OPS = 60
+REFERENCE = "ng"
+KINDS = ["exchange"] * 4 + [
+    "add_liquidity",
+    "add_liquidity_one_sided",
+    "remove_liquidity",
+    "remove_liquidity_one_coin",
+]
+
+
+def _trace(quantities, seed=SEED):
+    # (kind, args, seconds to sleep afterwards). Coin amounts are absolute,
+    # LP amounts are fractions (1e18 = 100%) of the pool's LP supply:
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(NUM_OPS):
+        kind = rng.choice(KINDS)
+        if kind == "exchange":
+            i, j = rng.sample(range(3), 2)
+            args = (i, j, int(quantities[i] * rng.uniform(0.001, 0.05)))
+        elif kind == "add_liquidity":
+            c = rng.uniform(0.001, 0.05)
+            args = ([int(q * c * rng.uniform(0.5, 1)) for q in quantities],)
+        elif kind == "add_liquidity_one_sided":
+            i = rng.randint(0, 2)
+            amount = int(quantities[i] * rng.uniform(0.001, 0.05))
+            args = ([amount if k == i else 0 for k in range(3)],)
+        elif kind == "remove_liquidity":
+            args = (int(rng.uniform(0.001, 0.02) * 10**18),)
+        else:
+            args = (
+                int(rng.uniform(0.001, 0.02) * 10**18),
+                rng.randint(0, 2),
+            )
+        trace.append((kind, args, rng.randint(12, 3600)))
+    return trace
+
+
+class Replay:
+    def __init__(self, pool, token, coins, user):
+        self.pool = pool
+        self.token = token  # LP token: the pool itself, except for legacy
+        self.coins = coins
+        self.user = user
+        self.gas = defaultdict(list)
+        self.outputs = []  # coin and LP amounts moved by every operation
+        self.states = []  # price scale, price oracle and fee after it
+
+    def _balances(self):
+        return [coin.balanceOf(self.user) for coin in self.coins] + [
+            self.token.balanceOf(self.user)
+        ]
+
+    def run(self, kind, args):
+        supply = self.token.totalSupply()
+        before = self._balances()
+
+        with boa.env.prank(self.user):
+            if kind == "exchange":
+                self.pool.exchange(*args, 0)
+            elif kind.startswith("add_liquidity"):
+                self.pool.add_liquidity(*args, 0)
+            elif kind == "remove_liquidity":
+                amount = supply * args[0] // 10**18
+                self.pool.remove_liquidity(amount, [0, 0, 0])
+            else:
+                amount = supply * args[0] // 10**18
+                self.pool.remove_liquidity_one_coin(amount, args[1], 0)
+        self.gas[kind].append(self.pool._computation.get_gas_used())
+
+        moved = [abs(b - a) for a, b in zip(before, self._balances())]
+        # LP tokens as a fraction of the supply, so that implementations
+        # minting different amounts of LP for the same deposit compare:
+        moved[-1] = moved[-1] * 10**18 // supply
+        self.outputs.append(moved)
+
+        self.states.append(
+            [self.pool.price_scale(k) for k in range(2)]
+            + [self.pool.price_oracle(k) for k in range(2)]
+            + [self.pool.fee()]
+        )
+
+
+def _max_rel_diff(rows, reference_rows, columns):
+    diff = 0
+    for row, reference_row in zip(rows, reference_rows):
+        for k in columns:
+            a, b = row[k], reference_row[k]
+            if a != b:
+                diff = max(diff, abs(a - b) / max(a, b))
+    return diff
+
+
+def _report(replays):
+    names = list(replays)
+    legacy_gas = replays["legacy"].gas
+
+    rows = []
+    for kind in sorted(legacy_gas):
+        row = [kind, len(legacy_gas[kind])]
+        legacy = sum(legacy_gas[kind]) // len(legacy_gas[kind])
+        for name in names:
+            gas = replays[name].gas[kind]
+            mean = sum(gas) // len(gas)
+            row.append(
+                f"{mean} ({mean / legacy - 1:+.1%})"
+                if mean != legacy
+                else mean
+            )
+        rows.append(row)
+    gas_table = format_table(["operation", "n"] + names, rows, left=(0,))
+
+    reference = replays[REFERENCE]
+    divergence = {}
+    for name in names:
+        if name == REFERENCE:
+            continue
+        replay = replays[name]
+        divergence[name] = {
+            "outputs": _max_rel_diff(
+                replay.outputs, reference.outputs, range(4)
+            ),
+            "price_scale": _max_rel_diff(
+                replay.states, reference.states, (0, 1)
+            ),
+            "price_oracle": _max_rel_diff(
+                replay.states, reference.states, (2, 3)
+            ),
+            "fee": _max_rel_diff(replay.states, reference.states, (4,)),
+        }
+
+    rows = [
+        [name] + [f"{v:.2e}" for v in metrics.values()]
+        for name, metrics in divergence.items()
+    ]
+    divergence_table = format_table(
+        [f"max rel. diff vs {REFERENCE}"] + list(divergence[names[0]]),
+        rows,
+        left=(0,),
+    )
+
+    return gas_table + "\n" + divergence_table, divergence
+
+
+def test_compare_pools(
+    swap_legacy,
+    token_legacy,
+    swap_with_deposit,
+    swap_weth,
+    swap_secant,
+    coins,
+    user,
+    request,
+    tmp_path,
+):
+
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+
+    replays = {
+        "legacy": Replay(swap_legacy, token_legacy, coins, user),
+        "ng": Replay(swap_with_deposit, swap_with_deposit, coins, user),
+        "ng_weth": Replay(swap_weth, swap_weth, coins, user),
+        "secant": Replay(swap_secant, swap_secant, coins, user),
+    }
+
+    quantities = _get_deposit_amounts(10**6, INITIAL_PRICES, coins)
+    for kind, args, dt in _trace(quantities):
+        for replay in replays.values():
+            replay.run(kind, args)
+        boa.env.time_travel(dt)
+
+    report, divergence = _report(replays)
+
+    out_dir = request.config.getoption("gas_profile_dir") or tmp_path
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "pool_comparison.txt"), "w") as f:
+        f.write(report)
+    print(f"\n{report}")
+
+    # the implementations differ in how they charge and claim fees and when
+    # they rebalance, but all of them should price the same trades alike:
+    for name, metrics in divergence.items():
+        assert metrics["outputs"] < 0.01, name
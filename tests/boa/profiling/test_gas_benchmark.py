@@ -0,0 +1,219 @@
+"""
+Gas regression benchmark of the pool's hot paths.
+
+Every scenario replays a fixed-seed sequence of operations on a pool with
+1M USD of each coin and records the gas used by each call. The p50, p90 and
+max of every (scenario, function) are compared with the committed baseline
+in gas_baseline.json, and the test fails if any of them is more than
+--gas-threshold (default 1%) above it.
+
+boa never starts a new transaction, so accounts and storage slots stay warm
+from one call to the next. They are made cold again before every recorded
+call, which then pays for its first access to each of them like a
+transaction does. SSTOREs are still priced against the storage at
+deployment rather than at the start of the call, so they cost less than
+on chain.
+
+After a change that is meant to move gas, refresh the baseline with:
+    python -m pytest tests/boa/profiling/test_gas_benchmark.py \
+        --update-gas-baseline
+"""
+import json
+import math
+import os
+import random
+from collections import defaultdict
+
+import boa
+import pytest
+
+from tests.boa.utils.gas_profiler import cool_down
+from tests.boa.utils.tokens import mint_for_testing
+
+BASELINE = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+SEED = 0
+NUM_OPS = 20
+
+
+@pytest.fixture(scope="module")
+def bench_swap(swap_with_deposit, coins, user):
+
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+        with boa.env.prank(user):
+            coin.approve(swap_with_deposit, 2**256 - 1)
+
+    return swap_with_deposit
+
+
+def _percentile(values, q):
+    # nearest-rank percentile
+    values = sorted(values)
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def _stats(gas):
+    return {
+        "p50": _percentile(gas, 50),
+        "p90": _percentile(gas, 90),
+        "max": max(gas),
+        "n": len(gas),
+    }
+
+
+class GasRecorder:
+    def __init__(self, swap, coins, user, seed=SEED):
+        self.swap = swap
+        self.coins = coins
+        self.user = user
+        self.rng = random.Random(seed)
+        self.gas = defaultdict(list)
+
+    def _call(self, fn, *args, record=True):
+        cool_down()
+        with boa.env.prank(self.user):
+            getattr(self.swap, fn)(*args)
+        if record:
+            self.gas[fn].append(self.swap._computation.get_gas_used())
+
+    def sleep(self):
+        boa.env.time_travel(self.rng.randint(12, 600))
+
+    def exchange(self, record=True):
+        i, j = self.rng.sample(range(3), 2)
+        dx = int(self.swap.balances(i) * self.rng.uniform(0.001, 0.02))
+        self._call("exchange", i, j, dx, 0, record=record)
+
+    def exchange_received(self):
+        i, j = self.rng.sample(range(3), 2)
+        dx = int(self.swap.balances(i) * self.rng.uniform(0.001, 0.02))
+        with boa.env.prank(self.user):
+            self.coins[i].transfer(self.swap, dx)
+        self._call("exchange_received", i, j, dx, 0)
+
+    def add_liquidity(self, one_sided=False):
+        c = self.rng.uniform(0.001, 0.02)
+        amounts = [int(c * self.swap.balances(k)) for k in range(3)]
+        if one_sided:
+            i = self.rng.randint(0, 2)
+            amounts = [amounts[k] if k == i else 0 for k in range(3)]
+        self._call("add_liquidity", amounts, 0)
+
+    def remove_liquidity(self):
+        amount = int(self.swap.totalSupply() * self.rng.uniform(0.001, 0.01))
+        self._call("remove_liquidity", amount, [0, 0, 0])
+
+    def remove_liquidity_one_coin(self):
+        amount = int(self.swap.totalSupply() * self.rng.uniform(0.001, 0.01))
+        self._call(
+            "remove_liquidity_one_coin", amount, self.rng.randint(0, 2), 0
+        )
+
+
+def _scenario_exchange(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.exchange()
+        rec.sleep()
+
+
+def _scenario_exchange_received(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.exchange_received()
+        rec.sleep()
+
+
+def _scenario_add_liquidity_balanced(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.add_liquidity()
+        rec.exchange(record=False)
+        rec.sleep()
+
+
+def _scenario_add_liquidity_one_sided(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.add_liquidity(one_sided=True)
+        rec.sleep()
+
+
+def _scenario_remove_liquidity(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.remove_liquidity()
+        rec.exchange(record=False)
+        rec.sleep()
+
+
+def _scenario_remove_liquidity_one_coin(rec, admin):
+    for _ in range(NUM_OPS):
+        rec.remove_liquidity_one_coin()
+        rec.sleep()
+
+
+def _scenario_claim_admin_fees(rec, admin):
+    # remove_liquidity_one_coin claims admin fees once a day:
+    for _ in range(NUM_OPS // 4):
+        for _ in range(10):
+            rec.exchange(record=False)
+            rec.sleep()
+        boa.env.time_travel(86400)
+        rec.remove_liquidity_one_coin()
+
+
+def _scenario_ramp(rec, admin):
+    swap = rec.swap
+    with boa.env.prank(admin):
+        swap.ramp_A_gamma(
+            swap.A() * 2,
+            swap.gamma() * 2,
+            boa.env.vm.state.timestamp + 7 * 86400,
+        )
+
+    for _ in range(NUM_OPS):
+        rec.exchange()
+        rec.add_liquidity(one_sided=True)
+        rec.remove_liquidity_one_coin()
+        rec.sleep()
+
+
+SCENARIOS = {
+    name.removeprefix("_scenario_"): fn
+    for name, fn in globals().items()
+    if name.startswith("_scenario_")
+}
+
+
+def _load_baseline():
+    if not os.path.exists(BASELINE):
+        return {}
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_gas(scenario, bench_swap, coins, user, factory_admin, request):
+
+    with boa.env.anchor():
+        rec = GasRecorder(bench_swap, coins, user)
+        SCENARIOS[scenario](rec, factory_admin)
+
+    results = {f"{scenario}/{fn}": _stats(gas) for fn, gas in rec.gas.items()}
+    baseline = _load_baseline()
+
+    if request.config.getoption("update_gas_baseline"):
+        baseline.update(results)
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return
+
+    threshold = request.config.getoption("gas_threshold")
+    regressions = []
+    for key, stats in results.items():
+        assert key in baseline, f"no baseline for {key}"
+        for p in ("p50", "p90", "max"):
+            if stats[p] > baseline[key][p] * (1 + threshold):
+                regressions.append(
+                    f"{key} {p}: {stats[p]} > {baseline[key][p]} "
+                    f"(+{stats[p] / baseline[key][p] - 1:.2%})"
+                )
+
+    assert not regressions, "gas regressions:\n" + "\n".join(regressions)
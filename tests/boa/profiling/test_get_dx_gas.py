@@ -0,0 +1,66 @@
+"""
+Gas and accuracy of the views' get_dx against the get_dx it replaced.
+
+CurveCryptoViews3Optimized.get_dx reads the pool state once and solves
+get_y twice. IterativeGetDx (a mock) is the get_dx it replaced: five fixed
+point iterations, each of which reads the pool state and solves get_y
+again. Both quote the six pairs of the yuge pool ($10B per coin) for
+outputs from $10 to $3B, and the error of a quote is
+|get_dy(get_dx(dy)) / dy - 1|. get_dx must use less gas, and be at least
+as accurate, short of the rounding error of both. To see the gas and the
+largest error over the pairs:
+
+    python -m pytest tests/boa/profiling/test_get_dx_gas.py -s
+"""
+import boa
+import pytest
+
+from tests.boa.fixtures.pool import INITIAL_PRICES
+from tests.boa.utils import compile_cache
+from tests.boa.utils.gas_profiler import format_table
+
+OUTPUTS_USD = [10, 10**4, 10**7, 10**8, 10**9, 3 * 10**9]
+ROUNDING = 1e-14  # <------------ below this, both errors are rounding.
+
+
+@pytest.fixture(scope="module")
+def iterative_get_dx(deployer):
+    with boa.env.prank(deployer):
+        return compile_cache.load("contracts/mocks/IterativeGetDx.vy")
+
+
+def _measure(views, swap, dy_usd):
+    gas = 0
+    error = 0
+    for i in range(3):
+        for j in range(3):
+            if i == j:
+                continue
+
+            dy = dy_usd * 10**36 // INITIAL_PRICES[j]
+            dx = views.get_dx(i, j, dy, swap)
+            gas = max(gas, views._computation.get_gas_used())
+            error = max(error, abs(swap.get_dy(i, j, dx) / dy - 1))
+
+    return gas, error
+
+
+def test_get_dx_gas(views_contract, iterative_get_dx, yuge_swap):
+    rows = []
+    for dy_usd in OUTPUTS_USD:
+        old_gas, old_error = _measure(iterative_get_dx, yuge_swap, dy_usd)
+        gas, error = _measure(views_contract, yuge_swap, dy_usd)
+        rows.append(
+            [
+                f"${dy_usd:,}",
+                old_gas,
+                f"{old_error:.1e}",
+                gas,
+                f"{error:.1e}",
+            ]
+        )
+        assert gas < old_gas, dy_usd
+        assert error <= max(old_error, ROUNDING), dy_usd
+
+    header = ["dy", "old gas", "old error", "gas", "error"]
+    print("\n" + format_table(header, rows, left=(0,)))
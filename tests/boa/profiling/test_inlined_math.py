@@ -0,0 +1,133 @@
+"""
+Gas of the pools with the math contract inlined against the main build.
+
+contracts/inlined holds the pool and WETH pool generated by
+scripts/build_inlined_math.py, which compiles CurveCryptoMathOptimized3
+into them: they call it as internal functions instead of making a
+STATICCALL to the MATH contract for every get_y, newton_D, get_p,
+geometric_mean, wad_exp and reduction_coefficient. They are too big for the
+EIP-170 contract size limit, so they are deployed with a larger limit, as
+on the chains they are meant for. Both builds are deployed by the factory,
+get the same deposit and replay the same operations: they must end up in
+the same state, and the inlined build must use less gas for every
+operation. To see the gas of both:
+
+    python -m pytest tests/boa/profiling/test_inlined_math.py -s
+"""
+from collections import defaultdict
+from pathlib import Path
+
+import boa
+import pytest
+
+from scripts.build_inlined_math import MATH, inline_math
+from tests.boa.fixtures.pool import INITIAL_PRICES, _crypto_swap_with_deposit
+from tests.boa.utils import compile_cache
+from tests.boa.utils.gas_profiler import cool_down, format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+POOLS = ["CurveTricryptoOptimized.vy", "CurveTricryptoOptimizedWETH.vy"]
+CODE_SIZE_LIMIT = 48 * 1024
+NUM_OPS = 10
+
+
+@pytest.mark.parametrize("pool", POOLS)
+def test_inlined_source_is_up_to_date(pool):
+    # run python -m scripts.build_inlined_math if this fails:
+    main = Path("contracts/main", pool).read_text()
+    inlined = Path("contracts/inlined", pool).read_text()
+    assert inlined == inline_math(main, Path(MATH).read_text())
+
+
+@pytest.fixture(scope="module")
+def pools(tricrypto_factory, coins, weth, params, owner, deployer, user):
+    # main and inlined builds of the pool and the WETH pool, as
+    # implementations 0 to 3 of the factory:
+    boa.env.vm.patch.code_size_limit = CODE_SIZE_LIMIT
+
+    pools = {}
+    for idx, (build, pool) in enumerate(
+        (build, pool) for pool in POOLS for build in ("main", "inlined")
+    ):
+        interface = compile_cache.load_partial(f"contracts/{build}/{pool}")
+        with boa.env.prank(deployer):
+            blueprint = interface.deploy_as_blueprint()
+        with boa.env.prank(owner):
+            tricrypto_factory.set_pool_implementation(blueprint, idx)
+
+        with boa.env.prank(deployer):
+            swap = tricrypto_factory.deploy_pool(
+                "Curve.fi USD-BTC-ETH",
+                "USDBTCETH",
+                [coin.address for coin in coins],
+                weth,
+                idx,
+                params["A"],
+                params["gamma"],
+                params["mid_fee"],
+                params["out_fee"],
+                params["fee_gamma"],
+                params["allowed_extra_profit"],
+                params["adjustment_step"],
+                params["ma_time"],
+                params["initial_prices"],
+            )
+
+        pools[build, Path(pool).stem] = _crypto_swap_with_deposit(
+            coins, user, interface.at(swap), INITIAL_PRICES
+        )
+
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+
+    return pools
+
+
+def _replay(swap, user):
+    gas = defaultdict(list)
+
+    def call(fn, *args):
+        cool_down()
+        with boa.env.prank(user):
+            getattr(swap, fn)(*args)
+        gas[fn].append(swap._computation.get_gas_used())
+
+    for k in range(NUM_OPS):
+        i, j = k % 3, (k + 1) % 3
+        call("exchange", i, j, swap.balances(i) // 100, 0)
+        call("add_liquidity", [swap.balances(i) // 100, 0, 0], 0)
+        call("remove_liquidity_one_coin", swap.totalSupply() // 200, j, 0)
+        call("remove_liquidity", swap.totalSupply() // 200, [0, 0, 0])
+        boa.env.time_travel(600)
+
+    state = [swap.balances(k) for k in range(3)] + [
+        swap.totalSupply(),
+        swap.D(),
+        swap.price_scale(0),
+        swap.price_scale(1),
+        swap.xcp_profit(),
+    ]
+    return {fn: sum(g) // len(g) for fn, g in gas.items()}, state
+
+
+def test_inlined_math_gas(pools, user):
+    gas = {}
+    state = {}
+    for key, swap in pools.items():
+        with boa.env.anchor():
+            gas[key], state[key] = _replay(swap, user)
+
+    rows = []
+    for pool in POOLS:
+        pool = Path(pool).stem
+        assert state["inlined", pool] == state["main", pool], pool
+
+        for fn, main in gas["main", pool].items():
+            inlined = gas["inlined", pool][fn]
+            rows.append(
+                [pool, fn, main, inlined, f"{inlined / main - 1:+.1%}"]
+            )
+            assert inlined < main, (pool, fn)
+
+    header = ["pool", "function", "main", "inlined", "diff"]
+    print("\n" + format_table(header, rows, left=(0, 1)))
@@ -0,0 +1,63 @@
+"""
+Gas of the pool's oracles() view against the separate oracle getters.
+
+oracles() returns price_oracle, price_scale and last_prices of both coins
+and xcp_oracle in one call. Reading the same values from the separate
+getters takes seven calls, each of which checks the reentrancy lock, reads
+its slots again and, if the moving averages are not up to date, evaluates
+their alpha again. The getters are measured one transaction each (every
+call cold) and all in one transaction (as from a multicall: only the
+first access to every slot is cold), and oracles() must be cheaper than
+both, in the block of the last trade and after it. To see the gas:
+
+    python -m pytest tests/boa/profiling/test_oracle_gas.py -s
+"""
+import boa
+
+from tests.boa.utils.gas_profiler import cool_down, format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+GETTERS = [
+    ("price_oracle", 0),
+    ("price_oracle", 1),
+    ("price_scale", 0),
+    ("price_scale", 1),
+    ("last_prices", 0),
+    ("last_prices", 1),
+    ("xcp_oracle",),
+]
+
+
+def _gas(swap, fn, *args):
+    getattr(swap, fn)(*args)
+    return swap._computation.get_gas_used()
+
+
+def _measure(swap):
+    separate = 0
+    for fn, *args in GETTERS:
+        cool_down()
+        separate += _gas(swap, fn, *args)
+
+    cool_down()
+    batched = sum(_gas(swap, fn, *args) for fn, *args in GETTERS)
+
+    cool_down()
+    return separate, batched, _gas(swap, "oracles")
+
+
+def test_oracle_gas(swap_with_deposit, coins, user):
+    amount = 10**4 * 10**18
+    mint_for_testing(coins[0], user, amount)
+    with boa.env.prank(user):
+        swap_with_deposit.exchange(0, 1, amount, 0)
+
+    rows = []
+    for state, dt in (("same block", 0), ("after 10 min", 600)):
+        boa.env.time_travel(dt)
+        separate, batched, oracles = _measure(swap_with_deposit)
+        rows.append([state, separate, batched, oracles])
+        assert oracles < batched < separate, state
+
+    header = ["state", "separate txs", "one tx", "oracles()"]
+    print("\n" + format_table(header, rows, left=(0,)))
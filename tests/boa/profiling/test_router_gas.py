@@ -0,0 +1,96 @@
+"""
+Gas of CurveTricryptoRouter against a router that approves and exchanges.
+
+CurveTricryptoRouter transfers the coins sold into the first pool of the
+route, and every pool sends its output straight into the next one, which
+takes it in with exchange_received. ApproveExchangeRouter (a mock) routes
+the usual way: it takes the coins sold, and at every hop approves the pool
+and calls exchange, which transfers the coins in from it and sends the
+output back to it. Both route the same trades over two and three pools,
+with every call cold, and CurveTricryptoRouter must use less gas after
+refunds. To see the gas of both:
+
+    python -m pytest tests/boa/profiling/test_router_gas.py -s
+"""
+from collections import defaultdict
+
+import boa
+import pytest
+
+from tests.boa.utils import compile_cache
+from tests.boa.utils.gas_profiler import cool_down, format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+NUM_TRADES = 5
+
+
+@pytest.fixture(scope="module")
+def approve_exchange_router(deployer):
+    with boa.env.prank(deployer):
+        return compile_cache.load("contracts/mocks/ApproveExchangeRouter.vy")
+
+
+@pytest.fixture(scope="module")
+def routes(route_pools, coins, tricrypto_coins, stablecoins):
+    usd, btc, weth = coins
+    usdt, wbtc, _ = tricrypto_coins
+    dai = stablecoins[0]
+    pool_0, pool_1, pool_2 = route_pools
+    return {
+        # coin in, pools, indices:
+        "usd > weth > wbtc": (usd, [pool_0, pool_1], [[0, 2], [2, 1]]),
+        "dai > usdt > weth > btc": (
+            dai,
+            [pool_2, pool_1, pool_0],
+            [[0, 2], [0, 2], [2, 1]],
+        ),
+    }
+
+
+def _net_gas(computation):
+    # the naive router sets allowances and balances of its own and clears
+    # them again, which is mostly refunded (EIP-3529: up to 1/5 of the gas):
+    gas = computation.get_gas_used()
+    return gas - min(computation.get_gas_refund(), gas // 5)
+
+
+def _route_gas(router, coin_in, pools, indices, user):
+    gas = []
+    for n in range(NUM_TRADES):
+        dx = (n + 1) * 1000 * 10 ** coin_in.decimals()
+        mint_for_testing(coin_in, user, dx)
+
+        cool_down()
+        with boa.env.prank(user):
+            router.exchange([p.address for p in pools], indices, dx, 0)
+        gas.append(_net_gas(router._computation))
+        boa.env.time_travel(600)
+
+    return sum(gas) // len(gas)
+
+
+def test_router_gas(router, approve_exchange_router, routes, user):
+    routers = {
+        "exchange_received": router,
+        "approve+exchange": approve_exchange_router,
+    }
+
+    gas = defaultdict(dict)
+    for name, _router in routers.items():
+        for route, (coin_in, pools, indices) in routes.items():
+            with boa.env.prank(user):
+                coin_in.approve(_router, 2**256 - 1)
+            with boa.env.anchor():
+                gas[route][name] = _route_gas(
+                    _router, coin_in, pools, indices, user
+                )
+
+    rows = []
+    for route, route_gas in gas.items():
+        naive = route_gas["approve+exchange"]
+        received = route_gas["exchange_received"]
+        rows.append([route, naive, received, f"{received / naive - 1:+.1%}"])
+        assert received < naive, route
+
+    header = ["route", "approve+exchange", "exchange_received", "diff"]
+    print("\n" + format_table(header, rows, left=(0,)))
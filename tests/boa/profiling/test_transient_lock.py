@@ -0,0 +1,172 @@
+"""
+Gas of the Cancun build of the pools against the main build.
+
+The Cancun build is the pool and WETH pool of contracts/main compiled with
+evm_version="cancun" instead of their paris pragma. vyper then keeps the
+@nonreentrant lock in transient storage (EIP-1153): the lock costs a TLOAD
+and two TSTOREs instead of a cold SLOAD and two SSTOREs. Both builds are
+deployed by one factory on a Cancun EVM (tests/boa/utils/cancun.py), get the
+same deposit and replay the same operations, and the Cancun build must use
+less gas for every one of them. To see the gas of both:
+
+    python -m pytest tests/boa/profiling/test_transient_lock.py -s
+"""
+from collections import defaultdict
+from pathlib import Path
+
+import boa
+import pytest
+from eth_utils import to_canonical_address
+
+from tests.boa.fixtures.pool import INITIAL_PRICES, _crypto_swap_with_deposit
+from tests.boa.utils import compile_cache
+from tests.boa.utils.cancun import cancun_env
+from tests.boa.utils.gas_profiler import cool_down, format_table
+from tests.boa.utils.tokens import mint_for_testing
+
+POOLS = ["CurveTricryptoOptimized.vy", "CurveTricryptoOptimizedWETH.vy"]
+BUILDS = {"main": None, "cancun": "cancun"}  # <---------- build: evm version.
+NUM_OPS = 10
+
+
+@pytest.mark.parametrize("pool", POOLS)
+def test_cancun_bytecode(pool):
+    main, cancun = [
+        compile_cache.load_partial(
+            f"contracts/main/{pool}", evm_version=evm_version
+        ).compiler_data
+        for evm_version in BUILDS.values()
+    ]
+    assert main.settings.evm_version == "paris"
+    assert cancun.settings.evm_version == "cancun"
+    assert main.bytecode_runtime != cancun.bytecode_runtime
+
+    main = [str(op) for op in main.assembly_runtime]
+    cancun = [str(op) for op in cancun.assembly_runtime]
+    for opcode in ("TLOAD", "TSTORE", "MCOPY"):
+        assert opcode not in main
+        assert opcode in cancun
+
+
+@pytest.fixture(scope="module")
+def cancun_evm():
+    with boa.swap_env(cancun_env()):
+        yield
+
+
+@pytest.fixture(scope="module")
+def pools(cancun_evm, deployer, owner, fee_receiver, user, params):
+    # main and Cancun builds of the pool and the WETH pool, as
+    # implementations 0 to 3 of one factory:
+    with boa.env.prank(deployer):
+        coins = [
+            compile_cache.load("contracts/mocks/ERC20Mock.vy", name, name, 18)
+            for name in ("USD", "BTC")
+        ] + [compile_cache.load("contracts/mocks/WETH.vy")]
+        math = compile_cache.load(
+            "contracts/main/CurveCryptoMathOptimized3.vy"
+        )
+        views = compile_cache.load(
+            "contracts/main/CurveCryptoViews3Optimized.vy"
+        )
+        factory = compile_cache.load(
+            "contracts/main/CurveTricryptoFactory.vy", fee_receiver, owner
+        )
+
+    with boa.env.prank(owner):
+        factory.set_views_implementation(views)
+        factory.set_math_implementation(math)
+
+    pools = {}
+    for idx, (build, pool) in enumerate(
+        (build, pool) for pool in POOLS for build in BUILDS
+    ):
+        interface = compile_cache.load_partial(
+            f"contracts/main/{pool}", evm_version=BUILDS[build]
+        )
+        with boa.env.prank(deployer):
+            blueprint = interface.deploy_as_blueprint()
+        with boa.env.prank(owner):
+            factory.set_pool_implementation(blueprint, idx)
+
+        with boa.env.prank(deployer):
+            swap = factory.deploy_pool(
+                "Curve.fi USD-BTC-ETH",
+                "USDBTCETH",
+                [coin.address for coin in coins],
+                coins[2],
+                idx,
+                params["A"],
+                params["gamma"],
+                params["mid_fee"],
+                params["out_fee"],
+                params["fee_gamma"],
+                params["allowed_extra_profit"],
+                params["adjustment_step"],
+                params["ma_time"],
+                params["initial_prices"],
+            )
+
+        pools[build, Path(pool).stem] = _crypto_swap_with_deposit(
+            coins, user, interface.at(swap), INITIAL_PRICES
+        )
+
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+
+    return coins, pools
+
+
+def _replay(swap, coins, user):
+    gas = defaultdict(list)
+
+    def call(fn, *args):
+        cool_down()
+        with boa.env.prank(user):
+            getattr(swap, fn)(*args)
+        gas[fn].append(swap._computation.get_gas_used())
+
+    for k in range(NUM_OPS):
+        i, j = k % 3, (k + 1) % 3
+        call("exchange", i, j, swap.balances(i) // 100, 0)
+        call("add_liquidity", [swap.balances(i) // 100, 0, 0], 0)
+        call("remove_liquidity_one_coin", swap.totalSupply() // 200, j, 0)
+        call("remove_liquidity", swap.totalSupply() // 200, [0, 0, 0])
+        call("price_oracle", 0)
+        call("get_virtual_price")
+        boa.env.time_travel(600)
+
+    return {fn: sum(g) // len(g) for fn, g in gas.items()}
+
+
+def test_lock_not_in_storage(pools, user):
+    coins, pools = pools
+    for (build, pool), swap in pools.items():
+        layout = swap.compiler_data.storage_layout["storage_layout"]
+        lock = layout["nonreentrant.lock"]["slot"]
+        with boa.env.prank(user):
+            swap.exchange(0, 1, 10**18, 0)
+
+        address = to_canonical_address(swap.address)
+        stored = boa.env.vm.state.get_storage(address, lock)
+        assert stored == (0 if build == "cancun" else 3), (build, pool)
+
+
+def test_transient_lock_gas(pools, user):
+    coins, pools = pools
+
+    gas = {}
+    for key, swap in pools.items():
+        with boa.env.anchor():
+            gas[key] = _replay(swap, coins, user)
+
+    rows = []
+    for pool in POOLS:
+        pool = Path(pool).stem
+        for fn, main in gas["main", pool].items():
+            cancun = gas["cancun", pool][fn]
+            rows.append([pool, fn, main, cancun, cancun - main])
+            assert cancun < main, (pool, fn)
+
+    header = ["pool", "function", "main", "cancun", "diff"]
+    print("\n" + format_table(header, rows, left=(0, 1)))
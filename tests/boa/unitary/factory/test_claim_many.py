@@ -0,0 +1,56 @@
+import boa
+import pytest
+
+from tests.boa.fixtures.pool import _factory_pools_with_deposit
+from tests.boa.utils.tokens import mint_for_testing
+
+N_POOLS = 4
+
+
+@pytest.fixture(scope="module")
+def pools(tricrypto_factory, amm_interface, coins, params, deployer, user):
+    pools = _factory_pools_with_deposit(
+        tricrypto_factory,
+        amm_interface,
+        coins,
+        params,
+        deployer,
+        user,
+        N_POOLS,
+    )
+
+    # every other pool makes a profit from fees:
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+    with boa.env.prank(user):
+        for pool in pools[::2]:
+            for k in range(6):
+                i, j = k % 3, (k + 1) % 3
+                pool.exchange(i, j, pool.balances(i) // 20, 0)
+
+    boa.env.time_travel(86400)
+    return pools
+
+
+def test_claim_many(tricrypto_factory, pools, coins, fee_receiver, alice):
+    xcp_profit_a = [pool.xcp_profit_a() for pool in pools]
+    before = [coin.balanceOf(fee_receiver) for coin in coins]
+
+    not_a_pool = boa.env.generate_address()
+    with boa.env.prank(alice):  # <--------------------- callable by anyone.
+        tricrypto_factory.claim_many([not_a_pool] + [p.address for p in pools])
+
+    for n, pool in enumerate(pools):
+        if n % 2 == 0:
+            assert pool.xcp_profit_a() == pool.xcp_profit() > xcp_profit_a[n]
+        else:
+            assert pool.xcp_profit_a() == xcp_profit_a[n]
+        for k, coin in enumerate(coins):
+            assert coin.balanceOf(pool) == pool.balances(k)
+
+    for coin, b in zip(coins, before):
+        assert coin.balanceOf(fee_receiver) > b
+
+
+def test_claim_many_empty(tricrypto_factory):
+    tricrypto_factory.claim_many([])
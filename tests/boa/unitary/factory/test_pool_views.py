@@ -0,0 +1,119 @@
+import boa
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def test_pool_list_range(tricrypto_factory, route_pools):
+    addresses = [pool.address for pool in route_pools]
+    assert tricrypto_factory.pool_count() == len(addresses)
+
+    assert tricrypto_factory.pool_list_range(0, 3) == addresses
+    assert tricrypto_factory.pool_list_range(1, 1) == addresses[1:2]
+    assert tricrypto_factory.pool_list_range(1, 10) == addresses[1:]
+    assert tricrypto_factory.pool_list_range(0, 2**256 - 1) == addresses
+    assert tricrypto_factory.pool_list_range(0, 0) == []
+    assert tricrypto_factory.pool_list_range(3, 1) == []
+    assert tricrypto_factory.pool_list_range(2**256 - 1, 1) == []
+
+
+def test_find_pools_for_coins(
+    tricrypto_factory, route_pools, coins, tricrypto_coins, stablecoins
+):
+    weth, usdt = coins[2], tricrypto_coins[0]
+    pool_0, pool_1, pool_2 = [pool.address for pool in route_pools]
+
+    for coin_a, coin_b, pools in (
+        (coins[0], coins[1], [pool_0]),
+        (weth, tricrypto_coins[1], [pool_1]),
+        (usdt, stablecoins[0], [pool_2]),
+        (coins[0], weth, [pool_0]),
+        (tricrypto_coins[1], usdt, [pool_1]),
+        (usdt, weth, [pool_1]),
+        (coins[0], stablecoins[0], []),
+    ):
+        for _from, _to in ((coin_a, coin_b), (coin_b, coin_a)):
+            found = tricrypto_factory.find_pools_for_coins(_from, _to)
+            assert found == pools
+            assert found == [
+                tricrypto_factory.find_pool_for_coins(_from, _to, i)
+                for i in range(tricrypto_factory.get_market_counts(_from, _to))
+            ]
+
+
+def test_find_pools_for_coins_start(
+    tricrypto_factory, amm_interface, coins, params, deployer
+):
+    # a second usd/btc/weth pool, on top of the one of route_pools:
+    with boa.env.prank(deployer):
+        pool = tricrypto_factory.deploy_pool(
+            "Curve.fi USDC-BTC-ETH 2",
+            "USDCBTCETH2",
+            [coin.address for coin in coins],
+            coins[2],
+            0,
+            params["A"],
+            params["gamma"],
+            params["mid_fee"],
+            params["out_fee"],
+            params["fee_gamma"],
+            params["allowed_extra_profit"],
+            params["adjustment_step"],
+            params["ma_time"],
+            params["initial_prices"],
+        )
+
+    found = tricrypto_factory.find_pools_for_coins(coins[0], coins[1])
+    assert len(found) == 2 and found[1] == pool
+    assert tricrypto_factory.find_pools_for_coins(coins[0], coins[1], 1) == [
+        pool
+    ]
+    assert tricrypto_factory.find_pools_for_coins(coins[0], coins[1], 2) == []
+
+
+def test_get_pool_data_many(
+    tricrypto_factory, route_pools, amm_implementation
+):
+    not_a_pool = boa.env.generate_address()
+    pools = [pool.address for pool in route_pools] + [not_a_pool]
+
+    pool_data = tricrypto_factory.get_pool_data_many(pools)
+    assert len(pool_data) == len(pools)
+
+    for pool, data in zip(pools, pool_data):
+        assert data == (
+            tricrypto_factory.get_gauge(pool),
+            tricrypto_factory.get_coins(pool),
+            tricrypto_factory.get_decimals(pool),
+            tricrypto_factory.get_implementation_address(pool),
+        )
+
+    for pool, (gauge, coins, decimals, implementation) in zip(
+        route_pools, pool_data
+    ):
+        assert gauge == ZERO_ADDRESS  # <------------ no gauges deployed yet.
+        assert coins == [pool.coins(i) for i in range(3)]
+        assert decimals == [
+            boa.env.lookup_contract(coin).decimals() for coin in coins
+        ]
+        assert implementation == amm_implementation.address
+
+    assert pool_data[-1] == (
+        ZERO_ADDRESS,
+        [ZERO_ADDRESS] * 3,
+        [0] * 3,
+        ZERO_ADDRESS,
+    )
+    assert tricrypto_factory.get_pool_data_many([]) == []
+
+
+def test_get_pool_data_many_gas(tricrypto_factory, route_pools):
+    # vyper reserves memory for the largest array the view can return, and
+    # expanding memory to it must not dominate the cost of a small call:
+    tricrypto_factory.get_pool_data_many([route_pools[0].address])
+    gas = tricrypto_factory._computation.get_gas_used()
+    assert gas < 20_000, gas
+
+    not_pools = [boa.env.generate_address() for _ in range(101)]
+    assert len(tricrypto_factory.get_pool_data_many(not_pools[:100])) == 100
+    with boa.reverts():
+        tricrypto_factory.get_pool_data_many(not_pools)
@@ -1,14 +1,18 @@
 import boa
 import pytest
 
+from tests.boa.utils import compile_cache
+
 
 @pytest.fixture(scope="module")
 def math_optimized(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/main/CurveCryptoMathOptimized3.vy")
+        return compile_cache.load(
+            "contracts/main/CurveCryptoMathOptimized3.vy"
+        )
 
 
 @pytest.fixture(scope="module")
 def math_unoptimized(deployer):
     with boa.env.prank(deployer):
-        return boa.load("contracts/old/CurveCryptoMath3.vy")
+        return compile_cache.load("contracts/old/CurveCryptoMath3.vy")
@@ -0,0 +1,118 @@
+from hypothesis import assume, given, settings
+from hypothesis import strategies as st
+
+from tests.boa.utils import simulation_int_many as sim
+
+MAX_SAMPLES = 100
+
+A_MUL = 10000 * 3**3
+MIN_A = int(0.01 * A_MUL)
+MAX_A = 1000 * A_MUL
+
+# gamma from 1e-8 up to 0.05
+MIN_GAMMA = 10**10
+MAX_GAMMA = 5 * 10**16
+
+curve = st.tuples(
+    st.integers(min_value=MIN_A, max_value=MAX_A),
+    st.integers(min_value=MIN_GAMMA, max_value=MAX_GAMMA),
+    st.integers(min_value=10**18, max_value=10**14 * 10**18),
+    st.lists(
+        st.integers(min_value=10**16, max_value=10**22),
+        min_size=2,
+        max_size=2,
+    ),
+)
+
+# relative changes of x, in 1e18 base, small enough for a warm start:
+small_delta = st.lists(
+    st.integers(
+        min_value=-sim.Curve.D_WARM_START_THRESHOLD,
+        max_value=sim.Curve.D_WARM_START_THRESHOLD,
+    ),
+    min_size=3,
+    max_size=3,
+)
+
+
+def _curve(A, gamma, D, p):
+    return sim.Curve(A, gamma, D, 3, [10**18] + p)
+
+
+def _cold_D(curve):
+    # the same state in a curve with nothing cached
+    cold = sim.Curve(curve.A, curve.gamma, 10**18, curve.n, curve.p[:])
+    cold.x = curve.x[:]
+    return cold.D()
+
+
+def _D(curve):
+    try:
+        return curve.D()
+    except (AssertionError, ValueError):
+        assume(False)
+
+
+def _move(curve, delta):
+    for k, d in enumerate(delta):
+        curve.x[k] = curve.x[k] * (10**18 + d) // 10**18
+
+
+@given(state=curve, delta=small_delta)
+@settings(max_examples=MAX_SAMPLES, deadline=None)
+def test_warm_D_matches_cold(state, delta):
+    c = _curve(*state)
+    _D(c)
+
+    _move(c, delta)
+    assert _D(c) == _cold_D(c)
+
+
+def test_warm_D_skips_geometric_mean(monkeypatch):
+    c = sim.Curve(1707629, 11809167828997, 3 * 10**24, 3)
+    _move(c, [5 * 10**15, -5 * 10**15, 0])
+    c.D()
+
+    calls = []
+    geometric_mean = sim.geometric_mean
+    monkeypatch.setattr(
+        sim, "geometric_mean", lambda x: calls.append(x) or geometric_mean(x)
+    )
+
+    # the rescaled seed is far above N * geometric_mean(xp), so the clamp is
+    # not needed:
+    _move(c, [10**15] * 3)
+    assert c.D() == _cold_D(c)
+    assert calls == [c.xp()]  # <----------------- only by the cold solve.
+
+
+@given(
+    state=curve,
+    A=st.integers(min_value=MIN_A, max_value=MAX_A),
+    gamma=st.integers(min_value=MIN_GAMMA, max_value=MAX_GAMMA),
+    x=st.lists(
+        st.integers(min_value=10**17, max_value=10**19),
+        min_size=3,
+        max_size=3,
+    ),
+)
+@settings(max_examples=MAX_SAMPLES, deadline=None)
+def test_D_cache_invalidated(state, A, gamma, x):
+    c = _curve(*state)
+    D = _D(c)
+    assert c.D() == D  # cached
+
+    for attr, value in (("A", A), ("gamma", gamma)):
+        setattr(c, attr, value)
+        _D(c)
+        assert c.D() == _cold_D(c)
+
+    # in place, as the traders do, and by more than a warm start takes:
+    for k in range(3):
+        c.x[k] = c.x[k] * x[k] // 10**18
+    _D(c)
+    assert c.D() == _cold_D(c)
+
+    c.p[1] = c.p[1] * 2
+    _D(c)
+    assert c.D() == _cold_D(c)
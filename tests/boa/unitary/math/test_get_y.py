@@ -6,6 +6,7 @@ import pytest
 from hypothesis import given, note, settings
 from hypothesis import strategies as st
 
+from tests.boa.utils import simulation_int_many as sim
 from tests.boa.utils.simulation_ma_4 import inv_target_decimal as inv_target
 
 N_COINS = 3
@@ -84,3 +85,28 @@ def test_get_y(math_unoptimized, math_optimized, A, D, xD, yD, zD, gamma, j):
     ) or abs(calculate_F_by_y0(result_get_y)) <= abs(
         calculate_F_by_y0(result_original)
     )
+
+
+@given(
+    A=st.integers(min_value=MIN_A, max_value=MAX_A),
+    D=st.integers(
+        min_value=10**18, max_value=10**14 * 10**18
+    ),  # 1 USD to 100T USD
+    xD=st.integers(min_value=int(1.001e16), max_value=int(0.999e20)),
+    yD=st.integers(min_value=int(1.001e16), max_value=int(0.999e20)),
+    zD=st.integers(min_value=int(1.001e16), max_value=int(0.999e20)),
+    gamma=st.integers(min_value=MIN_GAMMA, max_value=MAX_GAMMA),
+    j=st.integers(min_value=0, max_value=2),
+)
+@settings(max_examples=1000, deadline=None)
+def test_get_y_python(math_optimized, A, D, xD, yD, zD, gamma, j):
+    X = [D * xD // 10**18, D * yD // 10**18, D * zD // 10**18]
+
+    try:
+        expected = list(math_optimized.get_y(A, gamma, X, D, j))
+    except Exception:
+        with pytest.raises(ValueError):
+            sim.get_y(A, gamma, X, D, j)
+        return
+
+    assert sim.get_y(A, gamma, X, D, j) == expected
@@ -0,0 +1,73 @@
+import pytest
+from hypothesis import example, given, settings
+from hypothesis import strategies as st
+
+np = pytest.importorskip("numpy")
+
+from tests.boa.utils import math_float  # noqa: E402
+
+MAX_SAMPLES = 200
+
+A_MUL = 10000 * 3**3
+MIN_A = int(0.01 * A_MUL)
+MAX_A = 1000 * A_MUL
+
+# gamma from 1e-8 up to 0.05
+MIN_GAMMA = 10**10
+MAX_GAMMA = 5 * 10**16
+
+
+@given(
+    A=st.integers(min_value=MIN_A, max_value=MAX_A),
+    gamma=st.integers(min_value=MIN_GAMMA, max_value=MAX_GAMMA),
+    x=st.lists(
+        st.integers(min_value=10**18, max_value=10**9 * 10**18),
+        min_size=3,
+        max_size=3,
+    ),
+    i=st.integers(min_value=0, max_value=2),
+)
+@example(A=3603632, gamma=28543911104, x=[10**18] * 3, i=0)  # K0 = 1
+@settings(max_examples=MAX_SAMPLES, deadline=None)
+def test_matches_contract(math_optimized, A, gamma, x, i):
+    try:
+        D = math_optimized.newton_D(A, gamma, x)
+        p = math_optimized.get_p(x, D, [A, gamma])
+        y, K0 = math_optimized.get_y(A, gamma, x, D, i)
+    except Exception:
+        return
+
+    assert math_float.newton_D(A, gamma, x) == pytest.approx(D, rel=1e-14)
+    assert math_float.get_p(x, D, [A, gamma]) == pytest.approx(p, rel=1e-9)
+    # Next to equilibrium (K0 ~ 1) the contract's get_y is itself only good to
+    # ~1e-11, so y is checked to the contract's precision rather than the
+    # float's:
+    assert math_float.get_y(A, gamma, x, D, i)[0] == pytest.approx(
+        y, rel=1e-10
+    )
+
+
+def test_vectorized():
+    x = np.array(
+        [[10**24, 2 * 10**24, 3 * 10**24]] * 3, dtype=np.float64
+    )
+    x[1] *= 2
+    x[2, 0] /= 2
+    A = 135 * A_MUL
+    gamma = np.array([7 * 10**13, 10**16, 10**12], dtype=np.float64)
+
+    D = math_float.newton_D(A, gamma, x)
+    y, K0 = math_float.get_y(A, gamma, x, D, 0)
+    p = math_float.get_p(x, D, (A, gamma))
+
+    for n in range(3):
+        assert D[n] == math_float.newton_D(A, gamma[n], x[n])
+        assert y[n] == math_float.get_y(A, gamma[n], x[n], D[n], 0)[0]
+        assert (p[n] == math_float.get_p(x[n], D[n], (A, gamma[n]))).all()
+    assert y == pytest.approx(x[:, 0], rel=1e-14)
+
+
+def test_unsafe_values_are_nan():
+    x = [10**18, 10**18, 10**24]
+    assert np.isnan(math_float.get_y(MIN_A, MIN_GAMMA, x, 10**21, 2)[0])
+    assert np.isnan(math_float.get_y(MIN_A - 1, MIN_GAMMA, x, 10**24, 0)[0])
@@ -0,0 +1,240 @@
+import json
+import os
+
+import pytest
+
+from tests.boa.utils import simulation_ma_4 as sim
+
+D = 10**18
+PRICE = 0.05  # coin 1 in coin 0
+
+
+def _trader():
+    # the pool of simulation_ma_4's __main__, balanced at D = 1e18
+    return sim.Trader(
+        100,
+        1.5e-4,
+        D,
+        2,
+        PRICE,
+        mid_fee=0.7e-3,
+        out_fee=4.0e-3,
+        price_threshold=0.004,
+        fee_gamma=0.01,
+        log=False,
+    )
+
+
+def _candles(n):
+    # 5 minute candles swinging by 0.2% around PRICE
+    candles = []
+    for k in range(n):
+        close = PRICE * (1 + 0.002 * (-1) ** k)
+        candles.append(
+            {
+                "t": 1600000000 + 300 * k,
+                "open": PRICE,
+                "high": max(close, PRICE) * 1.001,
+                "low": min(close, PRICE) * 0.999,
+                "close": close,
+                "volume": 50.0,
+                "pair": (0, 1),
+            }
+        )
+    return candles
+
+
+def test_solve_balanced():
+    # The exact derivatives vanish at K0 == 1, which the solvers must survive
+    # by falling back to the old ones:
+    xp = [D / 2, D / 2]
+    assert sim.solve_D(100, 1.5e-4, xp) == pytest.approx(D, rel=1e-12)
+    assert sim.solve_x(100, 1.5e-4, xp, D, 1) == pytest.approx(
+        D / 2, rel=1e-12
+    )
+
+
+def test_simulate_balanced():
+    trader = _trader()
+    trader.step_search = "doubling"
+    trader.simulate(_candles(8))
+
+    assert trader.total_vol > 0
+    assert trader.xcp_profit_real > 1
+
+
+def _dp(trader, step, sign=1):
+    # price move of a trade of `step` coin 0, without making it
+    x0 = trader.curve.x[:]
+    p0 = trader.spot_price(0, 1)
+    trader.curve.x[0] += sign * step
+    dp = abs(p0 - trader.spot_price(0, 1))
+    trader.curve.x = x0
+    return dp
+
+
+@pytest.mark.parametrize("sign", [1, -1])
+@pytest.mark.parametrize("candle", [0.7e-3, 1e-2, 0.1])
+def test_step_for_price_secant(candle, sign):
+    trader = _trader()
+    trader.buy(D // 100, 0, 1)  # off balance, where spot prices are analytic
+    x0 = trader.curve.x[:]
+    dp = candle * 0.002
+
+    step = trader.step_for_price(dp, sign)
+
+    assert trader.curve.x == x0
+    # up to the noise of D:
+    assert dp * (1 - 1e-6) <= _dp(trader, step, sign) <= 1.5 * dp
+    assert trader.slippage[-1] == pytest.approx(
+        step / _dp(trader, step, sign), rel=1e-6
+    )
+
+    # no worse than doubling, which overshoots by up to 2x:
+    trader.step_search = "doubling"
+    assert step <= trader.step_for_price(dp, sign)
+
+
+def _sqrt_law(trader):
+    # spot prices that move as sqrt(step), where the x*y=k guess of the
+    # secant search undershoots by 2x
+    x0 = trader.curve.x[0]
+    return lambda i, j: PRICE * (x0 / trader.curve.x[0]) ** 0.5
+
+
+def test_step_for_price_secant_exhausted():
+    trader = _trader()
+    trader.spot_price = _sqrt_law(trader)
+    dp = 1e-4
+
+    # a single iteration is short of dp, and returns the step it evaluated:
+    step = trader._step_for_price_secant(dp, max_iter=1)
+    dp_ = _dp(trader, step)
+
+    assert step == int(trader.curve.x[0] * dp / PRICE)
+    assert dp_ < dp
+    assert trader.slippage[-1] == step / dp_
+
+    # more iterations get there:
+    step = trader._step_for_price_secant(dp)
+    dp_ = _dp(trader, step)
+
+    assert dp <= dp_ <= 1.5 * dp
+    assert trader.slippage[-1] == step / dp_
+
+
+def test_step_for_price_balanced():
+    # spot prices fall back to finite differences at K0 == 1
+    trader = _trader()
+    assert trader.spot_price(0, 1) == trader.price(0, 1)
+    assert trader.step_for_price(1e-2 * 0.002) > 0
+
+
+def test_solver_calls():
+    curve = sim.Curve(100, 1.5e-4, D, 2, p=[10**18, int(PRICE * 10**18)])
+    assert curve.solver_calls == 0
+
+    curve.D()
+    curve.D()  # cached
+    assert curve.solver_calls == 1
+
+    curve.y(curve.x[0] + D // 1000, 0, 1)  # D of the same state
+    assert curve.solver_calls == 2
+
+    curve.x[0] += D // 1000
+    curve.y(curve.x[0] + D // 1000, 0, 1)  # and of a new one
+    assert curve.solver_calls == 4
+
+
+def test_solver_calls_per_candle():
+    trader = _trader()
+    solver_calls = trader.curve.solver_calls
+    trader.simulate(_candles(4))
+
+    assert len(trader.solver_calls_per_candle) == 4
+    assert all(n > 0 for n in trader.solver_calls_per_candle)
+    assert (
+        sum(trader.solver_calls_per_candle)
+        == trader.curve.solver_calls - solver_calls
+    )
+
+
+def _klines(candles):
+    # json dump of candles, as served by the klines api: open time in ms and
+    # prices and volume as strings
+    return [
+        [
+            d["t"] * 1000,
+            *(repr(d[k]) for k in ("open", "high", "low", "close", "volume")),
+            d["t"] * 1000 + 299999,  # close time, and more unused fields
+        ]
+        for d in candles
+    ]
+
+
+def _dump(path, candles):
+    with open(path, "w") as f:
+        json.dump(_klines(candles), f)
+
+
+def _assert_candles_equal(loaded, candles):
+    assert len(loaded) == len(candles)
+    for d, expected in zip(loaded, candles):
+        for k in ("t", "open", "high", "low", "close", "volume"):
+            assert d[k] == expected[k]
+        assert tuple(d["pair"]) == expected["pair"]
+
+
+def test_candle_store_round_trip(tmp_path):
+    candles = _candles(10)
+    other = [dict(d, t=d["t"] + 60, pair=(0, 2)) for d in _candles(5)]
+    _dump(tmp_path / "ethbtc.json", candles)
+    _dump(tmp_path / "ethusd.json", other)
+
+    path = str(tmp_path / "candles.npy")
+    sources = {
+        (0, 1): str(tmp_path / "ethbtc.json"),
+        (0, 2): str(tmp_path / "ethusd.json"),
+    }
+    sim.convert_candles(sources, path)
+
+    # merged and sorted by time:
+    merged = sorted(candles + other, key=lambda d: d["t"])
+    _assert_candles_equal(
+        list(sim.iter_candles(sim.load_candles(path=path))), merged
+    )
+    _assert_candles_equal(
+        list(sim.iter_candles(sim.load_candles(path=path), [(0, 1)])), candles
+    )
+
+    # start <= t < end:
+    start, end = candles[2]["t"], candles[7]["t"]
+    _assert_candles_equal(
+        list(sim.load_candles(start, end, path)),
+        [d for d in merged if start <= d["t"] < end],
+    )
+
+
+def test_candle_store_rebuild(tmp_path):
+    path = str(tmp_path / "candles.npy")
+    sources = {(0, 1): str(tmp_path / "ethbtc.json")}
+    _dump(sources[0, 1], _candles(4))
+
+    assert sim.candles_stale(sources, path)  # no store yet
+    sim.update_candles(sources, path)
+    assert not sim.candles_stale(sources, path)
+    _assert_candles_equal(sim.load_candles(path=path), _candles(4))
+
+    # the dump gets more candles after the store was built:
+    _dump(sources[0, 1], _candles(6))
+    mtime = os.path.getmtime(sources[0, 1])
+    os.utime(path, (mtime - 1, mtime - 1))  # <----- older, whatever the clock
+
+    assert sim.candles_stale(sources, path)
+    sim.update_candles(sources, path)
+    assert not sim.candles_stale(sources, path)
+    _assert_candles_equal(sim.load_candles(path=path), _candles(6))
+
+    # without its dump, a store is used as it is:
+    os.remove(sources[0, 1])
+    assert not sim.candles_stale(sources, path)
@@ -0,0 +1,79 @@
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from tests.boa.utils import simulation_int_many as sim
+
+np = pytest.importorskip("numpy")
+
+MAX_SAMPLES = 50
+BATCH_SIZE = 20
+
+A_MUL = 10000 * 3**3
+MIN_A = int(0.01 * A_MUL)
+MAX_A = 1000 * A_MUL
+
+# gamma from 1e-8 up to 0.05
+MIN_GAMMA = 10**10
+MAX_GAMMA = 5 * 10**16
+
+state = st.tuples(
+    st.integers(min_value=MIN_A, max_value=MAX_A),
+    st.integers(min_value=MIN_GAMMA, max_value=MAX_GAMMA),
+    st.integers(min_value=10**18, max_value=10**14 * 10**18),
+    st.lists(
+        st.integers(min_value=int(1.001e16), max_value=int(0.999e20)),
+        min_size=3,
+        max_size=3,
+    ),
+)
+
+
+def _solve_scalar(states, i):
+    # Only keep states the scalar solvers can handle. solve_y_newton_batch
+    # mirrors newton_y, not the analytical get_y behind solve_x
+    out = []
+    for A, gamma, D, xD in states:
+        x = [D * _xD // 10**18 for _xD in xD]
+        try:
+            D = sim.solve_D(A, gamma, x)
+            y = sim.newton_y(A, gamma, x, D, i)
+        except Exception:
+            continue
+        out.append((A, gamma, x, D, y))
+    return out
+
+
+@given(
+    states=st.lists(state, min_size=1, max_size=BATCH_SIZE),
+    i=st.integers(min_value=0, max_value=2),
+)
+@settings(max_examples=MAX_SAMPLES, deadline=None)
+def test_batch_matches_scalar(states, i):
+    solved = _solve_scalar(states, i)
+    if not solved:
+        return
+
+    A, gamma, x, D, y = (list(col) for col in zip(*solved))
+
+    assert list(sim.solve_D_batch(A, gamma, x)) == D
+    assert list(sim.solve_y_newton_batch(A, gamma, x, D, i)) == y
+
+
+@given(
+    states=st.lists(state, min_size=1, max_size=BATCH_SIZE),
+    i=st.integers(min_value=0, max_value=2),
+)
+@settings(max_examples=MAX_SAMPLES, deadline=None)
+def test_batch_float(states, i):
+    solved = _solve_scalar(states, i)
+    if not solved:
+        return
+
+    A, gamma, x, D, y = (list(col) for col in zip(*solved))
+
+    D_float = sim.solve_D_batch(A, gamma, x, dtype=np.float64)
+    y_float = sim.solve_y_newton_batch(A, gamma, x, D, i, dtype=np.float64)
+
+    assert np.allclose(D_float, np.array(D, dtype=np.float64), rtol=1e-12)
+    assert np.allclose(y_float, np.array(y, dtype=np.float64), rtol=1e-12)
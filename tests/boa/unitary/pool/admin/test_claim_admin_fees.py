@@ -0,0 +1,77 @@
+import boa
+import pytest
+
+from tests.boa.utils.tokens import mint_for_testing
+
+
+@pytest.fixture(scope="module")
+def profitable_swap(swap_with_deposit, coins, user):
+    # trade back and forth so that the pool makes a profit from fees:
+    for coin in coins:
+        mint_for_testing(coin, user, 10**30)
+
+    with boa.env.prank(user):
+        for k in range(6):
+            i, j = k % 3, (k + 1) % 3
+            amount = swap_with_deposit.balances(i) // 20
+            swap_with_deposit.exchange(i, j, amount, 0)
+
+    boa.env.time_travel(86400)
+    assert swap_with_deposit.xcp_profit() > swap_with_deposit.xcp_profit_a()
+    return swap_with_deposit
+
+
+def _fee_receiver_balances(coins, fee_receiver):
+    return [coin.balanceOf(fee_receiver) for coin in coins]
+
+
+def test_claim_admin_fees(profitable_swap, coins, fee_receiver, alice):
+    before = _fee_receiver_balances(coins, fee_receiver)
+    virtual_price = profitable_swap.get_virtual_price()
+
+    with boa.env.prank(alice):  # <--------------------- callable by anyone.
+        profitable_swap.claim_admin_fees()
+
+    for b, after in zip(before, _fee_receiver_balances(coins, fee_receiver)):
+        assert after > b
+    for k, coin in enumerate(coins):
+        assert coin.balanceOf(profitable_swap) == profitable_swap.balances(k)
+
+    assert profitable_swap.xcp_profit_a() == profitable_swap.xcp_profit()
+    assert 10**18 < profitable_swap.get_virtual_price() < virtual_price
+
+
+def test_claim_admin_fees_skipped(profitable_swap, coins, fee_receiver):
+    profitable_swap.claim_admin_fees()
+    claimed = _fee_receiver_balances(coins, fee_receiver)
+    xcp_profit_a = profitable_swap.xcp_profit_a()
+
+    # fees were just claimed:
+    boa.env.time_travel(86400 - 1)
+    profitable_swap.claim_admin_fees()
+    assert _fee_receiver_balances(coins, fee_receiver) == claimed
+
+    # no profit since the last claim:
+    boa.env.time_travel(1)
+    profitable_swap.claim_admin_fees()
+    assert _fee_receiver_balances(coins, fee_receiver) == claimed
+    assert profitable_swap.xcp_profit_a() == xcp_profit_a
+
+
+def test_claim_admin_fees_ramp(
+    profitable_swap, coins, fee_receiver, factory_admin
+):
+    with boa.env.prank(factory_admin):
+        profitable_swap.ramp_A_gamma(
+            profitable_swap.A() + 1,
+            profitable_swap.gamma(),
+            boa.env.vm.state.timestamp + 86400,
+        )
+
+    before = _fee_receiver_balances(coins, fee_receiver)
+    profitable_swap.claim_admin_fees()
+    assert _fee_receiver_balances(coins, fee_receiver) == before
+
+    boa.env.time_travel(86400)
+    profitable_swap.claim_admin_fees()
+    assert _fee_receiver_balances(coins, fee_receiver) != before
@@ -69,7 +69,7 @@ class StatefulSimulation(StatefulBase):
 
         # Adjust virtual prices
         self.trader.xcp_profit = self.swap.xcp_profit()
-        self.trader.xcp_profit_real = self.swap._storage.virtual_price.get()
+        self.trader.xcp_profit_real = self.swap.virtual_price()
         self.trader.t = boa.env.vm.state.timestamp
 
     @rule(
@@ -245,7 +245,7 @@ def test_price_scale_change(swap_with_deposit, i, j, coins, user):
         assert approx(adjustment, price_diff, 0.01)
 
     assert approx(
-        swap_with_deposit._storage.virtual_price.get(),
+        swap_with_deposit.virtual_price(),
         swap_with_deposit.get_virtual_price(),
         1e-10,
     )
@@ -263,3 +263,32 @@ def test_lp_price(swap_with_deposit):
     )
     naive_price = tvl * 10**18 // swap_with_deposit.totalSupply()
     assert abs(swap_with_deposit.lp_price() / naive_price - 1) < 2e-3
+
+
+@given(
+    amount=strategy(
+        "uint256", min_value=10**10, max_value=2 * 10**6 * 10**18
+    ),
+    i=strategy("uint8", min_value=0, max_value=2),
+    j=strategy("uint8", min_value=0, max_value=2),
+    t=strategy("uint256", min_value=0, max_value=10 * 86400),
+)
+@settings(**SETTINGS)
+def test_oracles(swap_with_deposit, coins, user, amount, i, j, t):
+    if i == j:
+        return
+
+    amount = amount * 10**18 // INITIAL_PRICES[i]
+    mint_for_testing(coins[i], user, amount)
+
+    with boa.env.prank(user):
+        swap_with_deposit.exchange(i, j, amount, 0)
+
+    boa.env.time_travel(t)
+
+    oracles = swap_with_deposit.oracles()
+    for k in range(2):
+        assert oracles[0][k] == swap_with_deposit.price_oracle(k)
+        assert oracles[1][k] == swap_with_deposit.price_scale(k)
+        assert oracles[2][k] == swap_with_deposit.last_prices(k)
+    assert oracles[3] == swap_with_deposit.xcp_oracle()
@@ -0,0 +1,149 @@
+import boa
+import pytest
+
+from scripts.find_route import find_route
+from tests.boa.utils.tokens import mint_for_testing
+
+
+@pytest.fixture(scope="module")
+def routes(route_pools, coins, tricrypto_coins, stablecoins):
+    usd, btc, weth = coins
+    usdt, wbtc, _ = tricrypto_coins
+    dai = stablecoins[0]
+    pool_0, pool_1, pool_2 = route_pools
+    return {
+        # coin in, coin out, pools, indices:
+        "two hops": (usd, wbtc, [pool_0, pool_1], [[0, 2], [2, 1]]),
+        "three hops": (
+            dai,
+            btc,
+            [pool_2, pool_1, pool_0],
+            [[0, 2], [0, 2], [2, 1]],
+        ),
+    }
+
+
+def _quote(pools, indices, dx):
+    for pool, (i, j) in zip(pools, indices):
+        dx = pool.get_dy(i, j, dx)
+    return dx
+
+
+@pytest.mark.parametrize("route", ["two hops", "three hops"])
+def test_exchange(router, routes, route_pools, user, route):
+    coin_in, coin_out, pools, indices = routes[route]
+    dx = 1000 * 10 ** coin_in.decimals()
+    mint_for_testing(coin_in, user, dx)
+
+    expected = _quote(pools, indices, dx)
+    balance_in = coin_in.balanceOf(user)
+    balance_out = coin_out.balanceOf(user)
+
+    with boa.env.prank(user):
+        coin_in.approve(router, dx)
+        dy = router.exchange([p.address for p in pools], indices, dx, expected)
+
+    assert dy == expected
+    assert coin_in.balanceOf(user) == balance_in - dx
+    assert coin_out.balanceOf(user) == balance_out + dy
+
+    # every pool holds exactly what it accounts for, and the router nothing:
+    for pool in route_pools:
+        for k in range(3):
+            coin = boa.env.lookup_contract(pool.coins(k))
+            assert coin.balanceOf(pool) == pool.balances(k)
+            assert coin.balanceOf(router) == 0
+
+
+def test_exchange_receiver(router, routes, user, alice):
+    coin_in, coin_out, pools, indices = routes["two hops"]
+    dx = 1000 * 10 ** coin_in.decimals()
+    mint_for_testing(coin_in, user, dx)
+
+    balance_out = coin_out.balanceOf(user)
+    with boa.env.prank(user):
+        coin_in.approve(router, dx)
+        dy = router.exchange([p.address for p in pools], indices, dx, 0, alice)
+
+    assert coin_out.balanceOf(alice) == dy
+    assert coin_out.balanceOf(user) == balance_out
+
+
+def test_exchange_slippage(router, routes, user):
+    coin_in, _, pools, indices = routes["three hops"]
+    dx = 1000 * 10 ** coin_in.decimals()
+    mint_for_testing(coin_in, user, dx)
+
+    expected = _quote(pools, indices, dx)
+    with boa.env.prank(user):
+        coin_in.approve(router, dx)
+        with boa.reverts("Slippage"):
+            router.exchange(
+                [p.address for p in pools], indices, dx, expected + 1
+            )
+
+
+def test_exchange_bad_route(router, routes, user):
+    # pool 0 sends btc into pool 1, which has none:
+    coin_in, _, pools, _ = routes["two hops"]
+    dx = 1000 * 10 ** coin_in.decimals()
+    mint_for_testing(coin_in, user, dx)
+
+    with boa.env.prank(user):
+        coin_in.approve(router, dx)
+        with boa.reverts():
+            router.exchange(
+                [p.address for p in pools], [[0, 1], [1, 0]], dx, 0
+            )
+        with boa.reverts(dev="bad route"):
+            router.exchange([pools[0].address], [], dx, 0)
+
+
+@pytest.mark.parametrize("route", ["two hops", "three hops"])
+def test_find_route(
+    router,
+    routes,
+    tricrypto_factory,
+    amm_interface,
+    coins,
+    tricrypto_coins,
+    user,
+    route,
+):
+    coin_in, coin_out, pools, indices = routes[route]
+    dx = 1000 * 10 ** coin_in.decimals()
+    connectors = [coins[2], tricrypto_coins[0]]  # <--------- weth and usdt.
+
+    found = find_route(
+        tricrypto_factory,
+        amm_interface,
+        coin_in.address,
+        coin_out.address,
+        dx,
+        [coin.address for coin in connectors],
+    )
+
+    assert found.pools == [p.address for p in pools]
+    assert found.indices == indices
+    assert found.dy == _quote(pools, indices, dx)
+
+    mint_for_testing(coin_in, user, dx)
+    with boa.env.prank(user):
+        coin_in.approve(router, dx)
+        assert router.exchange(found.pools, found.indices, dx, 0) == found.dy
+
+
+def test_find_route_not_connected(
+    routes, tricrypto_factory, amm_interface, coins
+):
+    coin_in, coin_out, _, _ = routes["three hops"]
+    args = (
+        tricrypto_factory,
+        amm_interface,
+        coin_in.address,
+        coin_out.address,
+        10**18,
+    )
+
+    assert find_route(*args) is None  # <------------------ no connectors.
+    assert find_route(*args, [coins[2].address], max_hops=3) is None
@@ -1,3 +1,5 @@
+import boa
+import pytest
 from boa.test import strategy
 from hypothesis import given, settings
 
@@ -29,3 +31,9 @@ def test_pack_unpack_2_integers(swap, val):
 
     assert unpacked[0] == val[0]
     assert unpacked[1] == val[1]
+
+
+@pytest.mark.parametrize("val", [[2**128, 0], [0, 2**128], [2**255, 1]])
+def test_pack_2_integers_too_large(swap, val):
+    with boa.reverts(dev="value too large to pack"):
+        swap.internal._pack_2(val[0], val[1])
@@ -0,0 +1,120 @@
+import json
+from math import log
+
+import pytest
+
+from scripts.experiments import sweep
+
+A = 3**3 * 10000 * 100
+GAMMA = 10**16 // 2
+D = 10**6 * 10**18
+
+
+def _candles():
+    # an hour of 0.01 ETH/BTC swinging by 1% around its open
+    return [
+        {
+            "t": 1600000000 + 60 * k,
+            "open": 0.01,
+            "high": 0.0101,
+            "low": 0.0099,
+            "close": 0.0101 if k % 2 else 0.0099,
+            "volume": 10.0,
+            "pair": (0, 1),
+        }
+        for k in range(60)
+    ]
+
+
+def _records(out):
+    records = []
+    with open(out, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+    return records
+
+
+def test_grid_samples():
+    samples = list(sweep.grid_samples({"gamma": [1, 2, 3], "A": [4, 5]}))
+
+    assert len(samples) == 6
+    assert {(s["A"], s["gamma"]) for s in samples} == {
+        (A, gamma) for A in [4, 5] for gamma in [1, 2, 3]
+    }
+
+
+@pytest.mark.parametrize("n", [1, 7, 50])
+def test_latin_hypercube_samples(n):
+    ranges = {
+        "A": [10, 10**6, "log"],
+        "gamma": [1e-8, 1e-2, "log"],
+        "mid_fee": [0.0, 0.01],
+    }
+    samples = list(sweep.latin_hypercube_samples(ranges, n, seed=1))
+
+    assert samples == list(sweep.latin_hypercube_samples(ranges, n, seed=1))
+    assert all(isinstance(s["A"], int) and 10 <= s["A"] for s in samples)
+
+    # one sample in each of the n strata of every parameter:
+    strata = [int(s["mid_fee"] / 0.01 * n) for s in samples]
+    assert sorted(strata) == list(range(n))
+    strata = [int(log(s["gamma"] / 1e-8) / log(1e6) * n) for s in samples]
+    assert sorted(strata) == list(range(n))
+
+
+def test_check_params():
+    sweep.check_params("int_many", [{"A": A, "ma_time": 866}])
+    sweep.check_params("ma_4", [{"A": 100, "adjustment_step": 0.001}])
+
+    with pytest.raises(ValueError, match="ma_4 does not take ma_time"):
+        sweep.check_params("ma_4", [{"A": 100}, {"A": 100, "ma_time": 866}])
+    with pytest.raises(ValueError, match="Unknown backend"):
+        sweep.check_params("ma_5", [{"A": 100}])
+
+
+def test_sweep_resume(tmp_path, monkeypatch):
+    out = str(tmp_path / "runs.jsonl")
+    samples = [
+        {"A": A, "gamma": GAMMA, "D": D, "mid_fee": fee}
+        for fee in [0.0005, 0.001, 0.002]
+    ]
+
+    # the runs fail once, say on a worker that ran out of memory:
+    def fail(params, candles):
+        raise MemoryError
+
+    monkeypatch.setitem(sweep.BACKENDS, "int_many", fail)
+    assert sweep.sweep("int_many", samples, out, _candles, workers=2) == 3
+    assert all("error" in r for r in _records(out))
+
+    # ... and are retried, without p0, on resume:
+    monkeypatch.undo()
+    with open(out, "a") as f:
+        f.write('{"params": {"A": ')  # <-- an interrupted write
+
+    assert sweep.sweep("int_many", samples, out, _candles, workers=2) == 3
+    results = _records(out)[3:]
+    assert sorted(sweep.run_key(r["params"]) for r in results) == sorted(
+        sweep.run_key(p) for p in samples
+    )
+    for r in results:
+        assert "error" not in r, r["error"]
+        assert r["xcp_profit"] >= 1 and r["volume"] > 0
+
+    assert sweep.sweep("int_many", samples, out, _candles, workers=2) == 0
+
+
+def test_run_ma_4():
+    # starts balanced at the first close, where K0 == 1
+    params = {
+        "A": 100,
+        "gamma": 1.5e-4,
+        "D": 10**18,
+        "adjustment_step": 1e-3,
+    }
+    result = sweep.run_ma_4(params, _candles())
+
+    assert result["xcp_profit_real"] >= 1 and result["volume"] > 0
@@ -2,6 +2,8 @@ import pytest
 from boa.test import strategy
 from hypothesis import given, settings
 
+from tests.boa.fixtures.pool import INITIAL_PRICES
+
 SETTINGS = {"max_examples": 100, "deadline": None}
 
 
@@ -26,3 +28,24 @@ def test_get_dx(i, j, amount_in, yuge_swap):
 
     # not accurate, but close enough:
     assert amount_in == pytest.approx(approx_in, 1e-2)
+
+
+@given(
+    amount_out=strategy("uint256", min_value=10**19, max_value=10**27),
+    i=strategy("uint", min_value=0, max_value=2),
+    j=strategy("uint", min_value=0, max_value=2),
+)
+@settings(**SETTINGS)
+def test_get_dy_get_dx(i, j, amount_out, yuge_swap):
+
+    if i == j:
+        return
+
+    # amount_out is in USD:
+    amount_out = amount_out * 10**18 // INITIAL_PRICES[j]
+    amount_in = yuge_swap.get_dx(i, j, amount_out)
+
+    # small trades are off by the rounding of get_y, about 1e-8 USD:
+    assert yuge_swap.get_dy(i, j, amount_in) == pytest.approx(
+        amount_out, rel=1e-12, abs=10**29 // INITIAL_PRICES[j]
+    )
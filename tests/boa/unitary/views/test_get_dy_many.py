@@ -0,0 +1,79 @@
+import boa
+from boa.test import strategy
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from tests.boa.fixtures.pool import INITIAL_PRICES
+
+SETTINGS = {"max_examples": 50, "deadline": None}
+NUM_QUOTES = 32
+
+quote = st.tuples(
+    strategy("uint", min_value=0, max_value=2),
+    strategy("uint", min_value=0, max_value=2),
+    strategy("uint256", min_value=10**16, max_value=10**6 * 10**18),
+).filter(lambda q: q[0] != q[1])
+
+
+def _get_dy_many(views, swap, quotes):
+    i, j, dx = (list(col) for col in zip(*quotes))
+    return views.get_dy_many(i, j, dx, swap)
+
+
+@given(quotes=st.lists(quote, min_size=1, max_size=NUM_QUOTES))
+@settings(**SETTINGS)
+def test_get_dy_many(views_contract, swap_with_deposit, quotes):
+
+    # dx is sampled in USD, all coins have 18 decimals:
+    quotes = [
+        (i, j, dx * 10**18 // INITIAL_PRICES[i]) for i, j, dx in quotes
+    ]
+
+    expected = [
+        views_contract.get_dy(i, j, dx, swap_with_deposit)
+        for i, j, dx in quotes
+    ]
+    assert _get_dy_many(views_contract, swap_with_deposit, quotes) == expected
+
+
+def test_get_dy_many_empty(views_contract, swap_with_deposit):
+    assert views_contract.get_dy_many([], [], [], swap_with_deposit) == []
+
+
+def test_get_dy_many_reverts(views_contract, swap_with_deposit):
+
+    with boa.reverts("length mismatch"):
+        views_contract.get_dy_many(
+            [0, 1], [1, 2], [10**18], swap_with_deposit
+        )
+
+    with boa.reverts("coin index out of range"):
+        views_contract.get_dy_many(
+            [0, 1], [1, 1], [10**18, 10**18], swap_with_deposit
+        )
+
+
+def test_get_dy_many_gas(views_contract, swap_with_deposit):
+
+    quotes = [
+        (i, j, 10**39 * 2**k // INITIAL_PRICES[i])  # $1000 * 2**k
+        for k in range(NUM_QUOTES // 6 + 1)
+        for i in range(3)
+        for j in range(3)
+        if i != j
+    ][:NUM_QUOTES]
+
+    gas_single = 0
+    for i, j, dx in quotes:
+        views_contract.get_dy(i, j, dx, swap_with_deposit)
+        gas_single += views_contract._computation.get_gas_used()
+
+    _get_dy_many(views_contract, swap_with_deposit, quotes)
+    gas_many = views_contract._computation.get_gas_used()
+
+    print(
+        f"{len(quotes)} quotes, gas per quote: "
+        f"get_dy {gas_single // len(quotes)}, "
+        f"get_dy_many {gas_many // len(quotes)}"
+    )
+    assert gas_many < gas_single
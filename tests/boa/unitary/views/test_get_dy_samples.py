@@ -0,0 +1,111 @@
+import boa
+import pytest
+from boa.test import strategy
+from hypothesis import given, settings
+
+from tests.boa.fixtures.pool import INITIAL_PRICES
+
+SETTINGS = {"max_examples": 30, "deadline": None}
+NUM_SAMPLES = 20
+
+
+@given(
+    i=strategy("uint", min_value=0, max_value=2),
+    j=strategy("uint", min_value=0, max_value=2),
+    dx_usd=strategy("uint256", min_value=10**16, max_value=10**20),
+    ratio=strategy("uint256", min_value=10**18 + 1, max_value=2 * 10**18),
+    n_samples=strategy("uint", min_value=0, max_value=NUM_SAMPLES),
+)
+@settings(**SETTINGS)
+def test_get_dy_samples(
+    views_contract, swap_with_deposit, i, j, dx_usd, ratio, n_samples
+):
+    if i == j:
+        return
+
+    dx = dx_usd * 10**18 // INITIAL_PRICES[i]
+    samples = views_contract.get_dy_samples(
+        i, j, dx, ratio, n_samples, swap_with_deposit
+    )
+    assert len(samples) == n_samples
+
+    for _dx, dy, fee in samples:
+        assert _dx == dx
+        assert dy == views_contract.get_dy(i, j, dx, swap_with_deposit)
+        assert fee == views_contract.calc_fee_get_dy(
+            i, j, dx, swap_with_deposit
+        )
+        dx = dx * ratio // 10**18
+
+
+def test_get_dy_samples_reverts(views_contract, swap_with_deposit):
+
+    with boa.reverts("too many samples"):
+        views_contract.get_dy_samples(
+            0, 1, 10**18, 2 * 10**18, 65, swap_with_deposit
+        )
+
+    with boa.reverts("coin index out of range"):
+        views_contract.get_dy_samples(
+            1, 1, 10**18, 2 * 10**18, 1, swap_with_deposit
+        )
+
+    with boa.reverts("ratio too small"):
+        views_contract.get_dy_samples(
+            0, 1, 10**18, 10**18, 1, swap_with_deposit
+        )
+
+
+@pytest.mark.parametrize("i,j", [(0, 1), (1, 0), (2, 0), (1, 2)])
+def test_get_dy_samples_out_of_range(views_contract, swap_with_deposit, i, j):
+    # $10 doubling 64 times ends far beyond what the pool can quote:
+    dx = 10**19 * 10**18 // INITIAL_PRICES[i]
+    samples = views_contract.get_dy_samples(
+        i, j, dx, 2 * 10**18, 64, swap_with_deposit
+    )
+    assert 0 < len(samples) < 64
+
+    for _dx, dy, fee in samples:
+        assert _dx == dx
+        assert dy == views_contract.get_dy(i, j, dx, swap_with_deposit)
+        dx = dx * 2
+
+    # the first sample left out:
+    with boa.reverts():
+        views_contract.get_dy(i, j, dx, swap_with_deposit)
+
+
+def test_get_dy_samples_overflow(views_contract, swap_with_deposit):
+    dx = 10**18
+    ratio = 2**256 // dx + 1  # dx * ratio overflows
+
+    samples = views_contract.get_dy_samples(
+        0, 1, dx, ratio, 2, swap_with_deposit
+    )
+    assert len(samples) == 1
+    assert samples[0][1] == views_contract.get_dy(0, 1, dx, swap_with_deposit)
+
+
+def test_get_dy_samples_gas(views_contract, swap_with_deposit):
+
+    dx = 10**39 // INITIAL_PRICES[2]  # $10
+    ratio = 15 * 10**17
+
+    gas_single = 0
+    _dx = dx
+    for k in range(NUM_SAMPLES):
+        views_contract.get_dy(2, 1, _dx, swap_with_deposit)
+        gas_single += views_contract._computation.get_gas_used()
+        _dx = _dx * ratio // 10**18
+
+    views_contract.get_dy_samples(
+        2, 1, dx, ratio, NUM_SAMPLES, swap_with_deposit
+    )
+    gas_samples = views_contract._computation.get_gas_used()
+
+    print(
+        f"{NUM_SAMPLES} samples, gas per sample: "
+        f"get_dy {gas_single // NUM_SAMPLES}, "
+        f"get_dy_samples {gas_samples // NUM_SAMPLES}"
+    )
+    assert gas_samples < gas_single
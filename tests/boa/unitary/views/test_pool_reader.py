@@ -0,0 +1,138 @@
+import boa
+import pytest
+
+from tests.boa.fixtures.pool import INITIAL_PRICES, _crypto_swap_with_deposit
+from tests.boa.utils import compile_cache
+from tests.boa.utils.tokens import mint_for_testing
+
+N_POOLS = 10
+
+# PoolState fields in order, as (getter, args) on the pool:
+GETTERS = (
+    [("balances", (k,)) for k in range(3)]
+    + [("D", ())]
+    + [("totalSupply", ())]
+    + [("virtual_price", ())]
+    + [("xcp_profit", ())]
+    + [("xcp_profit_a", ())]
+    + [("price_scale", (k,)) for k in range(2)]
+    + [("price_oracle", (k,)) for k in range(2)]
+    + [("last_prices", (k,)) for k in range(2)]
+    + [
+        (getter, ())
+        for getter in (
+            "xcp_oracle",
+            "A",
+            "gamma",
+            "packed_fee_params",
+            "packed_rebalancing_params",
+            "last_timestamp",
+            "initial_A_gamma",
+            "initial_A_gamma_time",
+            "future_A_gamma",
+            "future_A_gamma_time",
+        )
+    ]
+)
+
+
+@pytest.fixture(scope="module")
+def pool_reader(deployer):
+    with boa.env.prank(deployer):
+        return compile_cache.load("contracts/main/CurveTricryptoPoolReader.vy")
+
+
+@pytest.fixture(scope="module")
+def pools(
+    swap_with_deposit, tricrypto_factory, amm_interface, coins, params, user
+):
+    pools = [swap_with_deposit]
+    for n in range(N_POOLS - 1):
+        with boa.env.prank(user):
+            pool = tricrypto_factory.deploy_pool(
+                f"Curve.fi USDC-BTC-ETH {n}",
+                f"USDCBTCETH{n}",
+                [coin.address for coin in coins],
+                coins[2],
+                0,
+                params["A"],
+                params["gamma"] + n,  # <--- every pool gets its own params
+                params["mid_fee"],
+                params["out_fee"],
+                params["fee_gamma"],
+                params["allowed_extra_profit"],
+                params["adjustment_step"],
+                params["ma_time"],
+                params["initial_prices"],
+            )
+        pools.append(
+            _crypto_swap_with_deposit(
+                coins, user, amm_interface.at(pool), INITIAL_PRICES
+            )
+        )
+
+    # trade in every pool so that the oracles move:
+    mint_for_testing(coins[0], user, 10**24)
+    boa.env.time_travel(600)
+    for pool in pools:
+        with boa.env.prank(user):
+            pool.exchange(0, 1, 10**22, 0)
+    boa.env.time_travel(600)
+
+    return pools
+
+
+def _flatten(state):
+    out = []
+    for value in state:
+        if isinstance(value, (list, tuple)):
+            out.extend(value)
+        else:
+            out.append(value)
+    return out
+
+
+def _get_state(pool):
+    return [getattr(pool, getter)(*args) for getter, args in GETTERS]
+
+
+def test_get_pool_state(pool_reader, swap_with_deposit):
+
+    state = _flatten(pool_reader.get_pool_state(swap_with_deposit))
+
+    assert state[0] == swap_with_deposit.address
+    assert state[1:] == _get_state(swap_with_deposit)
+
+
+def test_get_pool_state_many(pool_reader, pools):
+
+    states = pool_reader.get_pool_state_many([p.address for p in pools])
+
+    assert len(states) == N_POOLS
+    for pool, state in zip(pools, states):
+        state = _flatten(state)
+        assert state[0] == pool.address
+        assert state[1:] == _get_state(pool)
+
+    assert pool_reader.get_pool_state_many([]) == []
+
+
+def test_get_pool_state_many_gas(pool_reader, pools):
+
+    gas_getters = 0
+    for pool in pools:
+        for getter, args in GETTERS:
+            getattr(pool, getter)(*args)
+            gas_getters += pool._computation.get_gas_used()
+
+    pool_reader.get_pool_state_many([p.address for p in pools])
+    gas_reader = pool_reader._computation.get_gas_used()
+
+    calls = len(GETTERS) * N_POOLS
+    print(
+        f"{N_POOLS} pools: {calls} getter calls, {gas_getters} gas "
+        f"({gas_getters + calls * 21000} with 21000 per call) vs "
+        f"1 get_pool_state_many call, {gas_reader} gas "
+        f"({gas_reader + 21000} with 21000 per call)"
+    )
+    assert gas_reader < gas_getters + calls * 21000
@@ -0,0 +1,90 @@
+"""
+A boa environment running the Cancun opcodes vyper compiles for.
+
+The py-evm that titanoboa pins has no Cancun VM, and vyper's cancun output
+only differs from its shanghai output in three opcodes: TLOAD and TSTORE
+(EIP-1153) for the @nonreentrant lock, and MCOPY (EIP-5656) for memory
+copies. cancun_env() adds them to the Shanghai VM of a new boa.Env, with the
+gas costs of the EIPs:
+
+    with boa.swap_env(cancun_env()):
+        ...
+
+Transient storage is cleared at the end of every transaction (every call
+from an EOA), and writes are reverted along with the call that made them.
+If the installed py-evm has a Cancun VM, it is used as it is.
+"""
+import boa
+from eth._utils.numeric import ceil32
+from eth.vm.forks.byzantium.opcodes import ensure_no_static
+from eth.vm.opcode import Opcode
+
+TLOAD = 0x5C
+TSTORE = 0x5D
+MCOPY = 0x5E
+
+GAS_WARM_ACCESS = 100  # <----------------------- EIP-1153: TLOAD and TSTORE.
+GAS_VERY_LOW = 3
+GAS_COPY = 3  # <------------------------------------- per word, EIP-5656.
+
+
+def _transient(computation):
+    # (address, slot) -> value, of the current transaction:
+    return computation.state.__dict__.setdefault("_transient_storage", {})
+
+
+def tload(computation):
+    key = (computation.msg.storage_address, computation.stack_pop1_int())
+    computation.stack_push_int(_transient(computation).get(key, 0))
+
+
+def tstore(computation):
+    slot, value = computation.stack_pop_ints(2)
+    _transient(computation)[computation.msg.storage_address, slot] = value
+
+
+def mcopy(computation):
+    dst, src, size = computation.stack_pop_ints(3)
+
+    computation.extend_memory(max(dst, src), size)
+    computation.consume_gas(ceil32(size) // 32 * GAS_COPY, reason="MCOPY fee")
+
+    value = computation.memory_read_bytes(src, size)
+    computation.memory_write(dst, size, value)
+
+
+def cancun_env():
+    env = boa.Env()
+    base = env.vm.state.computation_class
+    if TSTORE in base.opcodes:
+        return env
+
+    class CancunComputation(base):
+        opcodes = {
+            **base.opcodes,
+            TLOAD: Opcode.as_opcode(tload, "TLOAD", GAS_WARM_ACCESS),
+            TSTORE: Opcode.as_opcode(
+                ensure_no_static(tstore), "TSTORE", GAS_WARM_ACCESS
+            ),
+            MCOPY: Opcode.as_opcode(mcopy, "MCOPY", GAS_VERY_LOW),
+        }
+
+        @classmethod
+        def apply_message(cls, state, message, transaction_context):
+            if message.depth == 0:
+                state._transient_storage = {}
+
+            snapshot = dict(state.__dict__.get("_transient_storage", {}))
+            computation = super().apply_message(
+                state, message, transaction_context
+            )
+            if computation.is_error:
+                state._transient_storage = snapshot
+
+            if message.depth == 0:
+                state._transient_storage = {}
+
+            return computation
+
+    env.vm.state.computation_class = CancunComputation
+    return env
@@ -0,0 +1,149 @@
+"""
+On-disk cache of compiled contracts for the boa fixtures.
+
+Drop-in replacements for boa.load / boa.loads / boa.load_partial that keep
+the compiler output (bytecode, abi, storage layout, source maps: the whole
+CompilerData) pickled under a hash of the vyper version, evm version,
+compiler args and source code. Editing a contract changes its hash, so stale
+entries are never used; they are simply left behind. Entries are written
+atomically, so concurrent xdist workers can share the cache.
+
+The cache lives in ~/.cache/tricrypto-ng/compiled unless the
+BOA_COMPILE_CACHE environment variable points elsewhere.
+
+Contracts are compiled for the evm version of their `# pragma evm-version`
+(which boa.load ignores), or for the `evm_version` they are loaded with:
+
+    pool = "contracts/main/CurveTricryptoOptimized.vy"
+    load_partial(pool, evm_version="cancun")
+"""
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+import vyper
+from boa.vyper.contract import VyperDeployer
+from vyper.codegen import core as codegen_core
+from vyper.evm.opcodes import anchor_evm_version
+from vyper.ir import compile_ir
+
+from scripts.deployment_utils import compiler_data as _compiler_data
+
+CACHE_DIR = Path(
+    os.environ.get("BOA_COMPILE_CACHE", "~/.cache/tricrypto-ng/compiled")
+).expanduser()
+
+FORMAT = 3  # bump when the layout of the cache entries changes
+
+# digest -> pickled (label counter, CompilerData, source map)
+_memory = {}
+
+
+class _Deployer(VyperDeployer):
+    # boa assembles the source map of a contract (for error messages) only
+    # when it needs it, for vyper's active evm version, which cannot assemble
+    # e.g. the TLOAD of a cancun contract. Contracts and blueprints get the
+    # source map assembled for their own evm version instead:
+    def __init__(self, compiler_data, source_map, filename=None):
+        super().__init__(compiler_data, filename=filename)
+        self.source_map = source_map
+
+    def deploy(self, *args, **kwargs):
+        contract = super().deploy(*args, **kwargs)
+        contract._source_map = self.source_map
+        contract.deployer = self
+        return contract
+
+    def deploy_as_blueprint(self, *args, **kwargs):
+        blueprint = super().deploy_as_blueprint(*args, **kwargs)
+        blueprint.deployer = self  # <------------ deploys pools from it.
+        return blueprint
+
+    def at(self, address):
+        contract = super().at(address)
+        contract._source_map = self.source_map
+        contract.deployer = self
+        return contract
+
+
+def _digest(source_code, name, compiler_args, evm_version):
+    preimage = json.dumps(
+        [
+            FORMAT,
+            vyper.__version__,
+            getattr(vyper, "__commit__", ""),
+            name,
+            evm_version,
+            sorted((compiler_args or {}).items()),
+            source_code,
+        ]
+    )
+    return hashlib.sha256(preimage.encode()).hexdigest()
+
+
+def _compile(source_code, name, compiler_args, evm_version):
+    # compiles the bytecode, so that it ends up in the pickle:
+    data = _compiler_data(
+        source_code, name, evm_version, **(compiler_args or {})
+    )
+    with anchor_evm_version(data.settings.evm_version):
+        _, source_map = compile_ir.assembly_to_evm(data.assembly_runtime)
+    # The IR carries labels numbered by vyper's global counter. Contracts
+    # compiled later (e.g. boa's wrappers for `contract.internal` calls, which
+    # are spliced into this contract's code) must not reuse them:
+    return pickle.dumps((codegen_core._label, data, source_map))
+
+
+def _load(source_code, name, compiler_args=None, evm_version=None):
+    digest = _digest(source_code, name, compiler_args, evm_version)
+
+    if digest not in _memory:
+        path = CACHE_DIR / f"{digest}.pickle"
+        try:
+            _memory[digest] = path.read_bytes()
+        except OSError:
+            _memory[digest] = _compile(
+                source_code, name, compiler_args, evm_version
+            )
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(_memory[digest])
+            os.replace(tmp, path)
+
+    # every deployer gets its own copy, as if freshly compiled:
+    label, data, source_map = pickle.loads(_memory[digest])
+    codegen_core._label = max(codegen_core._label, label)
+    return data, source_map
+
+
+def compiler_data(source_code, name, compiler_args=None, evm_version=None):
+    return _load(source_code, name, compiler_args, evm_version)[0]
+
+
+def loads_partial(
+    source_code, name=None, filename=None, compiler_args=None, evm_version=None
+):
+    name = name or "VyperContract"
+    data, source_map = _load(source_code, name, compiler_args, evm_version)
+    return _Deployer(data, source_map, filename=filename)
+
+
+def load_partial(filename, compiler_args=None, evm_version=None):
+    with open(filename) as f:
+        return loads_partial(
+            f.read(),
+            filename,
+            filename,
+            compiler_args=compiler_args,
+            evm_version=evm_version,
+        )
+
+
+def loads(source_code, *args, name=None, filename=None, **kwargs):
+    return loads_partial(source_code, name, filename).deploy(*args, **kwargs)
+
+
+def load(filename, *args, **kwargs):
+    return load_partial(filename).deploy(*args, **kwargs)
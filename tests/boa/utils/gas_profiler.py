@@ -0,0 +1,316 @@
+"""
+Call-tree gas profiler for vyper contracts running in boa.
+
+While profiling is enabled every opcode step of every computation records the
+gas it used. GasProfiler.record(contract) then walks the opcode trace of the
+contract's last call and attributes that gas to:
+
+- internal functions: vyper marks the JUMP into an internal function in the
+  source map, and the function returns to the JUMPDEST right after that JUMP,
+  so the internal call stack can be rebuilt from the trace alone;
+- external calls: child computations into contracts known to boa are walked
+  recursively (e.g. MATH.newton_D), anything else is a single leaf frame;
+- source lines of every contract that was walked.
+
+The collected profile can be written as folded stacks (one
+`frame;frame;frame gas` line per stack, the input format of flamegraph.pl,
+inferno and speedscope) and summarised as text tables.
+"""
+import contextlib
+from collections import Counter
+from pathlib import Path
+
+import boa
+from boa.vyper.ast_utils import ast_map_of, get_fn_ancestor_from_node
+from boa.vyper.contract import VyperContract
+from eth.vm.gas_meter import GasMeter
+from eth_utils import to_checksum_address
+from vyper import ast as vy_ast
+from vyper.ir import compile_ir
+
+JUMP = 0x56
+CALLS = (0xF1, 0xF2, 0xF4, 0xFA)  # CALL, CALLCODE, DELEGATECALL, STATICCALL
+
+
+class _StepGasMeter(GasMeter):
+    # gas used by each opcode step (the index into code._trace). A call step
+    # includes the gas used by the child computation.
+    def __init__(self, start_gas, *args, **kwargs):
+        super().__init__(start_gas, *args, **kwargs)
+        self._gas_of_step = {}
+
+    def _set_code(self, code):
+        self._code = code
+
+    def consume_gas(self, amount, reason):
+        super().consume_gas(amount, reason)
+        step = len(self._code._trace) - 1
+        self._gas_of_step[step] = self._gas_of_step.get(step, 0) + amount
+
+    def return_gas(self, amount):
+        super().return_gas(amount)
+        step = len(self._code._trace) - 1
+        self._gas_of_step[step] = self._gas_of_step.get(step, 0) - amount
+
+
+class _CodeInfo:
+    # static maps of a contract's runtime code, shared by all its deployments
+    def __init__(self, contract):
+        compiler_data = contract.compiler_data
+        _, source_map, symbols = compile_ir.assembly_to_evm_with_symbol_map(
+            compiler_data.assembly_runtime
+        )
+        fns = compiler_data.function_signatures
+
+        self.source_lines = compiler_data.source_code.splitlines()
+        self.pc_lineno = {
+            pc: pos[0] for pc, pos in source_map["pc_pos_map"].items() if pos
+        }
+        self.jumps_in = {
+            pc for pc, kind in source_map["pc_jump_map"].items() if kind == "i"
+        }
+
+        self.selectors = {}
+        for name, fn in fns.items():
+            if not fn.is_internal:
+                for method_id in fn.method_ids.values():
+                    self.selectors[method_id] = name
+
+        # pcs in the body of an external function, and the name of the
+        # function called by the expression at every pc (`Math(m).get_y()`):
+        ast_map = ast_map_of(compiler_data.vyper_module)
+        self.pc_external_fn = {}
+        self.pc_callee = {}
+        for pc, pos in source_map["pc_pos_map"].items():
+            node = ast_map.get(pos)
+            if node is None:
+                continue
+            fn = get_fn_ancestor_from_node(node)
+            if fn is not None and not fns[fn.name].is_internal:
+                self.pc_external_fn[pc] = fn.name
+            if not isinstance(node, vy_ast.Call):
+                node = node.get_ancestor(vy_ast.Call)
+            if node is not None and isinstance(node.func, vy_ast.Attribute):
+                self.pc_callee[pc] = node.func.attr
+
+        # entry pc of every internal function. labels look like
+        # `_sym_internal_{name}_{args}_runtime`; match the longest name:
+        internal = sorted(
+            (name for name, fn in fns.items() if fn.is_internal),
+            key=len,
+            reverse=True,
+        )
+        self.entries = {}
+        for label, pc in symbols.items():
+            if not label.startswith("_sym_internal_"):
+                continue
+            if not label.endswith("_runtime") or pc is None:
+                continue
+            for name in internal:
+                if label.startswith(f"_sym_internal_{name}_"):
+                    self.entries[pc] = name
+                    break
+
+
+class GasProfiler:
+    def __init__(self, labels=None):
+        """
+        labels: optional {address: name} used to name the frames of a
+        contract instead of its file name (e.g. {swap.MATH(): "MATH"}).
+        """
+        self.labels = {
+            to_checksum_address(a): name for a, name in (labels or {}).items()
+        }
+        self.stacks = Counter()  # (frame, ...) -> self gas
+        self.calls = Counter()  # frame -> number of calls
+        self.lines = Counter()  # (contract name, lineno) -> self gas
+        self._code_info = {}
+        self._source_lines = {}
+
+    @contextlib.contextmanager
+    def profile(self):
+        with boa.env.gas_meter_class(_StepGasMeter):
+            yield self
+
+    def record(self, contract, computation=None):
+        """
+        Add the last call of `contract` (or `computation`) to the profile.
+        The call must have run inside `profile()`.
+        """
+        if computation is None:
+            computation = contract._computation
+        assert isinstance(
+            computation._gas_meter, _StepGasMeter
+        ), "call was not made inside GasProfiler.profile()"
+
+        # the calldata of a transaction is bytes, but that of a child
+        # computation is a view of the caller's memory, which has moved on
+        # by the time it is profiled: only the former has a reliable selector
+        selector = int.from_bytes(computation.msg.data[:4], "big")
+        fn = self._info(contract).selectors.get(selector, "__default__")
+        self._walk(contract, computation, (), fn)
+
+    def _name(self, contract):
+        address = to_checksum_address(contract.address)
+        if address in self.labels:
+            return self.labels[address]
+        if contract.filename is not None:
+            return Path(contract.filename).stem
+        return address
+
+    def _info(self, contract):
+        key = id(contract.compiler_data)
+        if key not in self._code_info:
+            self._code_info[key] = _CodeInfo(contract)
+        return self._code_info[key]
+
+    def _enter(self, stack, frame):
+        self.calls[frame] += 1
+        return stack + (frame,)
+
+    def _walk(self, contract, computation, stack, fn):
+        info = self._info(contract)
+        name = self._name(contract)
+        self._source_lines[name] = info.source_lines
+
+        code = computation.code._raw_code_bytes
+        gas_of_step = computation._gas_meter._gas_of_step
+        children = list(zip(computation._child_pcs, computation.children))
+
+        frame = self._enter(stack, f"{name}.{fn}")
+        callers = []  # (frame, return pc) of the internal calls in progress
+        entering = False
+        lineno = None
+        callee = "__default__"
+
+        # accumulate the gas of the current frame and flush it when the
+        # frame changes, rather than hashing the stack at every step:
+        frame_gas = 0
+        line_gas = Counter()
+
+        for step, pc in enumerate(computation.code._trace):
+
+            if entering:
+                self.stacks[frame] += frame_gas
+                fn = info.entries.get(pc, f"<pc {pc}>")
+                frame, frame_gas = self._enter(frame, f"{name}.{fn}"), 0
+                entering = False
+            elif callers and pc == callers[-1][1]:
+                self.stacks[frame] += frame_gas
+                frame, frame_gas = callers.pop()[0], 0
+
+            gas = gas_of_step.get(step, 0)
+            opcode = code[pc] if pc < len(code) else None
+            lineno = info.pc_lineno.get(pc, lineno)
+            callee = info.pc_callee.get(pc, callee)
+
+            # py-evm advances the pc before it adds the child computation:
+            if opcode in CALLS and children and children[0][0] == pc + 1:
+                _, child = children.pop(0)
+                gas -= child.get_gas_used()
+                self._walk_child(child, frame, callee)
+
+            elif opcode == JUMP and pc in info.jumps_in:
+                entering = True
+                callers.append((frame, pc + 1))
+
+            frame_gas += gas
+            if lineno is not None:
+                line_gas[lineno] += gas
+
+        self.stacks[frame] += frame_gas
+        for lineno, gas in line_gas.items():
+            self.lines[(name, lineno)] += gas
+
+    def _walk_child(self, computation, stack, callee):
+        contract = boa.env.lookup_contract(computation.msg.code_address)
+        if isinstance(contract, VyperContract):
+            # name the function after the first pc of the callee that is in
+            # the body of an external function. public getters have no body,
+            # so fall back to the name used at the call site.
+            info = self._info(contract)
+            for pc in computation.code._trace:
+                if pc in info.pc_external_fn:
+                    callee = info.pc_external_fn[pc]
+                    break
+            self._walk(contract, computation, stack, callee)
+            return
+
+        address = to_checksum_address(computation.msg.code_address)
+        frame = self.labels.get(address, address)
+        self.stacks[self._enter(stack, frame)] += computation.get_gas_used()
+
+    @property
+    def total_gas(self):
+        return sum(self.stacks.values())
+
+    def folded(self):
+        return "".join(
+            f"{';'.join(stack)} {gas}\n"
+            for stack, gas in sorted(self.stacks.items())
+            if gas > 0
+        )
+
+    def write_folded(self, path):
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def function_table(self):
+        self_gas = Counter()
+        total_gas = Counter()
+        for stack, gas in self.stacks.items():
+            self_gas[stack[-1]] += gas
+            for frame in set(stack):
+                total_gas[frame] += gas
+
+        rows = [
+            (
+                frame,
+                self.calls[frame],
+                self_gas[frame],
+                total_gas[frame],
+                total_gas[frame] // self.calls[frame],
+                f"{total_gas[frame] / self.total_gas:.1%}",
+            )
+            for frame in sorted(total_gas, key=lambda f: -total_gas[f])
+        ]
+        header = ("function", "calls", "self", "total", "total/call", "%")
+        return format_table(header, rows, left=(0,))
+
+    def line_table(self, top=30):
+        rows = []
+        for (name, lineno), gas in self.lines.most_common(top):
+            source = self._source_lines[name][lineno - 1].strip()
+            rows.append(
+                (
+                    f"{name}:{lineno}",
+                    gas,
+                    f"{gas / self.total_gas:.1%}",
+                    source[:60],
+                )
+            )
+        return format_table(("line", "gas", "%", "source"), rows, left=(0, 3))
+
+
+def cool_down():
+    """
+    Make all accounts and storage slots cold, as at the start of a
+    transaction. boa runs every call in one long transaction otherwise.
+    """
+    # unlike boa.env._reset_access_counters(), clearing the journal can be
+    # reverted, so it does not break boa.env.anchor():
+    boa.env.vm.state._account_db._journal_accessed_state.clear()
+
+
+def format_table(header, rows, left):
+    rows = [header] + [tuple(str(v) for v in row) for row in rows]
+    widths = [max(len(row[k]) for row in rows) for k in range(len(header))]
+    lines = [
+        "  ".join(
+            v.ljust(w) if k in left else v.rjust(w)
+            for k, (v, w) in enumerate(zip(row, widths))
+        ).rstrip()
+        for row in rows
+    ]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines) + "\n"
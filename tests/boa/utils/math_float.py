@@ -0,0 +1,380 @@
+"""
+Float64 twin of CurveCryptoMathOptimized3.
+
+Every function takes the same arguments as its contract counterpart, in the
+same units (ANN with A_MULTIPLIER, gamma and balances in 1e18 base), but
+vectorized over pool states: balances are arrays of shape (M, 3) (or (3,) for
+a single state) and scalar arguments are either scalars or arrays of shape
+(M,). Results are float64 in the units of the contract, at a fraction of the
+cost of the integer implementations. Their relative errors against the
+contract, as measured by scripts/experiments/calibrate_math_float.py over
+3622 safe states, about half of them next to equilibrium (--balanced 0.5):
+
+                    |1 - K0| >= 1e-4       |1 - K0| < 1e-4
+                     p99       max          p99       max
+    newton_D       2.2e-16   4.4e-16      4.4e-16   6.7e-16
+    get_y: y       6.7e-16   6.0e-15      1.1e-15   1.6e-15
+    get_y: K0      6.7e-16   1.3e-15      1.0e-15   1.4e-15
+    get_p          1.1e-15   2.7e-15      4.8e-13   1.8e-12
+
+Only get_p drifts next to equilibrium, most for |1 - K0| from 1e-11 to
+1e-6. tests/boa/unitary/math/test_math_float.py checks looser bounds (1e-9
+for get_p, 1e-10 for get_y).
+
+States outside of the safe ranges the contract asserts on come out as nan
+instead of reverting, so that one bad state does not void a whole batch.
+"""
+import numpy as np
+
+N_COINS = 3
+A_MULTIPLIER = 10000
+
+MIN_GAMMA = 10**10
+MAX_GAMMA = 5 * 10**16
+
+MIN_A = N_COINS**N_COINS * A_MULTIPLIER / 100
+MAX_A = N_COINS**N_COINS * A_MULTIPLIER * 1000
+
+MIN_D = 10**17
+MAX_D = 10**15 * 10**18
+
+MIN_XD = 10**16 - 1
+MAX_XD = 10**20 + 1
+
+
+def _rows(x):
+    x = np.asarray(x, dtype=np.float64)
+    return np.atleast_2d(x), x.ndim == 1
+
+
+def _column(value, size):
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (size,))
+
+
+def _out(value, single):
+    return value[0] if single else value
+
+
+def _is_safe_frac(x, D):
+    frac = x * 1e18 / D
+    return (frac >= MIN_XD) & (frac <= MAX_XD)
+
+
+# ------------------------ AMM math functions --------------------------------
+
+
+def get_y(ANN, gamma, x, D, i):
+    """
+    Calculate x[i] given other balances x[0..N_COINS-1] and invariant D, with
+    the analytical solution of the cubic for K0 and _newton_y as fallback.
+    Returns [y, K0] like the contract, with K0 = 0 where the fallback ran.
+    """
+    x, single = _rows(x)
+    M = len(x)
+    ANN = _column(ANN, M)
+    gamma = _column(gamma, M)
+    D = _column(D, M)
+
+    j, k = [n for n in range(N_COINS) if n != i]
+    x_j = x[:, j]
+    x_k = x[:, k]
+
+    safe = (
+        (ANN >= MIN_A)
+        & (ANN <= MAX_A)
+        & (gamma >= MIN_GAMMA)
+        & (gamma <= MAX_GAMMA)
+        & (D >= MIN_D)
+        & (D <= MAX_D)
+        & _is_safe_frac(x_j, D)
+        & _is_safe_frac(x_k, D)
+    )
+
+    # Coefficients of a*K0**3 + b*K0**2 + c*K0 + d (in the contract they are
+    # rescaled to keep integer precision, which floats do not need):
+    gamma2 = gamma**2
+    a = 1e36 / 27
+    b = (
+        1e36 / 9
+        + 2e18 * gamma / 27
+        - D**2 / x_j * gamma2 * ANN / 27**2 / A_MULTIPLIER / x_k
+    )
+    c = (
+        1e36 / 9
+        + gamma * (gamma + 4e18) / 27
+        + gamma2 * (x_j + x_k - D) / D * ANN / 27 / A_MULTIPLIER
+    )
+    d = (1e18 + gamma) ** 2 / 27
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta0 = 3 * a * c / b - b
+        delta1 = 9 * a * c / b - 2 * b - 27 * a**2 / b * d / b
+        sqrt_arg = delta1**2 + 4 * delta0**2 / b * delta0
+        sqrt_val = np.sqrt(np.where(sqrt_arg > 0, sqrt_arg, 0))
+
+        second_cbrt = np.cbrt(
+            np.where(delta1 > 0, delta1 + sqrt_val, delta1 - sqrt_val) / 2
+        )
+        C1 = np.cbrt(b) ** 2 * second_cbrt
+        root_K0 = (b + b * delta0 / C1 - C1) / 3
+
+        y = D**3 / 27 / x_k / x_j * root_K0 / a
+        K0 = 1e18 * root_K0 / a
+
+    # Floats lose the precision the contract keeps by rescaling the
+    # coefficients when K0 is close to 1 (small gamma), so the root is polished
+    # with _newton_y steps, which is also the fallback where there is no real
+    # root. Roots with K0 >= 1 are off the curve (by AM-GM) and only come from
+    # rounding, so they are not used as a seed. Newton steps are capped at
+    # K0 = 1 as well: past it they creep towards the pole of the invariant at
+    # K0 = 1 + gamma, and stop there with steps too small to go on:
+    has_root = sqrt_arg > 0
+    y0 = np.where(has_root & safe & (root_K0 < a), y, np.nan)
+    y_max = D**3 / 27 / x_k / x_j
+    y = _newton_y(ANN, gamma, x, D, i, y0, y_max)
+    K0 = np.where(has_root, 27e18 * y / D * x_j / D * x_k / D, 0)
+
+    unsafe = ~safe | ~_is_safe_frac(y, D)
+    y[unsafe] = np.nan
+    K0[unsafe] = np.nan
+
+    return _out(y, single), _out(K0, single)
+
+
+def newton_y(ANN, gamma, x, D, i):
+    """
+    Calculate x[i] given A, gamma, xp and D using newton's method (the
+    fallback of get_y).
+    """
+    x, single = _rows(x)
+    M = len(x)
+    y = _newton_y(
+        _column(ANN, M), _column(gamma, M), x, _column(D, M), i, np.nan
+    )
+    return _out(y, single)
+
+
+def _newton_y(ANN, gamma, x, D, i, y0, y_max=np.inf):
+    # newton_y starting from y0 where it is not nan, with y kept <= y_max
+    M = len(x)
+
+    x_sorted = x.copy()
+    x_sorted[:, i] = 0
+    x_sorted = -np.sort(-x_sorted, axis=1)  # From high to low
+
+    convergence_limit = np.maximum(
+        np.maximum(x_sorted[:, 0] / 1e14, D / 1e14), 100
+    )
+
+    y = D / N_COINS
+    K0_i = np.full(M, 1e18)
+    S_i = np.zeros(M)
+    for n in range(2, N_COINS + 1):
+        _x = x_sorted[:, N_COINS - n]
+        y = y * D / (_x * N_COINS)  # Small _x first
+        S_i += _x
+    for n in range(N_COINS - 1):
+        K0_i = K0_i * x_sorted[:, n] * N_COINS / D  # Large _x first
+    y = np.where(np.isnan(y0), y, y0)
+    y_max = _column(y_max, M)
+
+    # Rows still iterating. The contract reverts on non-convergence, here the
+    # row is left as nan:
+    y_out = np.full(M, np.nan)
+    active = np.flatnonzero(
+        _is_safe_frac(x_sorted[:, 0], D) & _is_safe_frac(x_sorted[:, 1], D)
+    )
+    y = y[active]
+
+    for _ in range(255):
+        if len(active) == 0:
+            break
+
+        _D = D[active]
+        _gamma = gamma[active]
+        y_prev = y
+
+        K0 = K0_i[active] * y * N_COINS / _D
+        S = S_i[active] + y
+
+        _g1k0 = np.abs(_gamma + 1e18 - K0) + 1
+
+        # D / (A * N**N) * _g1k0**2 / gamma**2
+        mul1 = (
+            1e18 * _D / _gamma * _g1k0 / _gamma * _g1k0 * A_MULTIPLIER
+        ) / ANN[active]
+
+        # 2*K0 / _g1k0
+        mul2 = 1e18 + 2e18 * K0 / _g1k0
+
+        yfprime = 1e18 * y + S * mul2 + mul1 - _D * mul2
+        fprime = yfprime / y
+
+        # y -= f / f_prime;  y = (y * fprime - f) / fprime
+        y_minus = mul1 / fprime
+        y_plus = (yfprime + 1e18 * _D) / fprime + y_minus * 1e18 / K0
+        y_minus += 1e18 * S / fprime
+
+        y = np.where(
+            (yfprime < 0) | (y_plus < y_minus), y_prev / 2, y_plus - y_minus
+        )
+        y = np.minimum(y, y_max[active])
+
+        converged = np.abs(y - y_prev) < np.maximum(
+            convergence_limit[active], y / 1e14
+        )
+        y_out[active[converged]] = y[converged]
+        active = active[~converged]
+        y = y[~converged]
+
+    y_out[~_is_safe_frac(y_out, D)] = np.nan
+    return y_out
+
+
+def newton_D(ANN, gamma, x_unsorted, K0_prev=0):
+    """
+    Find the invariant via newton's method, seeded like the contract: from
+    the geometric mean of the balances, or from K0_prev (as returned by
+    get_y) where it is non-zero.
+    """
+    x, single = _rows(x_unsorted)
+    M = len(x)
+    ANN = _column(ANN, M)
+    gamma = _column(gamma, M)
+    K0_prev = _column(K0_prev, M)
+
+    x = -np.sort(-x, axis=1)
+    S = x.sum(axis=1)
+
+    with np.errstate(divide="ignore"):
+        D = np.where(
+            K0_prev == 0,
+            N_COINS * geometric_mean(x),
+            cbrt(x[:, 0] * x[:, 1] / 1e18 * x[:, 2] / K0_prev * 27),
+        )
+
+    D_out = np.full(M, np.nan)
+    active = np.flatnonzero(x[:, 0] > 0)
+    D = D[active]
+
+    for _ in range(255):
+        if len(active) == 0:
+            break
+
+        _x = x[active]
+        _S = S[active]
+        _gamma = gamma[active]
+        D_prev = D
+
+        K0 = (
+            1e18
+            * _x[:, 0]
+            * N_COINS
+            / D
+            * _x[:, 1]
+            * N_COINS
+            / D
+            * _x[:, 2]
+            * N_COINS
+            / D
+        )
+
+        _g1k0 = np.abs(_gamma + 1e18 - K0) + 1
+
+        # D / (A * N**N) * _g1k0**2 / gamma**2
+        mul1 = (
+            1e18 * D / _gamma * _g1k0 / _gamma * _g1k0 * A_MULTIPLIER
+        ) / ANN[active]
+
+        # mul2 = (2 * 10**18) * N_COINS * K0 / _g1k0
+        mul2 = 2e18 * N_COINS * K0 / _g1k0
+
+        neg_fprime = (
+            (_S + _S * mul2 / 1e18) + mul1 * N_COINS / K0 - mul2 * D / 1e18
+        )
+
+        # D -= f / fprime
+        D_plus = D * (neg_fprime + _S) / neg_fprime
+        D_minus = (
+            D * D / neg_fprime
+            + D * (mul1 / neg_fprime) / 1e18 * (1e18 - K0) / K0
+        )
+
+        D = np.where(
+            D_plus > D_minus, D_plus - D_minus, (D_minus - D_plus) / 2
+        )
+
+        converged = np.abs(D - D_prev) * 1e14 < np.maximum(1e16, D)
+        D_out[active[converged]] = D[converged]
+        active = active[~converged]
+        D = D[~converged]
+
+    # Test that we are safe with the next get_y
+    for n in range(N_COINS):
+        D_out[~_is_safe_frac(x[:, n], D_out)] = np.nan
+
+    return _out(D_out, single)
+
+
+def get_p(xp, D, A_gamma):
+    """
+    Calculate dx/dy. The output needs to be multiplied with price_scale to get
+    the actual value. A_gamma is a pair of (ANN, gamma), each of which may be
+    an array.
+    """
+    xp, single = _rows(xp)
+    M = len(xp)
+    D = _column(D, M)
+    ANN = _column(A_gamma[0], M)
+    gamma = _column(A_gamma[1], M)
+
+    # K0 = P * N**N / D**N, in 10**36 precision:
+    K0 = 27 * xp[:, 0] * xp[:, 1] / D * xp[:, 2] / D * 1e36 / D
+
+    # GK0 = 2 * K0**3 + (gamma + 1)**2 - K0**2 * (2 * gamma + 3), in 10**36
+    # precision. Its terms cancel down to gamma**2 at K0 = 1, which floats
+    # cannot resolve at small gamma. In terms of u = 1 - K0 (>= 0), they all
+    # add up instead:
+    u = 1e36 - K0
+    GK0 = (
+        u * u / 1e36 * (1e36 + 2 * K0) / 1e36
+        + gamma**2
+        + 2 * gamma * u / 1e18 * (1e36 + K0) / 1e36
+    )
+
+    # NNAG2 = N**N * A * gamma**2
+    NNAG2 = ANN * gamma**2 / A_MULTIPLIER
+
+    denominator = GK0 + NNAG2 * xp[:, 0] / D * K0 / 1e36
+
+    p = np.stack(
+        [
+            xp[:, 0]
+            * (GK0 + NNAG2 * xp[:, n] / D * K0 / 1e36)
+            / xp[:, n]
+            * 1e18
+            / denominator
+            for n in range(1, N_COINS)
+        ],
+        axis=1,
+    )
+
+    p[~((D >= MIN_D) & (D <= MAX_D))] = np.nan
+    return _out(p, single)
+
+
+# --------------------------- Math Utils -------------------------------------
+
+
+def cbrt(x):
+    """
+    Cubic root of x in 1e18 precision.
+    """
+    return np.cbrt(np.asarray(x, dtype=np.float64)) * 1e12
+
+
+def geometric_mean(x):
+    """
+    Geometric mean of the last axis of x, in the units of x.
+    """
+    return np.cbrt(np.prod(np.asarray(x, dtype=np.float64), axis=-1))
@@ -40,45 +40,110 @@ def reduction_coefficient(x, gamma):
 
 def newton_D(A, gamma, x, D0):
     D = D0
-    i = 0
-
-    S = sum(x)
     x = sorted(x, reverse=True)
-    N = len(x)
 
     for i in range(255):
         D_prev = D
+        D = _newton_D_step(A, gamma, x, D)
+        if abs(D - D_prev) <= max(100, D // 10**14):
+            return D
 
-        K0 = 10**18
-        for _x in x:
-            K0 = K0 * _x * N // D
+    raise ValueError("Did not converge")
 
-        _g1k0 = abs(gamma + 10**18 - K0)
 
-        # D / (A * N**N) * _g1k0**2 / gamma**2
-        mul1 = (
-            10**18 * D // gamma * _g1k0 // gamma * _g1k0 * A_MULTIPLIER // A
-        )
+def _newton_D_step(A, gamma, x, D):
+    # one newton step of newton_D, with x sorted from high to low
+    S = sum(x)
+    N = len(x)
 
-        # 2*N*K0 / _g1k0
-        mul2 = (2 * 10**18) * N * K0 // _g1k0
+    K0 = 10**18
+    for _x in x:
+        K0 = K0 * _x * N // D
 
-        neg_fprime = (
-            (S + S * mul2 // 10**18) + mul1 * N // K0 - mul2 * D // 10**18
-        )
-        assert neg_fprime > 0  # Python only: -f' > 0
+    _g1k0 = abs(gamma + 10**18 - K0)
 
-        # D -= f / fprime
-        D = (D * neg_fprime + D * S - D**2) // neg_fprime - D * (
-            mul1 // neg_fprime
-        ) // 10**18 * (10**18 - K0) // K0
+    # D / (A * N**N) * _g1k0**2 / gamma**2
+    mul1 = 10**18 * D // gamma * _g1k0 // gamma * _g1k0 * A_MULTIPLIER // A
 
-        if D < 0:
-            D = -D // 2
-        if abs(D - D_prev) <= max(100, D // 10**14):
-            return D
+    # 2*N*K0 / _g1k0
+    mul2 = (2 * 10**18) * N * K0 // _g1k0
 
-    raise ValueError("Did not converge")
+    neg_fprime = (
+        (S + S * mul2 // 10**18) + mul1 * N // K0 - mul2 * D // 10**18
+    )
+    assert neg_fprime > 0  # Python only: -f' > 0
+
+    # D -= f / fprime
+    D = (D * neg_fprime + D * S - D**2) // neg_fprime - D * (
+        mul1 // neg_fprime
+    ) // 10**18 * (10**18 - K0) // K0
+
+    if D < 0:
+        D = -D // 2
+    return D
+
+
+def round_D(A, gamma, x, D):
+    """
+    The root of the invariant in D, rounded down, found from a D close to it
+    (as returned by newton_D). newton_D stops anywhere within its tolerance
+    of the root, depending on its seed, and so does the integer newton step,
+    which can have several fixed points there. This does not.
+    """
+    # secant steps get within a unit or so of the root:
+    D_prev, F_prev = D, _invariant_sign(A, gamma, x, D)
+    D = D + max(D // 10**16, 1)
+    F = _invariant_sign(A, gamma, x, D)
+    for i in range(8):
+        if F == F_prev:
+            break
+        D_next = D - F * (D - D_prev) // (F - F_prev)
+        if abs(D_next - D) <= 1 or D_next <= 0:
+            break
+        D_prev, F_prev = D, F
+        D = D_next
+        F = _invariant_sign(A, gamma, x, D)
+
+    # the invariant decreases in D around its root: gallop away from D until
+    # the sign changes, then bisect
+    step = 1
+    if _invariant_sign(A, gamma, x, D) >= 0:
+        lo = D
+        while _invariant_sign(A, gamma, x, lo + step) >= 0:
+            lo += step
+            step *= 2
+        hi = lo + step
+    else:
+        hi = D
+        while hi - step > 0 and _invariant_sign(A, gamma, x, hi - step) < 0:
+            hi -= step
+            step *= 2
+        lo = max(hi - step, 0)
+
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if _invariant_sign(A, gamma, x, mid) >= 0:
+            lo = mid
+        else:
+            hi = mid
+
+    return lo
+
+
+def _invariant_sign(A, gamma, x, D):
+    # S - D - D * (1 - K0) * (gamma + 1 - K0)**2 / (K0 * gamma**2 * A), which
+    # newton_D solves, times a positive factor that clears every fraction
+    # (K0 = u / v, gamma and 1 in 10**18 precision):
+    N = len(x)
+    u = N**N
+    for _x in x:
+        u *= _x
+    v = D**N
+    E = 10**18
+
+    return (sum(x) - D) * u * v**2 * gamma**2 * A - D * (v - u) * (
+        (gamma + E) * v - E * u
+    ) ** 2 * A_MULTIPLIER
 
 
 def newton_y(A, gamma, x, D, i):
@@ -130,6 +195,285 @@ def newton_y(A, gamma, x, D, i):
     raise Exception("Did not converge")
 
 
+# Port of the analytical get_y of CurveCryptoMathOptimized3 (3 coins only),
+# bit-exact with the contract. It raises ValueError exactly where the
+# contract reverts: on unsafe inputs or outputs, and on the overflows and
+# divisions by zero of its checked arithmetic.
+
+MIN_GAMMA = 10**10
+MAX_GAMMA = 5 * 10**16
+
+MIN_A = 3**3 * A_MULTIPLIER // 100
+MAX_A = 3**3 * A_MULTIPLIER * 1000
+
+
+def _sdiv(a, b):
+    # unsafe_div on int256: truncates towards zero, and is 0 if b == 0
+    if b == 0:
+        return 0
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b >= 0) else -q
+
+
+def _checked(a):
+    # checked int256 arithmetic reverts on overflow
+    if not -(2**255) <= a < 2**255:
+        raise ValueError("int256 overflow")
+    return a
+
+
+def _checked_div(a, b):
+    # checked division reverts on division by zero
+    if b == 0:
+        raise ValueError("Division by zero")
+    return _sdiv(a, b)
+
+
+def _isqrt(x):
+    # floor(sqrt(x)), like vyper's isqrt
+    if x == 0:
+        return 0
+    y = 1 << ((x.bit_length() + 1) // 2)
+    while True:
+        y_next = (y + x // y) // 2
+        if y_next >= y:
+            return y
+        y = y_next
+
+
+def _cbrt(x):
+    # cbrt(x) in 1e18 precision, with the contract's initial guess and its
+    # 7 unrolled newton steps
+    if x >= 115792089237316195423570985008687907853269 * 10**18:
+        xx = x
+    elif x >= 115792089237316195423570985008687907853269:
+        xx = x * 10**18
+    else:
+        xx = x * 10**36
+
+    log2x = xx.bit_length() - 1 if xx > 0 else 0
+    remainder = log2x % 3
+    a = 2 ** (log2x // 3) * 1260**remainder // 1000**remainder
+
+    for _ in range(7):
+        # division by zero is 0 in the evm, which only happens for x == 0
+        a = (2 * a + (xx // (a * a) if a else 0)) // 3
+
+    if x >= 115792089237316195423570985008687907853269 * 10**18:
+        a = a * 10**12
+    elif x >= 115792089237316195423570985008687907853269:
+        a = a * 10**6
+
+    return a
+
+
+def _check_frac(x, D):
+    frac = x * 10**18 // D
+    if not (10**16 - 1 < frac < 10**20 + 1):
+        raise ValueError("Unsafe values x[i]")
+
+
+def _newton_y(ANN, gamma, x, D, i):
+    # _newton_y of CurveCryptoMathOptimized3: the fallback of get_y
+    N = len(x)
+    for k in range(N):
+        if k != i:
+            _check_frac(x[k], D)
+
+    y = D // N
+    K0_i = 10**18
+    S_i = 0
+
+    x_sorted = sorted((0 if k == i else _x for k, _x in enumerate(x)))[::-1]
+    convergence_limit = max(x_sorted[0] // 10**14, D // 10**14, 100)
+
+    for j in range(2, N + 1):
+        _x = x_sorted[N - j]
+        y = y * D // (_x * N)  # Small _x first
+        S_i += _x
+    for j in range(N - 1):
+        K0_i = K0_i * x_sorted[j] * N // D  # Large _x first
+
+    for j in range(255):
+        y_prev = y
+
+        K0 = K0_i * y * N // D
+        S = S_i + y
+
+        _g1k0 = abs(gamma + 10**18 - K0) + 1
+
+        # D / (A * N**N) * _g1k0**2 / gamma**2
+        mul1 = (
+            10**18
+            * D
+            // gamma
+            * _g1k0
+            // gamma
+            * _g1k0
+            * A_MULTIPLIER
+            // ANN
+        )
+
+        # 2*K0 / _g1k0
+        mul2 = 10**18 + (2 * 10**18) * K0 // _g1k0
+
+        yfprime = 10**18 * y + S * mul2 + mul1
+        _dyfprime = D * mul2
+        if yfprime < _dyfprime:
+            y = y_prev // 2
+            continue
+        yfprime -= _dyfprime
+
+        fprime = _checked_div(yfprime, y)
+
+        # y -= f / f_prime;  y = (y * fprime - f) / fprime
+        y_minus = _checked_div(mul1, fprime)
+        y_plus = (yfprime + 10**18 * D) // fprime + _checked_div(
+            y_minus * 10**18, K0
+        )
+        y_minus += 10**18 * S // fprime
+
+        if y_plus < y_minus:
+            y = y_prev // 2
+        else:
+            y = y_plus - y_minus
+
+        if abs(y - y_prev) < max(convergence_limit, y // 10**14):
+            _check_frac(y, D)
+            return y
+
+    raise ValueError("Did not converge")
+
+
+def get_y(ANN, gamma, x, D, i):
+    """
+    x[i] given the other balances and D, by solving the cubic for K0
+    analytically. Returns [y, K0], with K0 = 0 if the cubic has no real root
+    and the newton fallback was used.
+    """
+    if not (MIN_A <= ANN <= MAX_A):
+        raise ValueError("Unsafe values A")
+    if not (MIN_GAMMA <= gamma <= MAX_GAMMA):
+        raise ValueError("Unsafe values gamma")
+    if not (10**17 <= D <= 10**15 * 10**18):
+        raise ValueError("Unsafe values D")
+    for k in range(3):
+        if k != i:
+            _check_frac(x[k], D)
+
+    j, k = [n for n in range(3) if n != i]
+    x_j = x[j]
+    x_k = x[k]
+    gamma2 = gamma * gamma
+
+    a = 10**36 // 27
+
+    # 10**36/9 + 2*10**18*gamma/27 - D**2/x_j*gamma**2*A/27**2/x_k
+    b = _checked(
+        (10**36 // 9 + 2 * 10**18 * gamma // 27)
+        - _checked(D * D // x_j * gamma2 * ANN)
+        // 27**2
+        // A_MULTIPLIER
+        // x_k
+    )
+
+    # 10**36/9 + gamma*(gamma + 4*10**18)/27 + gamma**2*(x_j+x_k-D)/D*A/27
+    c = _checked(
+        (10**36 // 9 + gamma * (gamma + 4 * 10**18) // 27)
+        + _sdiv(
+            _sdiv(_sdiv(_checked(gamma2 * (x_j + x_k - D)), D) * ANN, 27),
+            A_MULTIPLIER,
+        )
+    )
+
+    # (10**18 + gamma)**2/27
+    d = (10**18 + gamma) ** 2 // 27
+
+    # abs(3*a*c/b - b)
+    d0 = abs(_checked(_checked_div(_checked(3 * a * c), b) - b))
+
+    divider = 1
+    for threshold, _divider in (
+        (10**48, 10**30),
+        (10**44, 10**26),
+        (10**40, 10**22),
+        (10**36, 10**18),
+        (10**32, 10**14),
+        (10**28, 10**10),
+        (10**24, 10**6),
+        (10**20, 10**2),
+    ):
+        if d0 > threshold:
+            divider = _divider
+            break
+
+    if abs(a) > abs(b):
+        additional_prec = abs(_sdiv(a, b))
+        a = _sdiv(a * additional_prec, divider)
+        b = _sdiv(_checked(b * additional_prec), divider)
+        c = _sdiv(_checked(c * additional_prec), divider)
+        d = _sdiv(_checked(d * additional_prec), divider)
+    else:
+        additional_prec = abs(_sdiv(b, a))
+        a = _sdiv(_checked_div(a, additional_prec), divider)
+        b = _sdiv(_sdiv(b, additional_prec), divider)
+        c = _sdiv(_sdiv(c, additional_prec), divider)
+        d = _sdiv(_sdiv(d, additional_prec), divider)
+
+    # 3*a*c/b - b
+    _3ac = _checked(3 * a * c)
+    delta0 = _checked(_sdiv(_3ac, b) - b)
+
+    # 9*a*c/b - 2*b - 27*a**2/b*d/b
+    delta1 = _checked(
+        _checked(_sdiv(_checked(3 * _3ac), b) - 2 * b)
+        - _sdiv(_checked(_sdiv(_checked(27 * _checked(a**2)), b) * d), b)
+    )
+
+    # delta1**2 + 4*delta0**2/b*delta0
+    sqrt_arg = _checked(
+        _checked(delta1**2)
+        + _checked(_sdiv(_checked(4 * _checked(delta0**2)), b) * delta0)
+    )
+
+    if sqrt_arg <= 0:
+        return [_newton_y(ANN, gamma, x, D, i), 0]
+    sqrt_val = _isqrt(sqrt_arg)
+
+    if b >= 0:
+        b_cbrt = _cbrt(b)
+    else:
+        b_cbrt = -_cbrt(-b)
+
+    if delta1 > 0:
+        second_cbrt = _cbrt(_checked(delta1 + sqrt_val) // 2)
+    else:
+        second_cbrt = -_cbrt(-(delta1 - sqrt_val) // 2)
+
+    # b_cbrt*b_cbrt/10**18*second_cbrt/10**18
+    C1 = _sdiv(
+        _checked(_sdiv(b_cbrt * b_cbrt, 10**18) * second_cbrt), 10**18
+    )
+
+    # (b + b*delta0/C1 - C1)/3
+    root_K0 = _sdiv(
+        _checked(b + _checked_div(_checked(b * delta0), C1) - C1), 3
+    )
+
+    # D*D/27/x_k*D/x_j*root_K0/a
+    root = _sdiv(_checked(D * D // 27 // x_k * D // x_j * root_K0), a)
+    K0 = _sdiv(_checked(10**18 * root_K0), a)
+    if root < 0 or K0 < 0:
+        raise ValueError("Unsafe value for y")
+
+    if root * 10**18 >= 2**256:
+        raise ValueError("uint256 overflow")
+    if not (10**16 - 1 <= root * 10**18 // D < 10**20 + 1):
+        raise ValueError("Unsafe value for y")
+
+    return [root, K0]
+
+
 def get_partial_derivative(x1, x2, x3, d, gamma, A):
 
     a = (
@@ -152,6 +496,11 @@ def get_partial_derivative(x1, x2, x3, d, gamma, A):
 
 
 def solve_x(A, gamma, x, D, i):
+    if len(x) == 3:
+        try:
+            return get_y(A, gamma, x, D, i)[0]
+        except ValueError:
+            pass  # the contract reverts, but the math goes on with newton_y
     return newton_y(A, gamma, x, D, i)
 
 
@@ -160,7 +509,18 @@ def solve_D(A, gamma, x):
     return newton_D(A, gamma, x, D0)
 
 
+def _mean_upper_bound(x):
+    # geometric_mean(x) is within a few 1e-18 of the float mean, and so
+    # below this:
+    return int(exp(sum(log(_x) for _x in x) / len(x)) * (1 + 1e-9)) + 1
+
+
 class Curve:
+
+    # Max relative change (1e18 base) of any xp for which D is reseeded from
+    # the previous D instead of being solved from scratch:
+    D_WARM_START_THRESHOLD = 10**16
+
     def __init__(self, A, gamma, D, n, p=None):
         self.A = A
         self.gamma = gamma
@@ -170,6 +530,7 @@ class Curve:
         else:
             self.p = [10**18] * n
         self.x = [D // n * 10**18 // self.p[i] for i in range(n)]
+        self._D_cache = None  # ((A, gamma, xp), D)
 
     def xp(self):
         return [x * p // 10**18 for x, p in zip(self.x, self.p)]
@@ -178,7 +539,45 @@ class Curve:
         xp = self.xp()
         if any(x <= 0 for x in xp):
             raise ValueError
-        return solve_D(self.A, self.gamma, xp)
+
+        # x and p are mutated in place by the traders, so the cache is keyed
+        # on the full state rather than invalidated by setters:
+        key = (self.A, self.gamma, xp)
+        if self._D_cache is not None:
+            cached_key, cached_D = self._D_cache
+            if cached_key == key:
+                return cached_D
+            if cached_key[:2] == key[:2] and self._is_small_delta(
+                cached_key[2], xp
+            ):
+                # Same as K0_prev in the contract's newton_D: seed with the
+                # previous D, rescaled by the change in sum(xp). Newton only
+                # converges to the right root when seeded between
+                # N * geometric_mean(xp) and sum(xp). The seed stays below
+                # sum(xp), and the geometric mean is only needed if it may
+                # fall below the lower bound:
+                D0 = cached_D * sum(xp) // sum(cached_key[2])
+                if D0 <= self.n * _mean_upper_bound(xp):
+                    D0 = max(D0, self.n * geometric_mean(xp))
+                try:
+                    D = newton_D(self.A, self.gamma, xp, D0)
+                    D = round_D(self.A, self.gamma, xp, D)
+                    self._D_cache = (key, D)
+                    return D
+                except (AssertionError, ValueError):
+                    pass
+
+        D = newton_D(self.A, self.gamma, xp, self.n * geometric_mean(xp))
+        D = round_D(self.A, self.gamma, xp, D)
+        self._D_cache = (key, D)
+        return D
+
+    def _is_small_delta(self, xp_old, xp_new):
+        return all(
+            abs(x_new - x_old) * 10**18
+            <= self.D_WARM_START_THRESHOLD * x_old
+            for x_old, x_new in zip(xp_old, xp_new)
+        )
 
     def y(self, x, i, j):
         xp = self.xp()
@@ -366,3 +765,227 @@ class Trader:
             self.xcp = old_xcp
 
         return norm
+
+
+# ------------------------------ Batched solvers ------------------------------
+#
+# The functions below run the same iterations as geometric_mean, newton_D and
+# newton_y over a whole matrix of pool states at once (one state per row).
+# Rows which have converged are masked out of further iterations.
+#
+# With dtype=object (the default) every element is a python int and every
+# operation is the exact same integer operation as in the scalar code, so
+# results are bit-identical to the scalar solvers. Passing dtype=np.float64
+# or np.longdouble runs the same iterations in floating point: results are
+# then only accurate to the precision of the dtype.
+
+
+def _numpy():
+    import numpy as np
+
+    return np
+
+
+def _div(exact):
+    if exact:
+        return lambda a, b: a // b
+    return lambda a, b: a / b
+
+
+def _batch_rows(np, x, dtype, reverse):
+    rows = [sorted(row, reverse=reverse) for row in x]
+    if dtype is object:
+        out = np.empty((len(rows), len(rows[0])), dtype=object)
+        out[:] = rows
+        return out
+    return np.array(rows, dtype=dtype)
+
+
+def _batch_column(np, value, size, dtype):
+    if np.ndim(value) == 0:
+        out = np.empty(size, dtype=dtype)
+        out[:] = value
+        return out
+    out = np.empty(size, dtype=dtype)
+    out[:] = list(value)
+    return out
+
+
+def geometric_mean_batch(x, dtype=object):
+    np = _numpy()
+    exact = dtype is object
+    div = _div(exact)
+
+    x = _batch_rows(np, x, dtype, reverse=True)
+    M, N = x.shape
+    D = x[:, 0].copy()
+    active = np.arange(M)
+
+    for i in range(255):
+        _x = x[active]
+        _D = D[active]
+        D_prev = _D
+
+        tmp = _batch_column(np, 10**18, len(active), dtype)
+        for k in range(N):
+            tmp = div(tmp * _x[:, k], _D)
+        _D = div(_D * ((N - 1) * 10**18 + tmp), N * 10**18)
+
+        diff = np.abs(_D - D_prev)
+        converged = (diff <= 1) | (diff * 10**18 < _D)
+        if not exact:
+            # 1e-18 relative precision is out of reach for floats
+            converged |= diff <= _D * (4 * np.finfo(dtype).eps)
+        D[active] = _D
+        active = active[~converged]
+        if len(active) == 0:
+            return D
+
+    raise ValueError("Did not converge")
+
+
+def newton_D_batch(A, gamma, x, D0, dtype=object):
+    np = _numpy()
+    exact = dtype is object
+    div = _div(exact)
+
+    x = _batch_rows(np, x, dtype, reverse=True)
+    M, N = x.shape
+    A = _batch_column(np, A, M, dtype)
+    gamma = _batch_column(np, gamma, M, dtype)
+    D = _batch_column(np, D0, M, dtype)
+    S = x.sum(axis=1)
+    active = np.arange(M)
+
+    for i in range(255):
+        _x = x[active]
+        _A = A[active]
+        _gamma = gamma[active]
+        _S = S[active]
+        _D = D[active]
+        D_prev = _D
+
+        K0 = _batch_column(np, 10**18, len(active), dtype)
+        for k in range(N):
+            K0 = div(K0 * _x[:, k] * N, _D)
+
+        _g1k0 = np.abs(_gamma + 10**18 - K0)
+
+        # D / (A * N**N) * _g1k0**2 / gamma**2
+        mul1 = div(
+            div(div(10**18 * _D, _gamma) * _g1k0, _gamma)
+            * _g1k0
+            * A_MULTIPLIER,
+            _A,
+        )
+
+        # 2*N*K0 / _g1k0
+        mul2 = div((2 * 10**18) * N * K0, _g1k0)
+
+        neg_fprime = (
+            (_S + div(_S * mul2, 10**18))
+            + div(mul1 * N, K0)
+            - div(mul2 * _D, 10**18)
+        )
+        assert (neg_fprime > 0).all()  # Python only: -f' > 0
+
+        # D -= f / fprime
+        _D = div(_D * neg_fprime + _D * _S - _D**2, neg_fprime) - div(
+            div(_D * div(mul1, neg_fprime), 10**18) * (10**18 - K0), K0
+        )
+
+        _D = np.where(_D < 0, div(-_D, 2), _D)
+        converged = np.abs(_D - D_prev) <= np.maximum(100, div(_D, 10**14))
+        D[active] = _D
+        active = active[~converged]
+        if len(active) == 0:
+            return D
+
+    raise ValueError("Did not converge")
+
+
+def newton_y_batch(A, gamma, x, D, i, dtype=object):
+    np = _numpy()
+    exact = dtype is object
+    div = _div(exact)
+
+    # Drop the coin being solved for, smallest balance first
+    x = _batch_rows(
+        np,
+        [[_x for k, _x in enumerate(row) if k != i] for row in x],
+        dtype,
+        reverse=False,
+    )
+    M, N = x.shape[0], x.shape[1] + 1
+    A = _batch_column(np, A, M, dtype)
+    gamma = _batch_column(np, gamma, M, dtype)
+    D = _batch_column(np, D, M, dtype)
+
+    y = div(D, N)
+    K0_i = _batch_column(np, 10**18, M, dtype)
+    S_i = _batch_column(np, 0, M, dtype)
+    convergence_limit = np.maximum(
+        np.maximum(div(x[:, -1], 10**14), div(D, 10**14)), 100
+    )
+    for k in range(N - 1):
+        y = div(y * D, x[:, k] * N)  # Small _x first
+        S_i = S_i + x[:, k]
+    for k in reversed(range(N - 1)):
+        K0_i = div(K0_i * x[:, k] * N, D)  # Large _x first
+
+    active = np.arange(M)
+    for j in range(255):
+        _A = A[active]
+        _gamma = gamma[active]
+        _D = D[active]
+        _y = y[active]
+        y_prev = _y
+
+        K0 = div(K0_i[active] * _y * N, _D)
+        S = S_i[active] + _y
+
+        _g1k0 = np.abs(_gamma + 10**18 - K0)
+
+        # D / (A * N**N) * _g1k0**2 / gamma**2
+        mul1 = div(
+            div(div(10**18 * _D, _gamma) * _g1k0, _gamma)
+            * _g1k0
+            * A_MULTIPLIER,
+            _A,
+        )
+
+        # 2*K0 / _g1k0
+        mul2 = 10**18 + div((2 * 10**18) * K0, _g1k0)
+
+        yfprime = 10**18 * _y + S * mul2 + mul1 - _D * mul2
+        fprime = div(yfprime, _y)
+        assert (fprime > 0).all()  # Python only: f' > 0
+
+        # y -= f / f_prime;  y = (y * fprime - f) / fprime
+        _y = div(yfprime + 10**18 * _D - 10**18 * S, fprime) + div(
+            div(mul1, fprime) * (10**18 - K0), K0
+        )
+
+        _y = np.where((_y < 0) | (fprime < 0), div(y_prev, 2), _y)
+        converged = np.abs(_y - y_prev) <= np.maximum(
+            convergence_limit[active], div(_y, 10**14)
+        )
+        y[active] = _y
+        active = active[~converged]
+        if len(active) == 0:
+            return y
+
+    raise ValueError("Did not converge")
+
+
+def solve_y_newton_batch(A, gamma, x, D, i, dtype=object):
+    # Batched newton_y. Unlike solve_x, this does not switch to the
+    # analytical get_y for 3 coins, so it only matches solve_x to newton_y's
+    # precision:
+    return newton_y_batch(A, gamma, x, D, i, dtype=dtype)
+
+
+def solve_D_batch(A, gamma, x, dtype=object):
+    N = len(x[0])
+    D0 = N * geometric_mean_batch(x, dtype=dtype)
+    return newton_D_batch(A, gamma, x, D0, dtype=dtype)
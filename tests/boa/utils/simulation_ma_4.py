@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 # flake8: noqa
 import json
+import os
 from decimal import Decimal
+from math import isfinite, log
+
+CANDLE_STORE = "download/candles.npy"
+CANDLE_SOURCES = {(0, 1): "download/ethbtc.json"}  # as in get_all()
 
 
 def reduction_coefficient(x, gamma):
@@ -15,14 +20,19 @@ def reduction_coefficient(x, gamma):
     return K
 
 
-def absnewton(f, fprime, x0, handle_x=False, handle_D=False):
+def absnewton(f, fprime, x0, handle_x=False, handle_D=False, max_iter=None):
     x = x0
     i = 0
     while True:
         x_prev = x
         _f = f(x)
         _fprime = fprime(x)
+        if _fprime == 0:
+            # e.g. the exact derivatives, whose terms cancel out at K0 == 1
+            raise ValueError("Zero derivative")
         x -= _f / _fprime
+        if not isfinite(x):
+            raise ValueError("Did not converge")
 
         # XXX vulnerable to edge-cases
         # Need to take out of unstable equilibrium if ever gets there
@@ -35,6 +45,8 @@ def absnewton(f, fprime, x0, handle_x=False, handle_D=False):
                 x = -x / 2
 
         i += 1
+        if max_iter is not None and i > max_iter:
+            raise ValueError("Did not converge")
         if i > 1000:  # XXX
             print(i, (x - x_prev) / x_prev)
         if abs(x - x_prev) < x_prev * 1e-12:
@@ -132,6 +144,50 @@ def inv_dfdxi(A, gamma, x, D, i):
     return D ** (N - 1) * (K + sum(x) * Kderiv) + x_prod_i - D**N * Kderiv
 
 
+def _inv_target_K(A, gamma, K0):
+    # K of inv_target and dK/dK0
+    g1k0 = gamma + 10**18 * (1.0 - K0)
+    K = A * gamma**2 * K0 / g1k0**2
+    Kderiv = A * gamma**2 * (1 / g1k0**2 + 2 * 10**18 * K0 / g1k0**3)
+    return K, Kderiv
+
+
+def inv_target_dfdD(A, gamma, x, D):
+    # Derivative of inv_target itself: inv_dfdD drops the 10**18 factor of
+    # inv_target in the denominator of K, which makes Newton crawl
+    N = len(x)
+    x_prod = 1.0
+    for x_i in x:
+        x_prod *= x_i
+    K0 = x_prod / (D / N) ** N
+
+    K, Kderiv = _inv_target_K(A, gamma, K0)
+    Kderiv *= -N * K0 / D
+
+    return (
+        Kderiv * (D ** (N - 1) * sum(x) - D**N)
+        + K * ((N - 1) * D ** (N - 2) * sum(x) - N * D ** (N - 1))
+        - (D / N) ** (N - 1)
+    )
+
+
+def inv_target_dfdxi(A, gamma, x, D, i):
+    # Partial derivative of inv_target itself, which (unlike inv_dfdxi) keeps
+    # the 10**18 factor of inv_target in the denominator of K
+    N = len(x)
+    x_prod = 1.0
+    for x_i in x:
+        x_prod *= x_i
+    K0 = x_prod / (D / N) ** N
+
+    K, Kderiv = _inv_target_K(A, gamma, K0)
+    Kderiv *= K0 / x[i]
+
+    return (
+        D ** (N - 1) * (K + sum(x) * Kderiv) + x_prod / x[i] - D**N * Kderiv
+    )
+
+
 def solve_x(A, gamma, x, D, i, method="newton"):
     prod_i = 1.0
     for j, _x in enumerate(x):
@@ -144,34 +200,56 @@ def solve_x(A, gamma, x, D, i, method="newton"):
         return inv_target(A, gamma, xx, D)
 
     def f_der(x_i):
+        xx = x[:]
+        xx[i] = x_i
+        return inv_target_dfdxi(A, gamma, xx, D, i)
+
+    def f_der_slow(x_i):
         xx = x[:]
         xx[i] = x_i
         return inv_dfdxi(A, gamma, xx, D, i)
 
+    x0 = (D / 2) ** len(x) / prod_i
     try:
-        result = absnewton(f, f_der, (D / 2) ** len(x) / prod_i, handle_x=True)
+        try:
+            result = absnewton(f, f_der, x0, handle_x=True, max_iter=100)
+        except ValueError:
+            # The exact derivative can cycle next to the pole of K near
+            # equilibrium, or vanish at it, where the old one only crawls:
+            result = absnewton(f, f_der_slow, x0, handle_x=True)
     except KeyboardInterrupt:
         print("x")
         raise
     return result
 
 
-def solve_D(A, gamma, x):
+def solve_D(A, gamma, x, D0=None):
     f = lambda D: inv_target(A, gamma, x, D)
-    f_der = lambda D: inv_dfdD(A, gamma, x, D)
-
-    D0 = 1
-    for _x in x:
-        D0 *= _x
-    D0 = D0 ** (1 / len(x)) * len(x)
+    f_der = lambda D: inv_target_dfdD(A, gamma, x, D)
+    f_der_slow = lambda D: inv_dfdD(A, gamma, x, D)
+
+    if D0 is None:
+        D0 = 1
+        for _x in x:
+            D0 *= _x
+        D0 = D0 ** (1 / len(x)) * len(x)
     try:
-        return absnewton(f, f_der, D0, handle_D=True)
+        try:
+            return absnewton(f, f_der, D0, handle_D=True, max_iter=100)
+        except ValueError:
+            return absnewton(f, f_der_slow, D0, handle_D=True)
     except KeyboardInterrupt:
         print("D")
         raise
 
 
 class Curve:
+    __slots__ = ("A", "gamma", "n", "p", "x", "solver_calls", "_D_cache")
+
+    # Max relative change of any xp for which D is reseeded from the
+    # previous D instead of being solved from scratch:
+    D_WARM_START_THRESHOLD = 1e-2
+
     def __init__(self, A, gamma, D, n, p=None):
         self.A = A
         self.gamma = gamma
@@ -181,6 +259,8 @@ class Curve:
         else:
             self.p = [10**18] * n
         self.x = [D // n * 10**18 // self.p[i] for i in range(n)]
+        self.solver_calls = 0  # solve_D and solve_x calls, for profiling
+        self._D_cache = None  # ((A, gamma, xp), D) of the last solve
 
     def xp(self):
         return [x * p // 10**18 for x, p in zip(self.x, self.p)]
@@ -189,7 +269,25 @@ class Curve:
         xp = self.xp()
         if any(x <= 0 for x in xp):
             raise ValueError
-        return int(solve_D(self.A, self.gamma, xp))
+
+        # Trades reuse the D of the state left by the previous trade, and
+        # seed the next solve with it:
+        key = (self.A, self.gamma, xp)
+        D0 = None
+        if self._D_cache is not None:
+            cached_key, cached_D = self._D_cache
+            if cached_key == key:
+                return cached_D
+            if cached_key[:2] == key[:2] and all(
+                abs(x - x_old) <= self.D_WARM_START_THRESHOLD * x_old
+                for x, x_old in zip(xp, cached_key[2])
+            ):
+                D0 = cached_D
+
+        self.solver_calls += 1
+        D = int(solve_D(self.A, self.gamma, xp, D0))
+        self._D_cache = (key, D)
+        return D
 
     def cp_invariant(self):
         prod = 10**18
@@ -201,6 +299,7 @@ class Curve:
         xp = self.xp()
         xp[i] = x * self.p[i] // 10**18
         yp = solve_x(self.A, self.gamma, xp, self.D(), j)
+        self.solver_calls += 1
         return int(yp) * 10**18 // self.p[j]
 
 
@@ -234,6 +333,108 @@ def get_all():
     return [i[1] for i in out]
 
 
+def _candle_dtype():
+    import numpy as np
+
+    # Fixed width records, so that the store can be memory-mapped and
+    # records accessed with the same keys as the dicts of get_all():
+    return np.dtype(
+        [
+            ("t", "<i8"),
+            ("open", "<f8"),
+            ("high", "<f8"),
+            ("low", "<f8"),
+            ("close", "<f8"),
+            ("volume", "<f8"),
+            ("pair", "u1", (2,)),
+        ]
+    )
+
+
+def convert_candles(sources, path=CANDLE_STORE):
+    """
+    One-time conversion of kline json dumps into a binary candle store.
+    `sources` maps a pair of coin indices to the json dump of that pair, e.g.
+    {(0, 1): "download/ethbtc.json"}. Candles of all pairs are merged and
+    sorted by time.
+    """
+    import numpy as np
+
+    chunks = []
+    for pair, source in sources.items():
+        with open(source, "r") as f:
+            raw = json.load(f)
+
+        candles = np.empty(len(raw), dtype=_candle_dtype())
+        candles["t"] = [t[0] // 1000 for t in raw]
+        for k, field in enumerate(("open", "high", "low", "close", "volume")):
+            candles[field] = [float(t[k + 1]) for t in raw]
+        candles["pair"] = pair
+        chunks.append(candles)
+        del raw
+
+    candles = np.concatenate(chunks)
+    candles = candles[np.argsort(candles["t"], kind="stable")]
+    np.save(path, candles)
+
+
+def candles_stale(sources=CANDLE_SOURCES, path=CANDLE_STORE):
+    """
+    Whether the candle store at `path` is missing, or older than one of the
+    json dumps it is converted from. Dumps that are not there are ignored,
+    so that a store can be used on its own.
+    """
+    if not os.path.exists(path):
+        return True
+
+    mtime = os.path.getmtime(path)
+    return any(
+        os.path.getmtime(source) > mtime
+        for source in sources.values()
+        if os.path.exists(source)
+    )
+
+
+def update_candles(sources=CANDLE_SOURCES, path=CANDLE_STORE):
+    # (Re)build the candle store if it is stale
+    if candles_stale(sources, path):
+        convert_candles(sources, path)
+
+
+def load_candles(start=None, end=None, path=CANDLE_STORE):
+    """
+    Memory-mapped candles with start <= t < end. The result is a view into
+    the store: nothing is read from disk until the candles are accessed.
+    """
+    import numpy as np
+
+    candles = np.load(path, mmap_mode="r")
+    lo = 0 if start is None else np.searchsorted(candles["t"], start)
+    hi = len(candles) if end is None else np.searchsorted(candles["t"], end)
+    return candles[lo:hi]
+
+
+def iter_candles(candles, pairs=None):
+    for d in candles:
+        if pairs is None or tuple(d["pair"]) in pairs:
+            yield d
+
+
+def get_candles(start=None, end=None, pairs=None):
+    # Prefer the binary store, fall back to the json dump if the store is
+    # missing or older than it:
+    if not candles_stale():
+        return iter_candles(load_candles(start, end), pairs)
+
+    return [
+        d
+        for d in get_all()
+        if (start is None or d["t"] >= start)
+        and (end is None or d["t"] < end)
+        and (pairs is None or d["pair"] in pairs)
+    ]
+
+
 def plot_sample():
     import numpy as np
     import pylab
@@ -277,6 +478,9 @@ class Trader:
         self.total_vol = 0.0
         self.ext_fee = 0  # 0.03e-2
         self.slippage = []
+        self.step_search = "secant"  # or "doubling"
+        self._p0_cache = None
+        self.solver_calls_per_candle = []
 
     def fee(self):
         f = reduction_coefficient(self.curve.xp(), self.fee_gamma)
@@ -289,7 +493,32 @@ class Trader:
             self.curve.x[j] - self.curve.y(self.curve.x[i] + dx_raw, i, j)
         )
 
+    def spot_price(self, i, j):
+        # Analytic counterpart of price(i, j): the ratio of the partial
+        # derivatives of the invariant. Needs a D but no y solve, and has no
+        # finite difference noise.
+        xp = [float(x) for x in self.curve.xp()]
+        args = (self.curve.A, self.curve.gamma, xp, self.curve.D())
+        dfdxi = inv_target_dfdxi(*args, i)
+        if dfdxi != 0:
+            p = (
+                inv_target_dfdxi(*args, j)
+                / dfdxi
+                * self.curve.p[j]
+                / self.curve.p[i]
+            )
+            if isfinite(p) and p > 0:
+                return p
+
+        # The derivatives cancel out at K0 == 1, e.g. in a balanced pool:
+        return self.price(i, j)
+
     def step_for_price(self, dp, sign=1):
+        if self.step_search == "doubling":
+            return self._step_for_price_doubling(dp, sign)
+        return self._step_for_price_secant(dp, sign)
+
+    def _step_for_price_doubling(self, dp, sign=1):
         p0 = self.price(0, 1)
         x0 = self.curve.x[:]
         step = self.dx
@@ -302,6 +531,75 @@ class Trader:
                 return step
             step *= 2
 
+    def _step_for_price_secant(self, dp, sign=1, max_iter=6, rtol=0.5):
+        # |p(step) - p0| is close to a power law in step, so secant steps are
+        # taken on log(step) vs log(dp_), safeguarded by the bracket of the
+        # steps seen so far. Accepts dp <= dp_ <= (1 + rtol) * dp, which is
+        # tighter than the up to 2x overshoot of doubling. Prices are spot
+        # prices: finite difference prices are too noisy for a root finder.
+        x0 = self.curve.x[:]
+        key = (x0, self.curve.p[:])
+        if self._p0_cache is None or self._p0_cache[0] != key:
+            # step_for_price is called for both signs on the same state
+            self._p0_cache = (key, self.spot_price(0, 1))
+        p0 = self._p0_cache[1]
+        max_step = int(0.1 * x0[0])
+
+        def _dp(step):
+            self.curve.x[0] = x0[0] + sign * step
+            return abs(p0 - self.spot_price(0, 1))
+
+        D_cache = self.curve._D_cache  # of x0, for the trades after this
+        lo = (0, 0)  # largest step with dp_ < dp
+        hi = None  # smallest step with dp_ >= dp
+        prev = None
+        try:
+            # Initial guess from x*y=k, where moving x alone by dx moves the
+            # price by dx / x:
+            step = min(max(int(x0[0] * dp / p0), self.dx), max_step)
+            for i in range(max_iter):
+                dp_ = _dp(step)
+                if dp_ >= dp:
+                    if hi is None or step < hi[0]:
+                        hi = (step, dp_)
+                    if dp_ <= (1 + rtol) * dp:
+                        break
+                else:
+                    if step > lo[0]:
+                        lo = (step, dp_)
+                    if step == max_step:
+                        break
+
+                if dp_ == 0:  # below price resolution
+                    new_step = 2 * step
+                else:
+                    power = 1.0  # dp_ ~ step for small trades
+                    if prev and prev[1] > 0 and prev[0] != step:
+                        power = log(dp_ / prev[1]) / log(step / prev[0])
+                    if not power > 0:
+                        power = 1.0
+                    new_step = int(step * (dp / dp_) ** (1 / power))
+
+                if hi is not None and not lo[0] < new_step < hi[0]:
+                    if lo[0] >= hi[0]:  # price noise, no usable bracket
+                        break
+                    new_step = (lo[0] + hi[0]) // 2
+                elif new_step <= lo[0]:
+                    new_step = 2 * lo[0]
+
+                prev = (step, dp_)
+                step = min(max(new_step, 1), max_step)
+        finally:
+            self.curve.x = x0
+            self.curve._D_cache = D_cache
+
+        # Out of iterations short of dp, the largest step evaluated is the
+        # best one:
+        step, dp_ = hi if hi is not None else lo
+        if dp_ > 0:
+            self.slippage.append(step / dp_)
+        return step
+
     def get_xcp(self):
         # First calculate the ideal balance
         # Then calculate, what the constant-product would be
@@ -325,17 +623,18 @@ class Trader:
         """
         Buy y for x
         """
+        curve = self.curve
         try:
             fee = self.fee()
-            x_old = self.curve.x[:]
-            x = self.curve.x[i] + dx
-            y = self.curve.y(x, i, j)
-            dy = self.curve.x[j] - y
-            self.curve.x[i] = x
-            self.curve.x[j] = y + int(dy * fee)
+            x_old = (curve.x[i], curve.x[j])  # undo log of the trade
+            x = x_old[0] + dx
+            y = curve.y(x, i, j)
+            dy = x_old[1] - y
+            curve.x[i] = x
+            curve.x[j] = y + int(dy * fee)
             dy = int(dy * (1 - fee))
             if dx / dy > max_price or dy < 0:
-                self.curve.x = x_old
+                curve.x[i], curve.x[j] = x_old
                 return False
             self.update_xcp()
             return dy
@@ -346,17 +645,18 @@ class Trader:
         """
         Sell y for x
         """
+        curve = self.curve
         try:
             fee = self.fee()
-            x_old = self.curve.x[:]
-            y = self.curve.x[j] + dy
-            x = self.curve.y(y, j, i)
-            dx = self.curve.x[i] - x
-            self.curve.x[i] = x + int(dx * fee)
-            self.curve.x[j] = y
+            x_old = (curve.x[i], curve.x[j])  # undo log of the trade
+            y = x_old[1] + dy
+            x = curve.y(y, j, i)
+            dx = x_old[0] - x
+            curve.x[i] = x + int(dx * fee)
+            curve.x[j] = y
             dx = int(dx * (1 - fee))
             if dx / dy < min_price or dx < 0:
-                self.curve.x = x_old
+                curve.x[i], curve.x[j] = x_old
                 return False
             self.update_xcp()
             return dx
@@ -389,9 +689,14 @@ class Trader:
             self.xcp = old_xcp
 
     def simulate(self, mdata):
+        # mdata can be any iterable of candles, e.g. get_candles()
         last = self.p0
         avg = last
+        t0 = None
         for i, d in enumerate(mdata):
+            if t0 is None:
+                t0 = d["t"]
+            solver_calls = self.curve.solver_calls
             a, b = d["pair"]
             vol = 0
             ext_vol = int(d["volume"] * 1e18)
@@ -433,6 +738,9 @@ class Trader:
             if ctr > 0:
                 self.tweak_price(avg)
             self.total_vol += vol
+            self.solver_calls_per_candle.append(
+                self.curve.solver_calls - solver_calls
+            )
             if self.log:
                 try:
                     print(
@@ -446,7 +754,7 @@ class Trader:
                             self.xcp_profit_real,
                             (
                                 self.xcp_profit_real
-                                ** (86400 * 365 / (d["t"] - mdata[0]["t"] + 1))
+                                ** (86400 * 365 / (d["t"] - t0 + 1))
                                 - 1
                             )
                             * 100,
@@ -458,7 +766,8 @@ class Trader:
 
 
 if __name__ == "__main__":
-    test_data = get_all()
+    update_candles()
+    test_data = load_candles()
     print(test_data[-1])
 
     trader = Trader(
@@ -5,3 +5,22 @@ pytest_plugins = [
     "tests.boa.fixtures.pool",
     "tests.boa.fixtures.factory",
 ]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        help="Rewrite the gas benchmark baseline with the measured values",
+    )
+    parser.addoption(
+        "--gas-threshold",
+        type=float,
+        default=0.01,
+        help="Relative gas increase over the baseline that fails a benchmark",
+    )
+    parser.addoption(
+        "--gas-profile-dir",
+        default=None,
+        help="Directory for the gas profile reports (default: a tmp dir)",
+    )